@@ -1,10 +1,17 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 from unfold.admin import ModelAdmin
 from unfold.decorators import action
 
-from .enums import AppointmentStatus
-from .models import Appointment
+from utils import user_cache
+
+from . import availability, changes, ical
+from .enums import AppointmentEvent, AppointmentStatus, TombstoneReason
+from .models import Appointment, ArchivedAppointment, Host, WaitlistEntry
+from .transitions import OCCUPIED_STATUSES, record_transition, status_event
 
 
 @admin.register(Appointment)
@@ -12,12 +19,14 @@ class AppointmentAdmin(ModelAdmin):
 
     list_display = [
         "get_student_info",
+        "host",
         "date",
         "time_slot",
         "custom_status_display",
+        "visible_from",
         "created_at",
     ]
-    list_filter = ["status", "date", "created_at"]
+    list_filter = ["host", "status", "date", "visible_from", "created_at"]
     search_fields = [
         "user__student_id",
         "user__first_name",
@@ -25,7 +34,10 @@ class AppointmentAdmin(ModelAdmin):
         "reason",
     ]
     date_hierarchy = "date"
-    ordering = ["-date", "time_slot"]
+    ordering = ["-date", "start_time"]
+    list_select_related = ["user", "host"]
+    # 篩選後不再額外對整張表做 COUNT(*)
+    show_full_result_count = False
 
     def get_student_info(self, obj):
         if obj.user:
@@ -45,10 +57,109 @@ class AppointmentAdmin(ModelAdmin):
 
     custom_status_display.short_description = "目前狀態"
 
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            previous_user = form.initial.get("user")
+
+            if not change:
+                record_transition(obj, AppointmentEvent.RELEASED)
+                if obj.user_id:
+                    record_transition(obj, AppointmentEvent.BOOKED, user_id=obj.user_id)
+                return
+
+            # 後台手動改回可預約時，同樣會優先保留給候補者
+            event = None
+            if "status" in form.changed_data:
+                event = status_event(form.initial.get("status"), obj.status)
+            record_transition(obj, event, user_id=previous_user or obj.user_id)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            changes.record_removed([(obj.pk, obj.user_id)], TombstoneReason.DELETED)
+            availability.invalidate({obj.host_id})
+            ical.invalidate_feeds({obj.user_id})
+            user_cache.invalidate({obj.user_id})
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            rows = list(queryset.values_list("pk", "user_id"))
+            changes.record_removed(rows, TombstoneReason.DELETED)
+            availability.invalidate(queryset.values_list("host_id", flat=True))
+            ical.invalidate_feeds({user_id for _, user_id in rows})
+            user_cache.invalidate({user_id for _, user_id in rows})
+            super().delete_queryset(request, queryset)
+
     @action(description="標記為已完成")
     def mark_as_completed(self, request, queryset):
-        queryset.update(status=AppointmentStatus.COMPLETED)
+        with transaction.atomic():
+            availability.invalidate(queryset.values_list("host_id", flat=True))
+            user_ids = set(queryset.values_list("user_id", flat=True))
+            # 已完成的預約仍在行事曆中，狀態 (STATUS) 改變也要更新訂閱內容
+            ical.invalidate_feeds(user_ids)
+            user_cache.invalidate(user_ids)
+            # update() 不會觸發 auto_now 與 save()，需手動更新 updated_at 與版本號
+            queryset.update(
+                status=AppointmentStatus.COMPLETED,
+                updated_at=timezone.now(),
+                version=F("version") + 1,
+            )
 
     @action(description="標記為已取消")
     def mark_as_cancelled(self, request, queryset):
-        queryset.update(status=AppointmentStatus.CANCELLED)
+        with transaction.atomic():
+            occupied = list(queryset.filter(status__in=OCCUPIED_STATUSES))
+            availability.invalidate(queryset.values_list("host_id", flat=True))
+            # 已完成的預約改為取消時也會從行事曆中移除
+            user_ids = set(queryset.values_list("user_id", flat=True))
+            ical.invalidate_feeds(user_ids)
+            user_cache.invalidate(user_ids)
+            queryset.update(
+                status=AppointmentStatus.CANCELLED,
+                updated_at=timezone.now(),
+                version=F("version") + 1,
+            )
+            for appointment in occupied:
+                record_transition(appointment, AppointmentEvent.CANCELLED)
+
+
+@admin.register(Host)
+class HostAdmin(ModelAdmin):
+    list_display = ["name", "slug", "user", "is_active"]
+    list_filter = ["is_active"]
+    search_fields = ["name", "slug"]
+    prepopulated_fields = {"slug": ["name"]}
+    raw_id_fields = ["user"]
+
+
+@admin.register(ArchivedAppointment)
+class ArchivedAppointmentAdmin(ModelAdmin):
+    list_display = [
+        "id",
+        "host",
+        "user",
+        "date",
+        "time_slot",
+        "status",
+        "archived_at",
+    ]
+    list_filter = ["host", "status"]
+    search_fields = ["user__student_id", "user__first_name", "reason"]
+    list_select_related = ["user", "host"]
+    ordering = ["-date", "start_time"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(ModelAdmin):
+    list_display = ["appointment", "user", "status", "offer_expires_at", "created_at"]
+    list_filter = ["status"]
+    search_fields = ["user__student_id", "user__first_name"]
+    list_select_related = ["appointment", "user"]
+    raw_id_fields = ["appointment", "user"]
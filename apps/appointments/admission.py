@@ -0,0 +1,173 @@
+import contextvars
+import functools
+import math
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.signals import request_started
+from rest_framework import status
+from rest_framework.response import Response
+
+from utils.cache import is_shared
+
+TICKET_HEADER = "HTTP_X_QUEUE_TICKET"
+TICKET_SALT = "appointments.admission"
+# 排隊號碼牌有效時間，過期後重新取號
+TICKET_MAX_AGE = 300
+
+ACTIVE_KEY = "admission_active"
+TAIL_KEY = "admission_tail"
+WINDOW_KEY = "admission_window"
+INFLIGHT_KEY = "admission_inflight"
+SERVICE_TIME_KEY = "admission_service_seconds"
+# 尚未量測到處理時間前使用的保守估計 (秒)
+DEFAULT_SERVICE_TIME = 0.2
+
+
+# 請求進入 Django 的時間；處理時間要包含 middleware 與驗證，估計的放行速度才會準
+_request_started_at = contextvars.ContextVar("request_started_at", default=None)
+
+
+def _mark_request_started(**kwargs):
+    _request_started_at.set(time.monotonic())
+
+
+request_started.connect(_mark_request_started, dispatch_uid="admission_request_started")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _incr(key, delta=1, timeout=None):
+    """
+    [Private] 預設快取上的計數器，不存在時從 0 開始。
+    Redis 的 INCR 是原子操作；其他後端的 incr 是先讀再寫，同時遞增可能少算
+    """
+    for _ in range(2):
+        cache.add(key, 0, timeout=timeout)
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            # add 與 incr 之間剛好過期，重新建立
+            continue
+    return delta
+
+
+def _decr(key):
+    try:
+        cache.decr(key)
+    except ValueError:
+        pass
+
+
+def _is_active():
+    """
+    [Private] 記錄每秒請求數；超過 ADMISSION_RATE_THRESHOLD 時開啟排隊，
+    流量降下來 ADMISSION_COOLDOWN_SECONDS 秒後自動關閉
+    """
+    cooldown = _setting("ADMISSION_COOLDOWN_SECONDS", 30)
+    rate = _incr(f"admission_rate_{int(time.time())}", timeout=5)
+    if rate < _setting("ADMISSION_RATE_THRESHOLD", 20):
+        return cache.get(ACTIVE_KEY) is not None
+
+    if cache.add(ACTIVE_KEY, 1, timeout=cooldown):
+        # 新一輪排隊：記下開始時的號碼與時間，放行範圍從這裡隨時間往後推
+        cache.set(WINDOW_KEY, (_incr(TAIL_KEY, 0), time.time()), timeout=None)
+        cache.set(INFLIGHT_KEY, 0, timeout=cooldown)
+    else:
+        cache.touch(ACTIVE_KEY, cooldown)
+    return True
+
+
+def _service_time():
+    return cache.get(SERVICE_TIME_KEY) or DEFAULT_SERVICE_TIME
+
+
+def _head():
+    """
+    [Private] 目前放行到第幾號。
+    同時處理 ADMISSION_CONCURRENCY 位、每位約花平均處理時間，放行範圍依此隨時間前進；
+    以時間推進而非等請求完成，取了號碼牌卻沒有回來的客戶端不會卡住隊伍。
+    """
+    start, started_at = cache.get(WINDOW_KEY) or (0, time.time())
+    concurrency = _setting("ADMISSION_CONCURRENCY", 1)
+    elapsed = time.time() - started_at
+    return start + concurrency + int(elapsed * concurrency / _service_time())
+
+
+def _read_ticket(request):
+    token = request.META.get(TICKET_HEADER)
+    if not token:
+        return None
+    try:
+        return signing.loads(token, salt=TICKET_SALT, max_age=TICKET_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+def _record_service_time(elapsed):
+    """
+    [Private] 以指數移動平均記錄處理時間，用來估計排隊者的等待時間
+    """
+    previous = cache.get(SERVICE_TIME_KEY)
+    average = elapsed if previous is None else previous * 0.8 + elapsed * 0.2
+    cache.set(SERVICE_TIME_KEY, average, timeout=None)
+
+
+def _queued(ticket, position):
+    concurrency = _setting("ADMISSION_CONCURRENCY", 1)
+    retry_after = min(30, max(1, math.ceil(position / concurrency * _service_time())))
+
+    response = Response(
+        {
+            "error": "目前預約人數眾多，已為您排隊，請稍後帶號碼牌重試",
+            "ticket": signing.dumps(ticket, salt=TICKET_SALT),
+            "position": position,
+            "retry_after": retry_after,
+        },
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def admission_controlled(view_method):
+    """
+    預約類 API 的排隊入場控制。
+
+    平常直接放行；每秒請求數超過門檻時改為依號碼牌先來先服務，放行速度約為
+    ADMISSION_CONCURRENCY 位同時預約的處理量，其餘立即回傳 429 與排隊位置、預估等待秒數，
+    客戶端帶 X-Queue-Ticket 標頭重試。被擋下的請求很便宜，不會在 worker 前面越積越多。
+    計數存在預設快取，多個 worker 共用同一條隊伍的前提是預設快取跨行程共用 (設定 REDIS_URL)；
+    預設快取是 locmem 時每個 worker 各算各的，門檻與放行速度都不正確，因此不啟用，一律直接放行。
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not is_shared() or not _is_active():
+            return view_method(self, request, *args, **kwargs)
+
+        ticket = _read_ticket(request)
+        if ticket is None:
+            ticket = _incr(TAIL_KEY)
+
+        head = _head()
+        if ticket > head:
+            return _queued(ticket, ticket - head)
+
+        cooldown = _setting("ADMISSION_COOLDOWN_SECONDS", 30)
+        if _incr(INFLIGHT_KEY, timeout=cooldown) > _setting("ADMISSION_CONCURRENCY", 1):
+            _decr(INFLIGHT_KEY)
+            return _queued(ticket, 0)
+
+        started = _request_started_at.get() or time.monotonic()
+        try:
+            return view_method(self, request, *args, **kwargs)
+        finally:
+            _decr(INFLIGHT_KEY)
+            _record_service_time(time.monotonic() - started)
+
+    return wrapper
@@ -0,0 +1,121 @@
+import heapq
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from utils import user_cache
+
+from . import changes
+from .enums import AppointmentStatus, TombstoneReason
+from .models import Appointment, ArchivedAppointment
+
+# 歸檔時從 Appointment 複製到 ArchivedAppointment 的欄位
+ARCHIVE_FIELDS = [
+    "id",
+    "host_id",
+    "user_id",
+    "date",
+    "time_slot",
+    "start_time",
+    "end_time",
+    "status",
+    "reason",
+    "rejection_reason",
+    "created_at",
+    "updated_at",
+]
+
+
+def default_cutoff(keep_weeks=0):
+    """
+    熱資料保留本週 (往前再保留 keep_weeks 週) 以後的預約，回傳歸檔分界日
+    """
+    today = timezone.now().date()
+    week_start = today - timedelta(days=today.weekday())
+    return week_start - timedelta(weeks=keep_weeks)
+
+
+def archivable(cutoff):
+    """
+    可歸檔的預約：分界日之前的所有時段，以及今天之前已完成/已取消的時段
+    """
+    today = timezone.now().date()
+    return Appointment.objects.filter(
+        Q(date__lt=cutoff)
+        | Q(
+            status__in=[AppointmentStatus.COMPLETED, AppointmentStatus.CANCELLED],
+            date__lt=today,
+        )
+    )
+
+
+def archive_batch(cutoff, batch_size=1000):
+    """
+    搬移一批預約到歸檔表，每批一個短交易，回傳搬移筆數
+    """
+    with transaction.atomic():
+        rows = list(
+            archivable(cutoff)
+            .select_for_update(skip_locked=True)
+            .order_by("pk")
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        ArchivedAppointment.objects.bulk_create(
+            [ArchivedAppointment(**row) for row in rows], ignore_conflicts=True
+        )
+        Appointment.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        changes.record_removed(
+            [(row["id"], row["user_id"]) for row in rows], TombstoneReason.ARCHIVED
+        )
+        user_cache.invalidate(row["user_id"] for row in rows)
+
+    return len(rows)
+
+
+def reaches_archive(start_date):
+    """
+    查詢範圍是否可能包含已歸檔的資料 (歸檔資料一定早於今天)
+    """
+    if not start_date:
+        return True
+    start = parse_date(str(start_date))
+    return start is None or start < timezone.now().date()
+
+
+def filter_date_range(queryset, start_date=None, end_date=None):
+    if start_date and end_date:
+        return queryset.filter(date__range=[start_date, end_date])
+    if start_date:
+        return queryset.filter(date__gte=start_date)
+    if end_date:
+        return queryset.filter(date__lte=end_date)
+    return queryset
+
+
+def history(queryset_filter, start_date=None, end_date=None):
+    """
+    合併熱資料與歸檔資料，依日期 (新到舊)、時間 (早到晚) 排序後逐筆產出。
+    queryset_filter 會同時套用在兩張表的查詢上；範圍未觸及過去時只查熱資料表。
+    """
+    querysets = [Appointment.objects.select_related("user")]
+    if reaches_archive(start_date):
+        querysets.append(ArchivedAppointment.objects.select_related("user"))
+
+    ordered = [
+        queryset_filter(filter_date_range(qs, start_date, end_date))
+        .order_by("-date", "start_time")
+        .iterator(chunk_size=2000)
+        for qs in querysets
+    ]
+    if len(ordered) == 1:
+        return ordered[0]
+
+    return heapq.merge(
+        *ordered, key=lambda appt: (-appt.date.toordinal(), appt.start_time)
+    )
@@ -0,0 +1,220 @@
+import math
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from utils.cache import shared_cache
+from utils.db_router import use_primary
+
+from . import holds, waitlist
+from .enums import AppointmentStatus
+from .models import Appointment
+from .timeslots import parse_time_of_day, parse_time_slot
+
+# 快照最長保留時間；正常情況由版本號失效，這只是保險
+SNAPSHOT_TTL = 60 * 10
+
+# 版本號與快照都存在共用快取 (SHARED_CACHE_ALIAS)：寫入只在處理它的 worker 遞增版本，
+# 存在每個 worker 各一份的預設快取時，其他 worker 會繼續回應舊的快照直到過期；
+# warm_releases 指令在另一個行程預熱的快照也必須讓所有 worker 讀得到
+
+
+def _version_key(host_id):
+    return f"availability_version_{host_id}"
+
+
+def version(host_id):
+    """
+    host 可預約時段的目前版本，任何影響該 host 時段的變更都會遞增
+    """
+    key = _version_key(host_id)
+    value = shared_cache().get(key)
+    if value is None:
+        shared_cache().add(key, int(time.time()), timeout=None)
+        # add 與其他 worker 的 add / bump 競爭，以實際存下的版本為準
+        value = shared_cache().get(key)
+    return value
+
+
+def invalidate(host_ids):
+    """
+    交易提交後讓指定 host 的可預約快照失效，其他 host 的快照不受影響
+    """
+    keys = [_version_key(host_id) for host_id in set(host_ids) if host_id]
+    if not keys:
+        return
+
+    def bump():
+        now = int(time.time())
+        versions = shared_cache().get_many(keys)
+        shared_cache().set_many(
+            {key: max(now, versions.get(key, 0) + 1) for key in keys}, timeout=None
+        )
+
+    transaction.on_commit(bump)
+
+
+def released(queryset, at=None):
+    """
+    只保留在 at (預設為現在) 時已開放的時段
+    """
+    return queryset.filter(
+        Q(visible_from__isnull=True) | Q(visible_from__lte=at or timezone.now())
+    )
+
+
+def next_release(host_id, after):
+    """
+    host 在 after 之後最早的排定開放時間 (沒有則為 None)
+    """
+    return Appointment.objects.filter(
+        host_id=host_id,
+        status=AppointmentStatus.AVAILABLE,
+        visible_from__gt=after,
+    ).aggregate(next_release=Min("visible_from"))["next_release"]
+
+
+def _key(host_id, time_from, time_to):
+    return (
+        f"available_slots_{host_id}_{version(host_id)}"
+        f"_{time_from or ''}_{time_to or ''}"
+    )
+
+
+def _build(host_id, time_from, time_to, at=None):
+    """
+    [Private] 查詢 host 在 at (預設為現在) 時的可預約時段。
+    回傳快照 {"slots": {日期: [(id, 時段)...]}, "valid_from", "valid_until"}，
+    下一次排定開放或候補保留到期時內容會改變，快照只在這之前有效。
+    """
+    at = at or timezone.now()
+    # 快照會被快取並提供給其他使用者，不能用延遲的副本資料建立
+    with use_primary():
+        queryset = released(
+            Appointment.objects.filter(
+                host_id=host_id, status=AppointmentStatus.AVAILABLE
+            ),
+            at,
+        )
+        if time_from:
+            queryset = queryset.filter(start_time__gte=parse_time_of_day(time_from))
+        if time_to:
+            queryset = queryset.filter(start_time__lt=parse_time_of_day(time_to))
+
+        data = {}
+        for pk, date, time_slot in (
+            waitlist.exclude_offered(queryset)
+            .order_by("date", "start_time")
+            .values_list("pk", "date", "time_slot")
+        ):
+            data.setdefault(str(date), []).append((pk, time_slot))
+
+        # 候補保留到期時時段會重新出現，排定開放時會多出新時段
+        valid_until = at + timedelta(seconds=SNAPSHOT_TTL)
+        for moment in (waitlist.next_offer_expiry(host_id), next_release(host_id, at)):
+            if moment is not None:
+                valid_until = min(valid_until, moment)
+
+        return {"slots": data, "valid_from": at, "valid_until": valid_until}
+
+
+def _store(key, snapshot):
+    """
+    [Private] 快取快照到 valid_until 為止；已失效的快照不存
+    """
+    remaining = (snapshot["valid_until"] - timezone.now()).total_seconds()
+    if remaining > 0:
+        shared_cache().set(key, snapshot, timeout=math.ceil(remaining))
+
+
+def warm(host_id, release_at):
+    """
+    在排定開放前預先算好開放當下的快照，存在「下一份快照」的位置；
+    開放時目前的快照到期，讀取端直接改用這一份，不會所有請求同時查資料庫。
+    只預熱未篩選的快照，帶 time_from / time_to 的查詢由它在記憶體中篩選 (見 _snapshot)。
+    回傳是否成功預熱 (開放前又有變更導致快照立刻失效時為 False)。
+    """
+    snapshot = _build(host_id, None, None, at=release_at)
+    if snapshot["valid_until"] <= release_at:
+        return False
+    _store(_key(host_id, None, None) + "_next", snapshot)
+    return True
+
+
+def _filter(snapshot, time_from, time_to):
+    """
+    [Private] 在記憶體中以開始時間篩選未篩選的快照，條件與 _build 的查詢相同
+    """
+    start = parse_time_of_day(time_from) if time_from else None
+    end = parse_time_of_day(time_to) if time_to else None
+
+    data = {}
+    for date, slots in snapshot["slots"].items():
+        for pk, time_slot in slots:
+            start_time = parse_time_slot(time_slot)[0]
+            if start is not None and start_time < start:
+                continue
+            if end is not None and start_time >= end:
+                continue
+            data.setdefault(date, []).append((pk, time_slot))
+    return {**snapshot, "slots": data}
+
+
+def _snapshot(host_id, time_from, time_to):
+    """
+    [Private] 目前有效的快照：先看目前的，已過期則看預熱好的下一份；
+    有篩選條件時再找未篩選的快照 (含預熱的下一份) 在記憶體中篩選，都沒有才重新查詢
+    """
+    now = timezone.now()
+    key = _key(host_id, time_from, time_to)
+    candidates = [key, key + "_next"]
+    if time_from or time_to:
+        unfiltered = _key(host_id, None, None)
+        candidates += [unfiltered, unfiltered + "_next"]
+    found = shared_cache().get_many(candidates)
+
+    for candidate_key in candidates:
+        snapshot = found.get(candidate_key)
+        if snapshot and snapshot["valid_from"] <= now < snapshot["valid_until"]:
+            if candidate_key not in (key, key + "_next"):
+                snapshot = _filter(snapshot, time_from, time_to)
+            if candidate_key != key:
+                _store(key, snapshot)
+            return snapshot["slots"]
+
+    snapshot = _build(host_id, time_from, time_to, at=now)
+    _store(key, snapshot)
+    return snapshot["slots"]
+
+
+def available_slots(host_id, time_from=None, time_to=None, user_id=None):
+    """
+    host 的可預約時段 (依日期分組)，以 host 與版本號分區快取。
+    正被其他學生暫時保留的時段不列出 (保留不寫資料庫，因此在快照之外另外過濾)。
+    time_from / time_to 格式錯誤時拋出 ValueError。
+    """
+    data = _snapshot(host_id, time_from, time_to)
+
+    held = holds.held_by_others(
+        [pk for slots in data.values() for pk, _ in slots], user_id
+    )
+    result = {}
+    for date, slots in data.items():
+        visible = [time_slot for pk, time_slot in slots if pk not in held]
+        if visible:
+            result[date] = visible
+    return result
+
+
+def invalidate_offers(appointment_ids):
+    """
+    候補保留變動 (到期、退出) 時，讓相關時段所屬 host 的快照失效
+    """
+    invalidate(
+        Appointment.objects.filter(id__in=appointment_ids)
+        .values_list("host_id", flat=True)
+        .distinct()
+    )
@@ -0,0 +1,145 @@
+import base64
+import binascii
+import heapq
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .enums import TombstoneReason
+from .models import Appointment, AppointmentTombstone
+
+# 尚未經過 settle lag 的變更先不回傳：較早開始、較晚提交的交易可能寫入更早的 updated_at
+SETTLE_SECONDS = getattr(settings, "CHANGES_SETTLE_SECONDS", 2)
+
+# 移除紀錄保留天數；比這更舊的 cursor 無法補齊移除，需要重新完整同步
+TOMBSTONE_RETENTION_DAYS = getattr(settings, "CHANGES_TOMBSTONE_RETENTION_DAYS", 7)
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def encode_cursor(position):
+    """
+    position 為 {"a": [updated_at, id], "t": [created_at, id]}，對外為不透明字串
+    """
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    cursor 格式錯誤時拋出 ValueError，早於移除紀錄保留期限時拋出 CursorExpired
+    """
+    if not cursor:
+        return {"a": None, "t": None}
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+        for key in ("a", "t"):
+            if position[key] is not None:
+                position[key] = [parse_datetime(position[key][0]), position[key][1]]
+                if position[key][0] is None:
+                    raise ValueError
+    except (binascii.Error, ValueError, KeyError, IndexError, TypeError):
+        raise ValueError("invalid cursor")
+
+    horizon = timezone.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    if any(position[key] and position[key][0] < horizon for key in ("a", "t")):
+        raise CursorExpired
+    return position
+
+
+def _after(queryset, field, position):
+    """
+    [Private] (field, id) 嚴格大於 cursor 位置的資料列，依同樣順序排序
+    """
+    if position is not None:
+        moment, pk = position
+        queryset = queryset.filter(
+            Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "id__gt": pk})
+        )
+    return queryset.order_by(field, "id")
+
+
+def record_removed(rows, reason):
+    """
+    記錄從同步範圍移除的預約，rows 為 (appointment_id, user_id) 序列
+    """
+    AppointmentTombstone.objects.bulk_create(
+        [
+            AppointmentTombstone(appointment_id=pk, user_id=user_id, reason=reason)
+            for pk, user_id in rows
+        ]
+    )
+
+
+def changes_since(cursor, user=None, limit=500):
+    """
+    回傳 cursor 之後的變更：(變更的預約, 移除的 [{"id", "reason"}], 下一個 cursor, 是否還有更多)。
+    user 為 None 時是全部預約 (後台)，否則只含該學生的預約與他失去的預約。
+    同一頁中同一個 id 只會出現在其中一邊，以最後一個事件為準。
+    """
+    position = decode_cursor(cursor)
+    settled = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+
+    appointments = Appointment.objects.select_related("user").filter(
+        updated_at__lte=settled
+    )
+    tombstones = AppointmentTombstone.objects.filter(created_at__lte=settled)
+    if user is None:
+        # 後台看得到所有預約，取消預約只是一般的更新
+        tombstones = tombstones.exclude(reason=TombstoneReason.UNBOOKED)
+    else:
+        appointments = appointments.filter(user=user)
+        tombstones = tombstones.filter(user=user)
+
+    appointments = list(_after(appointments, "updated_at", position["a"])[: limit + 1])
+    tombstones = list(_after(tombstones, "created_at", position["t"])[: limit + 1])
+
+    # 兩邊依時間合併，只取前 limit 筆，cursor 才不會跳過另一邊較早的事件
+    events = heapq.merge(
+        (((row.updated_at, row.id), "a", row) for row in appointments),
+        (((row.created_at, row.id), "t", row) for row in tombstones),
+        key=lambda event: event[0],
+    )
+    latest = {}
+    for count, (key, kind, row) in enumerate(events):
+        if count == limit:
+            break
+        position[kind] = list(key)
+        appointment_id = row.id if kind == "a" else row.appointment_id
+        latest.pop(appointment_id, None)
+        latest[appointment_id] = (kind, row)
+
+    has_more = len(appointments) + len(tombstones) > limit
+    if not has_more:
+        # 已追上 settle 時間點，cursor 前移，久未變動的 cursor 也不會過期
+        for kind in ("a", "t"):
+            position[kind] = max(position[kind] or [settled, 0], [settled, 0])
+    changed = [row for kind, row in latest.values() if kind == "a"]
+    removed = [
+        {"id": row.appointment_id, "reason": row.reason}
+        for kind, row in latest.values()
+        if kind == "t"
+    ]
+
+    next_position = {
+        key: None if value is None else [value[0].isoformat(), value[1]]
+        for key, value in position.items()
+    }
+    return changed, removed, encode_cursor(next_position), has_more
+
+
+def prune_tombstones():
+    """
+    刪除超過保留期限的移除紀錄，回傳刪除筆數
+    """
+    horizon = timezone.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = AppointmentTombstone.objects.filter(created_at__lt=horizon).delete()
+    return deleted
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from utils.cache import is_shared
+
+
+@register()
+def check_hold_store(app_configs, **kwargs):
+    """
+    時段保留與可預約快照必須存在所有 worker 共用的快取，否則其他 worker 看不到保留，
+    同一時段可被兩人保留，快照失效也只在處理寫入的 worker 生效
+    """
+    alias = getattr(settings, "SHARED_CACHE_ALIAS", "shared")
+    if alias in settings.CACHES and is_shared(alias):
+        return []
+
+    return [
+        Error(
+            f"CACHES[{alias!r}] 未設定或不是跨行程共用的快取，"
+            "時段保留與可預約快照的失效只在處理請求的 worker 生效。",
+            hint="設定 REDIS_URL，或使用 DatabaseCache 並執行 createcachetable。",
+            id="appointments.E001",
+        )
+    ]
@@ -7,3 +7,27 @@ class AppointmentStatus(models.TextChoices):
     CONFIRMED = "confirmed", "已確認"
     COMPLETED = "completed", "已完成"
     CANCELLED = "cancelled", "已取消"
+
+
+class WaitlistStatus(models.TextChoices):
+    WAITING = "waiting", "候補中"
+    OFFERED = "offered", "保留中"
+    ACCEPTED = "accepted", "已接受"
+    EXPIRED = "expired", "已逾期"
+    LEFT = "left", "已退出"
+
+
+class TombstoneReason(models.TextChoices):
+    DELETED = "deleted", "已刪除"
+    ARCHIVED = "archived", "已歸檔"
+    UNBOOKED = "unbooked", "已取消預約"
+
+
+class AppointmentEvent(models.TextChoices):
+    RELEASED = "released", "釋出時段"
+    BOOKED = "booked", "學生預約"
+    RESCHEDULED_IN = "rescheduled_in", "改期移入"
+    RESCHEDULED_OUT = "rescheduled_out", "改期移出"
+    CONFIRMED = "confirmed", "確認預約"
+    REJECTED = "rejected", "駁回預約"
+    CANCELLED = "cancelled", "取消預約"
@@ -0,0 +1,83 @@
+import time
+
+from django.conf import settings
+
+from utils.cache import shared_cache
+
+# 搶到前一個保留剛好到期時，重試 add 的次數
+ADD_ATTEMPTS = 3
+
+
+def _ttl():
+    return getattr(settings, "SLOT_HOLD_SECONDS", 90)
+
+
+def _key(appointment_id):
+    return f"slot_hold_{appointment_id}"
+
+
+def _user_key(user_id):
+    return f"slot_hold_user_{user_id}"
+
+
+def hold(appointment_id, user_id):
+    """
+    替學生暫時保留時段 (只寫共用快取，不寫資料庫)，回傳保留到期的 Unix 時間；
+    時段已被其他人保留時回傳 None。每位學生同時只保留一個時段，保留新時段時釋放舊的。
+    """
+    cache = shared_cache()
+    expires_at = int(time.time()) + _ttl()
+    value = (user_id, expires_at)
+
+    # add 是原子操作，同一時段只有一個人搶得到
+    for _ in range(ADD_ATTEMPTS):
+        if cache.add(_key(appointment_id), value, timeout=_ttl()):
+            break
+        current = cache.get(_key(appointment_id))
+        if current is None:
+            # 前一個保留在 add 與 get 之間到期，重新搶而不是直接覆寫
+            continue
+        if current[0] != user_id:
+            return None
+        # 自己的保留：延長期限
+        cache.set(_key(appointment_id), value, timeout=_ttl())
+        break
+    else:
+        return None
+
+    previous = cache.get(_user_key(user_id))
+    cache.set(_user_key(user_id), appointment_id, timeout=_ttl())
+    if previous is not None and previous != appointment_id:
+        release(previous, user_id)
+    return expires_at
+
+
+def holder(appointment_id):
+    """
+    目前保留該時段的 user id (沒有則為 None)，保留到期後快取自動失效，不需要清理
+    """
+    current = shared_cache().get(_key(appointment_id))
+    return None if current is None else current[0]
+
+
+def release(appointment_id, user_id):
+    """
+    釋放學生自己的保留；預約完成後也會呼叫
+    """
+    cache = shared_cache()
+    if holder(appointment_id) == user_id:
+        cache.delete(_key(appointment_id))
+    if cache.get(_user_key(user_id)) == appointment_id:
+        cache.delete(_user_key(user_id))
+
+
+def held_by_others(appointment_ids, user_id=None):
+    """
+    以一次 get_many 找出正被其他學生保留的時段 id
+    """
+    keys = {_key(pk): pk for pk in appointment_ids}
+    return {
+        keys[key]
+        for key, (holder_id, _) in shared_cache().get_many(list(keys)).items()
+        if holder_id != user_id
+    }
@@ -0,0 +1,260 @@
+import secrets
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from utils.cache import shared_cache
+from utils.db_router import use_primary
+
+from .enums import AppointmentStatus
+from .models import Appointment, CalendarFeed
+
+STAFF_OWNER = "staff"
+
+# 放進行事曆的狀態
+FEED_STATUSES = [
+    AppointmentStatus.SCHEDULED,
+    AppointmentStatus.CONFIRMED,
+    AppointmentStatus.COMPLETED,
+]
+
+# 教師訂閱預設涵蓋的範圍，超出範圍需帶 start/end 參數改以串流產生
+STAFF_FEED_PAST = timedelta(days=30)
+STAFF_FEED_FUTURE = timedelta(days=180)
+
+# 版本號、token 對應與內容都存在共用快取 (SHARED_CACHE_ALIAS)：存在每個 worker 各一份的
+# 預設快取時，沒處理到寫入的 worker 會持續回應舊內容與舊 ETag，並對舊 ETag 回應 304
+
+# token 對應的訂閱對象只短暫快取：停用帳號或變更教師身分後，最晚在這段時間後生效
+TOKEN_CACHE_TIMEOUT = 60 * 5
+BODY_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+_ICS_STATUS = {
+    AppointmentStatus.SCHEDULED: "TENTATIVE",
+    AppointmentStatus.CONFIRMED: "CONFIRMED",
+    AppointmentStatus.COMPLETED: "CONFIRMED",
+}
+
+
+def owner_for(user):
+    return STAFF_OWNER if user.is_staff else f"user_{user.pk}"
+
+
+def _token_key(token):
+    return f"calendar_feed_token_{token}"
+
+
+def _version_key(owner):
+    return f"calendar_feed_version_{owner}"
+
+
+def body_key(owner, version):
+    return f"calendar_feed_body_{owner}_{version}"
+
+
+def issue_token(user, rotate=False):
+    """
+    取得 (或重新產生) 使用者的訂閱 token
+    """
+    # GET 請求也可能建立 token，讀取須走主資料庫以免副本延遲造成重複建立
+    with use_primary():
+        feed = CalendarFeed.objects.filter(user=user).first()
+        if feed and not rotate:
+            return feed.token
+
+        token = secrets.token_urlsafe(32)
+        if feed:
+            old_key = _token_key(feed.token)
+            feed.token = token
+            feed.save(update_fields=["token"])
+            # 提交後才刪除，避免提交前的查詢又把舊 token 寫回快取
+            transaction.on_commit(lambda: shared_cache().delete(old_key))
+        else:
+            CalendarFeed.objects.create(user=user, token=token)
+        return token
+
+
+def resolve_owner(token):
+    """
+    由 token 找出訂閱對象；命中快取時不查資料庫
+    """
+    owner = shared_cache().get(_token_key(token))
+    if owner is not None:
+        return owner
+
+    feed = (
+        CalendarFeed.objects.select_related("user")
+        .filter(token=token, user__is_active=True)
+        .first()
+    )
+    if feed is None:
+        return None
+
+    owner = owner_for(feed.user)
+    shared_cache().set(_token_key(token), owner, timeout=TOKEN_CACHE_TIMEOUT)
+    return owner
+
+
+def _today_start():
+    """
+    [Private] 今天 (當地時間) 零點的 Unix 時間
+    """
+    now = timezone.localtime()
+    return int(now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+
+
+def feed_version(owner):
+    """
+    回傳訂閱內容的版本 (最後變更的 Unix 時間)，同時作為 ETag 與 Last-Modified。
+    教師訂閱的範圍隨日期移動，版本至少是今天零點，換日後內容快取與 ETag 都會更新。
+    """
+    cache = shared_cache()
+    version = cache.get(_version_key(owner))
+    if version is None:
+        cache.add(_version_key(owner), int(time.time()), timeout=None)
+        version = cache.get(_version_key(owner)) or int(time.time())
+    if owner == STAFF_OWNER:
+        version = max(version, _today_start())
+    return version
+
+
+def invalidate_feeds(user_ids):
+    """
+    在交易提交後讓相關學生與教師的訂閱內容失效
+    """
+    owners = [f"user_{user_id}" for user_id in user_ids if user_id] + [STAFF_OWNER]
+
+    def bump():
+        # +1 確保同一秒內的連續變更仍會產生新版本
+        cache = shared_cache()
+        now = int(time.time())
+        versions = cache.get_many([_version_key(owner) for owner in owners])
+        cache.set_many(
+            {
+                _version_key(owner): max(now, versions.get(_version_key(owner), 0) + 1)
+                for owner in owners
+            },
+            timeout=None,
+        )
+
+    transaction.on_commit(bump)
+
+
+def feed_queryset(owner):
+    queryset = Appointment.objects.select_related("user").filter(
+        status__in=FEED_STATUSES
+    )
+    if owner == STAFF_OWNER:
+        today = timezone.localdate()
+        return queryset.filter(
+            date__range=[today - STAFF_FEED_PAST, today + STAFF_FEED_FUTURE]
+        )
+    return queryset.filter(user_id=int(owner.removeprefix("user_")))
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    """
+    [Private] RFC 5545：每行不超過 75 bytes，續行以一個空白開頭
+    """
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+
+    parts = []
+    current = ""
+    for char in line:
+        if len((current + char).encode("utf-8")) > 75:
+            parts.append(current)
+            current = " "
+        current += char
+    parts.append(current)
+    return "\r\n".join(parts) + "\r\n"
+
+
+def _format_local(date, clock):
+    # 使用 floating time：行事曆 App 會以裝置所在時區顯示，與學生看到的時段字串一致
+    return datetime.combine(date, clock).strftime("%Y%m%dT%H%M%S")
+
+
+def _event_lines(appointment, include_student):
+    summary = "Office Hour"
+    if include_student and appointment.user:
+        summary = (
+            f"Office Hour - {appointment.user.student_id} "
+            f"{appointment.user.last_name}{appointment.user.first_name}"
+        )
+
+    stamp = appointment.updated_at.astimezone(dt_timezone.utc)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:appointment-{appointment.pk}@slotmate",
+        f"DTSTAMP:{stamp.strftime('%Y%m%dT%H%M%SZ')}",
+        f"DTSTART:{_format_local(appointment.date, appointment.start_time)}",
+        f"DTEND:{_format_local(appointment.date, appointment.end_time)}",
+        f"SUMMARY:{_escape(summary)}",
+        f"STATUS:{_ICS_STATUS.get(appointment.status, 'CONFIRMED')}",
+    ]
+    if appointment.reason:
+        lines.append(f"DESCRIPTION:{_escape(appointment.reason)}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def iter_calendar(appointments, name, include_student=False):
+    """
+    逐段產生 .ics 內容，可直接交給 StreamingHttpResponse
+    """
+    header = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//SlotMate//Office Hours//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+    ]
+    yield "".join(_fold(line) for line in header)
+
+    for appointment in appointments:
+        yield "".join(
+            _fold(line) for line in _event_lines(appointment, include_student)
+        )
+
+    yield _fold("END:VCALENDAR")
+
+
+def render_feed(owner):
+    """
+    產生並快取指定版本的訂閱內容，回傳 bytes
+    """
+    cache = shared_cache()
+    version = feed_version(owner)
+    body = cache.get(body_key(owner, version))
+    if body is not None:
+        return body
+
+    is_staff = owner == STAFF_OWNER
+    # 內容依版本號快取，不能用延遲的副本資料建立
+    with use_primary():
+        body = "".join(
+            iter_calendar(
+                feed_queryset(owner).order_by("date", "start_time").iterator(),
+                "SlotMate (Staff)" if is_staff else "SlotMate",
+                include_student=is_staff,
+            )
+        ).encode("utf-8")
+    cache.set(body_key(owner, version), body, timeout=BODY_CACHE_TIMEOUT)
+    return body
@@ -0,0 +1,43 @@
+import time
+
+from appointments.archive import archive_batch, default_cutoff
+from appointments.changes import prune_tombstones
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "將過去與已結束的預約分批搬移到歷史歸檔表"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--keep-weeks",
+            type=int,
+            default=0,
+            help="除了本週之外，額外保留幾週的過去預約在熱資料表",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="每批之間暫停的秒數，讓線上交易有機會取得鎖",
+        )
+
+    def handle(self, *args, **kwargs):
+        cutoff = default_cutoff(kwargs["keep_weeks"])
+        batch_size = kwargs["batch_size"]
+        total = 0
+
+        while True:
+            moved = archive_batch(cutoff, batch_size=batch_size)
+            total += moved
+            if moved < batch_size:
+                break
+            time.sleep(kwargs["pause"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"已歸檔 {total} 筆 {cutoff} 之前或已結束的預約")
+        )
+
+        pruned = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"已清除 {pruned} 筆過期的移除紀錄"))
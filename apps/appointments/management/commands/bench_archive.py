@@ -0,0 +1,163 @@
+import time
+from datetime import timedelta
+
+from appointments import archive, availability
+from appointments.enums import AppointmentStatus
+from appointments.models import Appointment, ArchivedAppointment, Host
+from appointments.timeslots import parse_time_slot
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+SLOTS_PER_DAY = 16
+# 歸檔前的過去時段：已完成、已取消、沒人預約 (仍為可預約) 的比例
+PAST_STATUSES = [AppointmentStatus.COMPLETED] * 3 + [
+    AppointmentStatus.CANCELLED,
+    AppointmentStatus.AVAILABLE,
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "比較歸檔前後本週列表與可預約時段查詢的時間，並量測歸檔速度 (在交易中執行後還原)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--hosts", type=int, default=100)
+        parser.add_argument(
+            "--future-days",
+            type=int,
+            default=14,
+            help="本週起算的未來天數，這些時段留在熱資料表",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def _measure(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    def _slots(self, hosts, first_day, days, today):
+        """
+        [Private] 依日期、host、時段順序產生預約，過去的時段依 PAST_STATUSES 輪流分配狀態
+        """
+        time_slots = []
+        for i in range(SLOTS_PER_DAY):
+            minutes = 8 * 60 + i * 30
+            time_slot = (
+                f"{minutes // 60:02d}:{minutes % 60:02d}-"
+                f"{(minutes + 30) // 60:02d}:{(minutes + 30) % 60:02d}"
+            )
+            time_slots.append((time_slot, *parse_time_slot(time_slot)))
+
+        index = 0
+        for day in range(days):
+            date = first_day + timedelta(days=day)
+            for host in hosts:
+                for time_slot, start_time, end_time in time_slots:
+                    status = (
+                        PAST_STATUSES[index % len(PAST_STATUSES)]
+                        if date < today
+                        else AppointmentStatus.AVAILABLE
+                    )
+                    index += 1
+                    yield Appointment(
+                        host=host,
+                        date=date,
+                        time_slot=time_slot,
+                        start_time=start_time,
+                        end_time=end_time,
+                        status=status,
+                    )
+
+    def _insert(self, slots, batch_size):
+        batch = []
+        for slot in slots:
+            batch.append(slot)
+            if len(batch) >= batch_size:
+                Appointment.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Appointment.objects.bulk_create(batch)
+
+    def handle(self, *args, **kwargs):
+        rows, repeat = kwargs["rows"], kwargs["repeat"]
+        batch_size = kwargs["batch_size"]
+
+        today = timezone.localdate()
+        week_start = archive.default_cutoff()
+        week_end = week_start + timedelta(days=6)
+        future_days = kwargs["future_days"]
+
+        try:
+            with transaction.atomic():
+                hosts = [
+                    Host.objects.create(name=f"bench {i}", slug=f"bench-archive-{i}")
+                    for i in range(kwargs["hosts"])
+                ]
+                days = max(future_days + 1, rows // (len(hosts) * SLOTS_PER_DAY))
+                first_day = (
+                    week_start + timedelta(days=future_days) - timedelta(days=days)
+                )
+
+                started = time.perf_counter()
+                # bulk_create 不會經過 save()，開始/結束時間已自行填入
+                self._insert(self._slots(hosts, first_day, days, today), batch_size)
+                self.stdout.write(
+                    f"建立 {Appointment.objects.count()} 筆預約 "
+                    f"({first_day} ~ {first_day + timedelta(days=days - 1)})："
+                    f"{time.perf_counter() - started:.1f} s"
+                )
+
+                def week_list():
+                    # 後台列表 (admin_list) 查詢本週時的路徑
+                    return len(
+                        list(archive.history(lambda qs: qs, week_start, week_end))
+                    )
+
+                def available():
+                    # 學生查詢可預約時段 (未命中快照時)
+                    snapshot = availability._build(hosts[0].pk, None, None)
+                    return sum(len(slots) for slots in snapshot["slots"].values())
+
+                def report(label):
+                    self.stdout.write(
+                        f"[{label}] 熱資料 {Appointment.objects.count()} 筆 / "
+                        f"歸檔 {ArchivedAppointment.objects.count()} 筆"
+                    )
+                    for name, func in (
+                        ("本週列表", week_list),
+                        ("可預約時段", available),
+                    ):
+                        count, elapsed = self._measure(func, repeat)
+                        self.stdout.write(
+                            f"  {name}: {count:7d} 筆  {elapsed * 1000:9.2f} ms"
+                        )
+
+                report("歸檔前")
+
+                started = time.perf_counter()
+                moved = 0
+                while True:
+                    batch = archive.archive_batch(week_start, batch_size=batch_size)
+                    moved += batch
+                    if batch < batch_size:
+                        break
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"歸檔 {moved} 筆：{elapsed:.1f} s ({moved / elapsed:,.0f} 筆/s，"
+                    f"每批 {batch_size} 筆)"
+                )
+
+                report("歸檔後")
+                raise Rollback
+        except Rollback:
+            pass
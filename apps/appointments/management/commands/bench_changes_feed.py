@@ -0,0 +1,107 @@
+import time
+from datetime import date, timedelta
+
+from appointments import changes
+from appointments.enums import AppointmentStatus
+from appointments.models import Appointment, Host
+from appointments.serializers import AppointmentSerializer
+from appointments.timeslots import parse_time_slot
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "比較完整重新取得列表與增量同步的回應大小與伺服器時間 (在交易中執行後還原)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument("--changed", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def _measure(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return len(body), best
+
+    def handle(self, *args, **kwargs):
+        rows, changed, repeat = kwargs["rows"], kwargs["changed"], kwargs["repeat"]
+        renderer = JSONRenderer()
+
+        try:
+            with transaction.atomic():
+                host = Host.objects.create(name="bench", slug="bench-changes-feed")
+                start = date(2000, 1, 1)
+                slots = []
+                for i in range(rows):
+                    minutes = 8 * 60 + i % 16 * 30
+                    time_slot = (
+                        f"{minutes // 60:02d}:{minutes % 60:02d}-"
+                        f"{(minutes + 30) // 60:02d}:{(minutes + 30) % 60:02d}"
+                    )
+                    start_time, end_time = parse_time_slot(time_slot)
+                    slots.append(
+                        Appointment(
+                            host=host,
+                            date=start + timedelta(days=i // 16),
+                            time_slot=time_slot,
+                            start_time=start_time,
+                            end_time=end_time,
+                            status=AppointmentStatus.AVAILABLE,
+                        )
+                    )
+                # bulk_create 不會經過 save()，開始/結束時間需自行填入
+                Appointment.objects.bulk_create(slots)
+
+                # 讓既有資料落在 cursor 之前，再更新其中幾筆模擬兩次輪詢之間的變更
+                now = timezone.now()
+                synced_at = now - timedelta(minutes=10)
+                queryset = Appointment.objects.filter(host=host)
+                queryset.update(updated_at=synced_at - timedelta(minutes=1))
+                queryset.filter(
+                    pk__in=queryset.order_by("?").values("pk")[:changed]
+                ).update(
+                    status=AppointmentStatus.CANCELLED,
+                    updated_at=now - timedelta(minutes=5),
+                )
+                cursor = changes.encode_cursor(
+                    {"a": [synced_at.isoformat(), 0], "t": [synced_at.isoformat(), 0]}
+                )
+
+                def full():
+                    return renderer.render(
+                        AppointmentSerializer(
+                            Appointment.objects.select_related("user"), many=True
+                        ).data
+                    )
+
+                def delta():
+                    result, removed, next_cursor, has_more = changes.changes_since(
+                        cursor
+                    )
+                    return renderer.render(
+                        {
+                            "results": AppointmentSerializer(result, many=True).data,
+                            "removed": removed,
+                            "cursor": next_cursor,
+                            "has_more": has_more,
+                        }
+                    )
+
+                for label, func in (("完整列表", full), ("增量同步", delta)):
+                    size, elapsed = self._measure(func, repeat)
+                    self.stdout.write(
+                        f"{label}: {size / 1024:9.1f} KB  {elapsed * 1000:8.2f} ms"
+                    )
+                raise Rollback
+        except Rollback:
+            pass
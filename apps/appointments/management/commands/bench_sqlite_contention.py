@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+from config.sqlite_settings import SQLITE_OPTIONS
+from utils.db import retry_on_lock
+
+ALIAS = "contention_bench"
+
+# 調校前：rollback journal、DEFERRED 交易；分別以不等待寫入鎖與 Python 預設的 5 秒量測
+PROFILES = {
+    "no-wait": {"timeout": 0},
+    "default": {},
+    "tuned": SQLITE_OPTIONS,
+}
+
+
+def _configure(path, options):
+    """
+    [Private] 在子行程中註冊一個指向測試檔案的資料庫連線
+    """
+    configured = connections.configure_settings(
+        {
+            **connections.settings,
+            ALIAS: {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": path,
+                "OPTIONS": options,
+            },
+        }
+    )
+    connections.settings[ALIAS] = configured[ALIAS]
+    # 丟棄上一輪以舊設定建立的連線物件
+    try:
+        del connections[ALIAS]
+    except AttributeError:
+        pass
+
+
+def _book_once(slot_count, worker, i):
+    """
+    [Private] 模擬預約流程：先讀取時段再寫入，是 DEFERRED 交易最容易互相卡住的寫法
+    """
+    slot_id = (worker * 7919 + i) % slot_count + 1
+    with transaction.atomic(using=ALIAS):
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute("SELECT version FROM bench_slot WHERE id = %s", [slot_id])
+            (version,) = cursor.fetchone()
+            cursor.execute(
+                "UPDATE bench_slot SET version = %s, user_id = %s WHERE id = %s",
+                [version + 1, worker, slot_id],
+            )
+
+
+def _worker(path, profile, worker, operations, slot_count, results):
+    _configure(path, PROFILES[profile])
+    book = _book_once
+    if profile == "tuned":
+        book = retry_on_lock(_book_once, using=ALIAS)
+
+    ok = failed = 0
+    for i in range(operations):
+        try:
+            book(slot_count, worker, i)
+            ok += 1
+        except OperationalError:
+            failed += 1
+    connections[ALIAS].close()
+    results.put((ok, failed))
+
+
+class Command(BaseCommand):
+    help = "多行程同時寫入 SQLite 的壓力測試，比較調校前後的錯誤率與吞吐量"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=8)
+        parser.add_argument("--operations", type=int, default=200)
+        parser.add_argument("--slots", type=int, default=50)
+
+    def _prepare(self, path, profile, slot_count):
+        _configure(path, PROFILES[profile])
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE bench_slot "
+                "(id INTEGER PRIMARY KEY, user_id INTEGER, version INTEGER)"
+            )
+            cursor.executemany(
+                "INSERT INTO bench_slot (id, version) VALUES (%s, 0)",
+                [(i,) for i in range(1, slot_count + 1)],
+            )
+        connections[ALIAS].close()
+
+    def handle(self, *args, **kwargs):
+        processes = kwargs["processes"]
+        operations = kwargs["operations"]
+        slot_count = kwargs["slots"]
+        context = multiprocessing.get_context("fork")
+
+        for profile in PROFILES:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "bench.sqlite3")
+                self._prepare(path, profile, slot_count)
+
+                results = context.Queue()
+                workers = [
+                    context.Process(
+                        target=_worker,
+                        args=(path, profile, n, operations, slot_count, results),
+                    )
+                    for n in range(processes)
+                ]
+                started = time.perf_counter()
+                for process in workers:
+                    process.start()
+                totals = [results.get() for _ in workers]
+                for process in workers:
+                    process.join()
+                elapsed = time.perf_counter() - started
+
+            ok = sum(result[0] for result in totals)
+            failed = sum(result[1] for result in totals)
+            self.stdout.write(
+                f"{profile:>8}: {ok / elapsed:8.1f} 筆成功/秒  "
+                f"錯誤率 {failed / (ok + failed):6.1%}  "
+                f"({ok} 成功 / {failed} 失敗，{elapsed:.2f} 秒)"
+            )
@@ -0,0 +1,169 @@
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from appointments.enums import AppointmentStatus
+from appointments.models import Appointment, Host
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+LOADTEST_PREFIX = "LOADTEST"
+HOST_SLUG = "loadtest"
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "對執行中的伺服器模擬大量學生同時預約 (每人一個時段)，"
+        "回報端到端延遲、排隊次數與逾時數；結束後刪除測試資料"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--clients", type=int, default=100)
+        parser.add_argument(
+            "--timeout", type=float, default=30, help="單一請求逾時秒數"
+        )
+        parser.add_argument(
+            "--deadline", type=float, default=120, help="每位學生放棄預約前的總秒數"
+        )
+
+    def _prepare(self, clients):
+        User = get_user_model()
+        host, _ = Host.objects.get_or_create(
+            slug=HOST_SLUG, defaults={"name": "Load test"}
+        )
+        users = User.objects.bulk_create(
+            User(
+                student_id=f"{LOADTEST_PREFIX}{i:05d}",
+                email=f"loadtest{i}@example.com",
+                grade=1,
+                department="LOADTEST",
+                is_first_login=False,
+            )
+            for i in range(clients)
+        )
+        start = timezone.now().date() + timedelta(days=1)
+        slots = []
+        for i in range(clients):
+            slot = Appointment(
+                host=host,
+                date=start + timedelta(days=i // 16),
+                time_slot=f"{8 + i % 16 // 2:02d}:{i % 2 * 30:02d}-"
+                f"{8 + (i % 16 + 1) // 2:02d}:{(i + 1) % 2 * 30:02d}",
+                status=AppointmentStatus.AVAILABLE,
+            )
+            slot.save()
+            slots.append(slot)
+        users = User.objects.filter(student_id__startswith=LOADTEST_PREFIX).order_by(
+            "student_id"
+        )
+        return host, list(zip(users, slots))
+
+    def _cleanup(self, host):
+        Appointment.objects.filter(host=host).delete()
+        host.delete()
+        get_user_model().objects.filter(student_id__startswith=LOADTEST_PREFIX).delete()
+
+    def _book(self, base_url, user, slot, timeout, deadline):
+        """
+        持續嘗試預約直到成功、失敗或超過 deadline；遇到 429 依 Retry-After 帶號碼牌重試，
+        同一把冪等鍵的前一個請求仍在處理 (409 + Retry-After) 時稍後重試
+        """
+        token = str(RefreshToken.for_user(user).access_token)
+        # 逾時後重試時由冪等鍵重播第一次的結果，不會被誤判為時段已被預約
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+            "Idempotency-Key": str(uuid.uuid4()),
+        }
+        result = {"queued": 0, "timeouts": 0, "requests": []}
+        started = time.monotonic()
+
+        while time.monotonic() - started < deadline:
+            request = urllib.request.Request(
+                f"{base_url}/api/appointments/{slot.pk}/book/",
+                data=json.dumps({"reason": "load test"}).encode(),
+                headers=headers,
+                method="PATCH",
+            )
+            sent = time.monotonic()
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    status_code, body, retry_after = response.status, {}, None
+            except urllib.error.HTTPError as error:
+                status_code = error.code
+                body = json.loads(error.read() or b"{}")
+                retry_after = error.headers.get("Retry-After")
+            except (socket.timeout, TimeoutError, urllib.error.URLError):
+                result["timeouts"] += 1
+                result["requests"].append(time.monotonic() - sent)
+                continue
+            result["requests"].append(time.monotonic() - sent)
+
+            if status_code == 409 and retry_after:
+                time.sleep(float(retry_after))
+                continue
+            if status_code != 429:
+                result["status"] = status_code
+                break
+            result["queued"] += 1
+            headers["X-Queue-Ticket"] = body["ticket"]
+            time.sleep(body.get("retry_after", 1))
+        else:
+            result["status"] = "gave up"
+
+        result["total"] = time.monotonic() - started
+        return result
+
+    def handle(self, *args, **kwargs):
+        clients = kwargs["clients"]
+        host, pairs = self._prepare(clients)
+        try:
+            barrier = threading.Barrier(clients)
+
+            def run(pair):
+                barrier.wait()
+                return self._book(
+                    kwargs["base_url"], *pair, kwargs["timeout"], kwargs["deadline"]
+                )
+
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=clients) as executor:
+                results = list(executor.map(run, pairs))
+            elapsed = time.monotonic() - started
+        finally:
+            self._cleanup(host)
+
+        totals = [result["total"] for result in results]
+        requests = [value for result in results for value in result["requests"]]
+        statuses = {}
+        for result in results:
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+
+        self.stdout.write(f"{clients} 位學生，{elapsed:.1f} 秒；結果: {statuses}")
+        self.stdout.write(
+            f"請求數 {len(requests)}，排隊 (429) {sum(r['queued'] for r in results)} 次，"
+            f"逾時 {sum(r['timeouts'] for r in results)} 次"
+        )
+        for label, values in (("單一請求", requests), ("完成預約", totals)):
+            self.stdout.write(
+                f"{label}延遲  p50 {_percentile(values, 0.5) * 1000:7.0f} ms  "
+                f"p95 {_percentile(values, 0.95) * 1000:7.0f} ms  "
+                f"p99 {_percentile(values, 0.99) * 1000:7.0f} ms  "
+                f"max {max(values, default=0) * 1000:7.0f} ms"
+            )
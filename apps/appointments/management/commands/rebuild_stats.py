@@ -0,0 +1,14 @@
+from appointments.stats import rebuild
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "由預約資料 (含歸檔) 重新計算時段與學生統計表"
+
+    def handle(self, *args, **kwargs):
+        slot_count, student_count = rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"已重建 {slot_count} 個時段、{student_count} 位學生的統計資料"
+            )
+        )
@@ -0,0 +1,47 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.db_router import replica_aliases
+
+SQLITE_ENGINE = "django.db.backends.sqlite3"
+
+
+class Command(BaseCommand):
+    help = "將主 SQLite 資料庫複製到各副本，作為本機測試讀寫分離時的複製機制"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            type=float,
+            default=0,
+            help="每隔幾秒複製一次以模擬複製延遲 (0 表示只複製一次)",
+        )
+
+    def handle(self, *args, **kwargs):
+        primary = settings.DATABASES["default"]
+        replicas = [settings.DATABASES[alias] for alias in replica_aliases()]
+
+        if primary["ENGINE"] != SQLITE_ENGINE or not replicas:
+            raise CommandError("主資料庫與 DATABASE_REPLICA_URLS 都必須是 SQLite")
+        if any(replica["ENGINE"] != SQLITE_ENGINE for replica in replicas):
+            raise CommandError("副本必須是 SQLite")
+
+        while True:
+            source = sqlite3.connect(primary["NAME"])
+            try:
+                for replica in replicas:
+                    target = sqlite3.connect(replica["NAME"])
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+            finally:
+                source.close()
+
+            self.stdout.write(f"已複製到 {len(replicas)} 個副本")
+            if not kwargs["loop"]:
+                break
+            time.sleep(kwargs["loop"])
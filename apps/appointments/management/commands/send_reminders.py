@@ -0,0 +1,37 @@
+import time
+from datetime import timedelta
+
+from appointments.reminders import send_due_reminders
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "寄出即將開始的預約提醒 (可重複執行，已提醒的預約不會重寄)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lead-hours",
+            type=float,
+            default=settings.REMINDER_LEAD_HOURS,
+            help="提醒幾小時內開始的預約",
+        )
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--loop",
+            type=int,
+            default=0,
+            help="每隔幾秒重複執行一次 (0 表示只執行一次，適合 cron)",
+        )
+
+    def handle(self, *args, **kwargs):
+        lead = timedelta(hours=kwargs["lead_hours"])
+        interval = kwargs["loop"]
+
+        while True:
+            sent = send_due_reminders(lead, batch_size=kwargs["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"寄出 {sent} 封預約提醒"))
+
+            if not interval:
+                break
+            time.sleep(interval)
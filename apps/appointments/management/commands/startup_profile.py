@@ -0,0 +1,134 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# 在全新的子行程中量測，避免被目前已載入的模組影響
+CHILD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+settings_loaded = time.perf_counter()
+django.setup()
+apps_ready = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_loaded = time.perf_counter()
+from django.test import Client
+client = Client(HTTP_HOST=sys.argv[2])
+status = client.get(sys.argv[1]).status_code
+first_response = time.perf_counter()
+client.get(sys.argv[1])
+second_response = time.perf_counter()
+print(json.dumps({
+    "settings": settings_loaded - start,
+    "app_ready": apps_ready - start,
+    "urlconf": urls_loaded - apps_ready,
+    "first_response": first_response - start,
+    "warm_request": second_response - first_response,
+    "status": status,
+}))
+"""
+
+PHASES = [
+    ("settings", "載入 settings"),
+    ("app_ready", "django.setup() 完成 (app ready)"),
+    ("urlconf", "載入 URLconf 與 views"),
+    ("first_response", "第一個回應 (time-to-first-response)"),
+    ("warm_request", "第二個請求"),
+]
+
+
+class Command(BaseCommand):
+    help = "量測冷啟動時間：各模組 import 時間、app ready 時間與第一個回應的時間"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path", default="/api/slots/", help="量測第一個回應使用的路徑"
+        )
+        parser.add_argument("--host", default="localhost", help="請求使用的 Host")
+        parser.add_argument(
+            "--runs", type=int, default=5, help="重複量測次數 (取中位數)"
+        )
+        parser.add_argument(
+            "--top", type=int, default=15, help="列出 import 最慢的前幾個模組"
+        )
+
+    def _run_child(self, path, host, importtime=False):
+        command = [sys.executable]
+        if importtime:
+            command += ["-X", "importtime"]
+        command += ["-c", CHILD_SCRIPT, path, host]
+
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get(
+                "DJANGO_SETTINGS_MODULE", "config.settings"
+            ),
+        }
+        result = subprocess.run(
+            command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        return timings, result.stderr
+
+    @staticmethod
+    def _parse_importtime(output):
+        """
+        [Private] 解析 -X importtime 輸出，回傳 {模組: (self 微秒, cumulative 微秒)}
+        """
+        modules = {}
+        for line in output.splitlines():
+            if not line.startswith("import time:") or "imported package" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:") :].split("|")
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        return modules
+
+    def handle(self, *args, **kwargs):
+        path, host = kwargs["path"], kwargs["host"]
+        top = kwargs["top"]
+
+        _, importtime_output = self._run_child(path, host, importtime=True)
+        modules = self._parse_importtime(importtime_output)
+
+        by_package = defaultdict(int)
+        for name, (self_us, _) in modules.items():
+            by_package[name.split(".")[0]] += self_us
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Import 時間 (依套件，self 合計)"))
+        for package, total_us in sorted(
+            by_package.items(), key=lambda item: item[1], reverse=True
+        )[:top]:
+            self.stdout.write(f"  {total_us / 1000:8.1f} ms  {package}")
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING("Import 時間 (依模組，cumulative)")
+        )
+        for name, (_, cumulative_us) in sorted(
+            modules.items(), key=lambda item: item[1][1], reverse=True
+        )[:top]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+        total_ms = sum(self_us for self_us, _ in modules.values()) / 1000
+        self.stdout.write(f"  共 {len(modules)} 個模組，{total_ms:.1f} ms")
+
+        runs = [self._run_child(path, host)[0] for _ in range(kwargs["runs"])]
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"啟動階段 (中位數，{len(runs)} 次，GET {path} -> {runs[0]['status']})"
+            )
+        )
+        for key, label in PHASES:
+            values = sorted(run[key] for run in runs)
+            median = values[len(values) // 2]
+            self.stdout.write(f"  {median * 1000:8.1f} ms  {label}")
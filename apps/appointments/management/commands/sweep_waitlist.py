@@ -0,0 +1,29 @@
+import time
+
+from appointments.waitlist import expire_offers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "清掃逾期的候補保留並順延給下一位候補者"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--loop",
+            type=int,
+            default=0,
+            help="每隔幾秒重複執行一次 (0 表示只執行一次，適合 cron)",
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs["batch_size"]
+        interval = kwargs["loop"]
+
+        while True:
+            expired = expire_offers(batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"處理逾期保留 {expired} 筆"))
+
+            if not interval:
+                break
+            time.sleep(interval)
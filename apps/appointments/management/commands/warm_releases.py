@@ -0,0 +1,65 @@
+import time
+from datetime import timedelta
+
+from appointments import availability
+from appointments.enums import AppointmentStatus
+from appointments.models import Appointment
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "在排定開放時段前預先算好開放當下的可預約快照"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lead",
+            type=int,
+            default=settings.RELEASE_WARM_LEAD_SECONDS,
+            help="預熱幾秒內即將開放的時段",
+        )
+        parser.add_argument(
+            "--loop",
+            type=int,
+            default=0,
+            help="每隔幾秒重複執行一次 (0 表示只執行一次，適合 cron)",
+        )
+
+    def handle(self, *args, **kwargs):
+        lead = kwargs["lead"]
+        interval = kwargs["loop"]
+
+        while True:
+            now = timezone.now()
+            releases = (
+                Appointment.objects.filter(
+                    status=AppointmentStatus.AVAILABLE,
+                    visible_from__gt=now,
+                    visible_from__lte=now + timedelta(seconds=lead),
+                )
+                .values_list("host_id", "visible_from")
+                .distinct()
+                .order_by()
+            )
+            # 同一位 host 只需預熱最早的一次開放，之後的由下一輪處理
+            earliest = {}
+            for host_id, release_at in releases:
+                if host_id not in earliest or release_at < earliest[host_id]:
+                    earliest[host_id] = release_at
+
+            for host_id, release_at in earliest.items():
+                if availability.warm(host_id, release_at):
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"已預熱 host {host_id} 於 {release_at:%H:%M:%S} 開放的時段"
+                        )
+                    )
+                else:
+                    self.stdout.write(
+                        self.style.WARNING(f"host {host_id} 的快照在開放前已失效，略過")
+                    )
+
+            if not interval:
+                break
+            time.sleep(interval)
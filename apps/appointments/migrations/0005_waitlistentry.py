@@ -0,0 +1,91 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0004_appointment_rejection_reason_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WaitlistEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("waiting", "候補中"),
+                            ("offered", "保留中"),
+                            ("accepted", "已接受"),
+                            ("expired", "已逾期"),
+                            ("left", "已退出"),
+                        ],
+                        default="waiting",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "offer_expires_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="保留期限"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "appointment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="waitlist_entries",
+                        to="appointments.appointment",
+                        verbose_name="候補時段",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="waitlist_entries",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="候補學生",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "候補紀錄",
+                "verbose_name_plural": "候補名單",
+                "ordering": ["created_at", "id"],
+                "indexes": [
+                    models.Index(
+                        fields=["appointment", "status", "created_at"],
+                        name="waitlist_queue_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "offer_expires_at"],
+                        name="waitlist_offer_expiry_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("status__in", ["waiting", "offered"])),
+                        fields=("appointment", "user"),
+                        name="unique_active_waitlist_entry",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,180 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:29
+
+import re
+from datetime import date, datetime, time, timedelta
+
+from django.db import migrations, models
+
+TIME_SLOT_RE = re.compile(
+    r"^\s*(\d{1,2})[:：](\d{2})\s*(?:[-~–—～至到]\s*(\d{1,2})[:：](\d{2}))?\s*$"
+)
+
+
+def parse_time_slot(value):
+    # 與 appointments.timeslots.parse_time_slot 相同的規則，複製一份讓 migration 不依賴現行程式碼
+    match = TIME_SLOT_RE.match(value or "")
+    if not match:
+        raise ValueError(f"無法解析時段格式: {value!r}")
+
+    start_hour, start_minute, end_hour, end_minute = match.groups()
+    start = time(int(start_hour), int(start_minute))
+    if end_hour is None:
+        end = (datetime.combine(date.min, start) + timedelta(minutes=30)).time()
+    else:
+        end = time(int(end_hour), int(end_minute))
+
+    if end <= start:
+        raise ValueError(f"時段結束時間必須晚於開始時間: {value!r}")
+    return start, end
+
+
+# 仍被學生佔用的狀態，重複時段中的這些資料列不能自動合併
+ACTIVE_STATUSES = {"scheduled", "confirmed", "completed"}
+
+
+def _keep_rank(appointment):
+    # 同一開始時間有多筆時保留的優先順序：佔用中 > 可預約 > 其他，再依 id
+    if appointment.status in ACTIVE_STATUSES:
+        rank = 0
+    elif appointment.status == "available":
+        rank = 1
+    else:
+        rank = 2
+    return rank, appointment.pk
+
+
+def _merge_duplicates(apps, rows):
+    """
+    同一天同一開始時間的時段寫法不同 (例如 "10:00-10:30" 與 "10:00~10:30")，
+    加上唯一限制前只保留一筆，回傳 (保留的資料列, 無法合併的資料列)；
+    被合併的資料列若仍被佔用則不做任何變更
+    """
+    WaitlistEntry = apps.get_model("appointments", "WaitlistEntry")
+
+    keep, *duplicates = sorted(rows, key=_keep_rank)
+    conflicts = [row for row in duplicates if row.status in ACTIVE_STATUSES]
+    if conflicts:
+        return keep, conflicts
+
+    # 候補改掛到保留的時段，保留時段上已有同一學生的候補則隨重複資料列刪除
+    waiting = set(
+        WaitlistEntry.objects.filter(
+            appointment=keep, status__in=["waiting", "offered"]
+        ).values_list("user_id", flat=True)
+    )
+    for entry in WaitlistEntry.objects.filter(appointment__in=duplicates).order_by(
+        "created_at", "id"
+    ):
+        if entry.status in ("waiting", "offered"):
+            if entry.user_id in waiting:
+                continue
+            waiting.add(entry.user_id)
+        entry.appointment = keep
+        entry.save(update_fields=["appointment"])
+
+    Appointment = apps.get_model("appointments", "Appointment")
+    Appointment.objects.filter(pk__in=[row.pk for row in duplicates]).delete()
+    return keep, []
+
+
+def fill_time_range(apps, schema_editor):
+    """
+    由 time_slot 回填 start_time/end_time，並在加上唯一限制前合併重複的時段。
+    無法解析或無法自動合併的資料列會一次列出，修正後重新執行 migrate。
+    """
+    Appointment = apps.get_model("appointments", "Appointment")
+
+    invalid = []
+    slots = {}
+    for appointment in Appointment.objects.only(
+        "id", "date", "time_slot", "status", "user"
+    ).order_by("pk"):
+        try:
+            appointment.start_time, appointment.end_time = parse_time_slot(
+                appointment.time_slot
+            )
+        except ValueError as e:
+            invalid.append(f"  #{appointment.pk} {appointment.date}: {e}")
+            continue
+        slots.setdefault((appointment.date, appointment.start_time), []).append(
+            appointment
+        )
+
+    batch = []
+    conflicts = []
+    for rows in slots.values():
+        keep, unmerged = (
+            _merge_duplicates(apps, rows) if len(rows) > 1 else (rows[0], [])
+        )
+        batch.append(keep)
+        if unmerged:
+            conflicts.extend(
+                f"  #{row.pk} {row.date} {row.time_slot!r} ({row.status})"
+                for row in [keep, *unmerged]
+            )
+
+    if invalid or conflicts:
+        report = ["無法自動轉換的預約時段，請先修正 time_slot 後重新執行 migrate："]
+        if invalid:
+            report += ["時段格式錯誤：", *invalid]
+        if conflicts:
+            report += ["開始時間重複且都已被預約：", *conflicts]
+        raise RuntimeError("\n".join(report))
+
+    Appointment.objects.bulk_update(batch, ["start_time", "end_time"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0005_waitlistentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="start_time",
+            field=models.TimeField(editable=False, null=True, verbose_name="開始時間"),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="end_time",
+            field=models.TimeField(editable=False, null=True, verbose_name="結束時間"),
+        ),
+        migrations.RunPython(fill_time_range, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="appointment",
+            name="start_time",
+            field=models.TimeField(editable=False, verbose_name="開始時間"),
+        ),
+        migrations.AlterField(
+            model_name="appointment",
+            name="end_time",
+            field=models.TimeField(editable=False, verbose_name="結束時間"),
+        ),
+        migrations.AlterModelOptions(
+            name="appointment",
+            options={
+                "ordering": ["-date", "start_time"],
+                "verbose_name": "預約紀錄",
+                "verbose_name_plural": "預約紀錄表",
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name="appointment",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=models.UniqueConstraint(
+                fields=("date", "start_time"), name="unique_appointment_slot"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["status", "date", "start_time"],
+                name="appointment_status_slot_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0006_appointment_start_end_time"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedAppointment",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("date", models.DateField()),
+                ("time_slot", models.CharField(max_length=20)),
+                ("start_time", models.TimeField(verbose_name="開始時間")),
+                ("end_time", models.TimeField(verbose_name="結束時間")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("available", "可預約"),
+                            ("scheduled", "已預約"),
+                            ("confirmed", "已確認"),
+                            ("completed", "已完成"),
+                            ("cancelled", "已取消"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                (
+                    "reason",
+                    models.TextField(blank=True, null=True, verbose_name="預約事由"),
+                ),
+                (
+                    "rejection_reason",
+                    models.TextField(
+                        blank=True, null=True, verbose_name="拒絕預約理由"
+                    ),
+                ),
+                (
+                    "archived_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="歸檔時間"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_appointments",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="預約學生",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "歷史預約紀錄",
+                "verbose_name_plural": "歷史預約紀錄表",
+                "ordering": ["-date", "start_time"],
+                "indexes": [
+                    models.Index(
+                        fields=["date", "start_time"], name="archived_appt_slot_idx"
+                    )
+                ],
+            },
+        ),
+    ]
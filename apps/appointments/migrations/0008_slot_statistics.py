@@ -0,0 +1,97 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0007_archivedappointment"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlotStatistic",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("start_time", models.TimeField(verbose_name="開始時間")),
+                (
+                    "released",
+                    models.PositiveIntegerField(default=0, verbose_name="釋出次數"),
+                ),
+                (
+                    "booked",
+                    models.PositiveIntegerField(default=0, verbose_name="預約次數"),
+                ),
+                (
+                    "confirmed",
+                    models.PositiveIntegerField(default=0, verbose_name="確認次數"),
+                ),
+                (
+                    "rejected",
+                    models.PositiveIntegerField(default=0, verbose_name="駁回次數"),
+                ),
+                (
+                    "cancelled",
+                    models.PositiveIntegerField(default=0, verbose_name="取消次數"),
+                ),
+                ("occupied", models.IntegerField(default=0, verbose_name="目前佔用數")),
+            ],
+            options={
+                "verbose_name": "時段統計",
+                "verbose_name_plural": "時段統計表",
+                "ordering": ["date", "start_time"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "start_time"), name="unique_slot_statistic"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="StudentBookingStatistic",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "bookings",
+                    models.PositiveIntegerField(default=0, verbose_name="預約次數"),
+                ),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="booking_statistic",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="學生",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "學生預約統計",
+                "verbose_name_plural": "學生預約統計表",
+                "indexes": [
+                    models.Index(fields=["-bookings"], name="student_bookings_rank_idx")
+                ],
+            },
+        ),
+    ]
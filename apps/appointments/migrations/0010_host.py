@@ -0,0 +1,103 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+DEFAULT_HOST_SLUG = "default"
+
+
+def create_default_host(apps, schema_editor):
+    Host = apps.get_model("appointments", "Host")
+    Appointment = apps.get_model("appointments", "Appointment")
+    ArchivedAppointment = apps.get_model("appointments", "ArchivedAppointment")
+    SlotStatistic = apps.get_model("appointments", "SlotStatistic")
+
+    host, _ = Host.objects.get_or_create(
+        slug=DEFAULT_HOST_SLUG, defaults={"name": "預設"}
+    )
+    # 既有的時段、歸檔與統計資料都屬於原本唯一的 host
+    for model in (Appointment, ArchivedAppointment, SlotStatistic):
+        model.objects.filter(host__isnull=True).update(host=host)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0009_calendarfeed"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Host",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, verbose_name="名稱")),
+                (
+                    "slug",
+                    models.SlugField(unique=True, verbose_name="代碼"),
+                ),
+                ("is_active", models.BooleanField(default=True, verbose_name="啟用")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="hosts",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="對應帳號",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "時段主持人",
+                "verbose_name_plural": "時段主持人",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="host",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="appointments",
+                to="appointments.host",
+                verbose_name="主持人",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedappointment",
+            name="host",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="archived_appointments",
+                to="appointments.host",
+                verbose_name="主持人",
+            ),
+        ),
+        migrations.AddField(
+            model_name="slotstatistic",
+            name="host",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="slot_statistics",
+                to="appointments.host",
+                verbose_name="主持人",
+            ),
+        ),
+        migrations.RunPython(create_default_host, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:50
+
+import appointments.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # 與 0010 分開：PostgreSQL 不允許在同一個交易中更新資料列後再修改同一張表的結構
+
+    dependencies = [
+        ("appointments", "0010_host"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="appointment",
+            name="host",
+            field=models.ForeignKey(
+                default=appointments.models.default_host_id,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="appointments",
+                to="appointments.host",
+                verbose_name="主持人",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="archivedappointment",
+            name="host",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="archived_appointments",
+                to="appointments.host",
+                verbose_name="主持人",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="slotstatistic",
+            name="host",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="slot_statistics",
+                to="appointments.host",
+                verbose_name="主持人",
+            ),
+        ),
+        migrations.RemoveConstraint(
+            model_name="appointment",
+            name="unique_appointment_slot",
+        ),
+        migrations.RemoveIndex(
+            model_name="appointment",
+            name="appointment_status_slot_idx",
+        ),
+        migrations.RemoveConstraint(
+            model_name="slotstatistic",
+            name="unique_slot_statistic",
+        ),
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=models.UniqueConstraint(
+                fields=("host", "date", "start_time"),
+                name="unique_host_appointment_slot",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["host", "status", "date", "start_time"],
+                name="appointment_host_slot_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["user", "host", "date"], name="appointment_user_quota_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="slotstatistic",
+            constraint=models.UniqueConstraint(
+                fields=("host", "date", "start_time"),
+                name="unique_host_slot_statistic",
+            ),
+        ),
+    ]
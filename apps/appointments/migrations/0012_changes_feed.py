@@ -0,0 +1,71 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0011_host_scoped_constraints"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AppointmentTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("appointment_id", models.BigIntegerField(verbose_name="預約 ID")),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[
+                            ("deleted", "已刪除"),
+                            ("archived", "已歸檔"),
+                            ("unbooked", "已取消預約"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "預約移除紀錄",
+                "verbose_name_plural": "預約移除紀錄",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["updated_at", "id"], name="appointment_changes_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="appointmenttombstone",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="appointment_tombstones",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="受影響學生",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointmenttombstone",
+            index=models.Index(
+                fields=["created_at", "id"], name="appointment_tombstone_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0012_changes_feed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1, editable=False, verbose_name="版本"
+            ),
+        ),
+    ]
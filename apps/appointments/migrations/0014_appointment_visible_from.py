@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0013_appointment_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="visible_from",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="開放預約時間"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["status", "visible_from"], name="appointment_release_idx"
+            ),
+        ),
+    ]
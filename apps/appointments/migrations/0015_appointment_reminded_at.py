@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0014_appointment_visible_from"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="reminded_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="提醒寄出時間"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                condition=models.Q(("reminded_at__isnull", True)),
+                fields=["date", "start_time"],
+                name="appointment_reminder_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0015_appointment_reminded_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="reminder_claim",
+            field=models.CharField(
+                blank=True, editable=False, max_length=32, null=True
+            ),
+        ),
+    ]
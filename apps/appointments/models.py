@@ -1,11 +1,56 @@
+from datetime import datetime
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
 
-from .enums import AppointmentStatus
+from .enums import AppointmentStatus, TombstoneReason, WaitlistStatus
+from .timeslots import parse_time_slot
+
+# 既有資料與未指定 host 的新時段歸屬的預設 host
+DEFAULT_HOST_SLUG = "default"
+
+
+class Host(models.Model):
+    """
+    開放預約時段的老師或助教。
+    時段的唯一性、可預約清單與每週名額都以 host 為單位各自計算。
+    """
+
+    name = models.CharField("名稱", max_length=100)
+    slug = models.SlugField("代碼", max_length=50, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="hosts",
+        verbose_name="對應帳號",
+        null=True,
+        blank=True,
+    )
+    is_active = models.BooleanField("啟用", default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "時段主持人"
+        verbose_name_plural = "時段主持人"
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+def default_host_id():
+    return Host.objects.only("pk").get(slug=DEFAULT_HOST_SLUG).pk
 
 
 class Appointment(models.Model):
+    host = models.ForeignKey(
+        Host,
+        on_delete=models.PROTECT,
+        related_name="appointments",
+        verbose_name="主持人",
+        default=default_host_id,
+    )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -16,6 +61,9 @@ class Appointment(models.Model):
     )
     date = models.DateField()
     time_slot = models.CharField(max_length=20)
+    # 由 time_slot 解析而來，排序、範圍查詢與唯一性都以這兩欄為準
+    start_time = models.TimeField("開始時間", editable=False)
+    end_time = models.TimeField("結束時間", editable=False)
     status = models.CharField(
         max_length=20,
         choices=AppointmentStatus.choices,
@@ -23,6 +71,16 @@ class Appointment(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # 排定的開放時間，之前不會出現在可預約清單、也不能預約；空值表示立即開放
+    visible_from = models.DateTimeField("開放預約時間", null=True, blank=True)
+    # 已寄出預約提醒的時間；時段重新被預約時清空
+    reminded_at = models.DateTimeField("提醒寄出時間", null=True, blank=True)
+    # 認領提醒的排程執行編號，同時執行的排程以此區分各自標記到的預約
+    reminder_claim = models.CharField(
+        max_length=32, null=True, blank=True, editable=False
+    )
+    # 每次更新遞增，作為 ETag 與 If-Match 條件式更新的依據
+    version = models.PositiveIntegerField("版本", default=1, editable=False)
     reason = models.TextField(blank=True, null=True, verbose_name="預約事由")
     rejection_reason = models.TextField(
         blank=True, null=True, verbose_name="拒絕預約理由"
@@ -31,9 +89,325 @@ class Appointment(models.Model):
     class Meta:
         verbose_name = "預約紀錄"
         verbose_name_plural = "預約紀錄表"
-        unique_together = ("date", "time_slot")
-        ordering = ["-date", "time_slot"]
+        ordering = ["-date", "start_time"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["host", "date", "start_time"],
+                name="unique_host_appointment_slot",
+            )
+        ]
+        indexes = [
+            # 可預約時段查詢：WHERE host=? AND status=? ORDER BY date, start_time
+            models.Index(
+                fields=["host", "status", "date", "start_time"],
+                name="appointment_host_slot_idx",
+            ),
+            # 每週名額：WHERE user=? AND host=? AND date BETWEEN ...
+            models.Index(
+                fields=["user", "host", "date"],
+                name="appointment_user_quota_idx",
+            ),
+            # 即將開放的時段：WHERE status='available' AND visible_from > now
+            models.Index(
+                fields=["status", "visible_from"],
+                name="appointment_release_idx",
+            ),
+            # 預約提醒：只索引尚未提醒的預約，WHERE reminded_at IS NULL AND date BETWEEN ...
+            # (條件不含參數，SQLite 以參數綁定查詢時也能使用這個部分索引)
+            models.Index(
+                fields=["date", "start_time"],
+                name="appointment_reminder_idx",
+                condition=models.Q(reminded_at__isnull=True),
+            ),
+            # 變更同步：WHERE (updated_at, id) > cursor ORDER BY updated_at, id
+            models.Index(
+                fields=["updated_at", "id"],
+                name="appointment_changes_idx",
+            ),
+        ]
 
     def __str__(self):
         user_display = self.user if self.user else "尚未有學生預約"
         return f"{self.date} {self.time_slot} ({user_display})"
+
+    @property
+    def duration(self):
+        start = datetime.combine(self.date, self.start_time)
+        end = datetime.combine(self.date, self.end_time)
+        return end - start
+
+    def clean(self):
+        """
+        解析 time_slot 填入開始/結束時間；同一 host 同一天已有相同開始時間時回報為
+        time_slot 的欄位錯誤 (start_time 不可編輯，表單不會檢查這個唯一限制)
+        """
+        super().clean()
+        try:
+            self.start_time, self.end_time = parse_time_slot(self.time_slot)
+        except ValueError as e:
+            raise ValidationError({"time_slot": str(e)})
+
+        if self.host_id is None or self.date is None:
+            return
+        if (
+            Appointment.objects.filter(
+                host_id=self.host_id, date=self.date, start_time=self.start_time
+            )
+            .exclude(pk=self.pk)
+            .exists()
+        ):
+            raise ValidationError(
+                {"time_slot": f"{self.date} {self.start_time:%H:%M} 已有時段"}
+            )
+
+    def save(self, *args, expected_versions=None, **kwargs):
+        """
+        expected_versions 不為 None 時是條件式更新：資料庫中的 version 不在其中時
+        不寫入並拋出 Appointment.NotUpdated
+        """
+        # 表單與 API 已在 clean() / validate() 檢查過，這裡只為直接以 ORM 寫入的程式碼填值
+        self.start_time, self.end_time = parse_time_slot(self.time_slot)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "time_slot" in update_fields:
+            update_fields = kwargs["update_fields"] = {
+                *update_fields,
+                "start_time",
+                "end_time",
+            }
+
+        previous_version = self.version
+        if not self._state.adding:
+            # 在資料庫中遞增，並行的更新不會寫出相同的版本號；新值由 RETURNING 取回
+            self.version = models.F("version") + 1
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "version"}
+
+        if expected_versions is not None:
+            kwargs["force_update"] = True
+        self._expected_versions = expected_versions
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.version = previous_version
+            raise
+        finally:
+            self._expected_versions = None
+
+    def _do_update(self, base_qs, *args, **kwargs):
+        expected_versions = getattr(self, "_expected_versions", None)
+        if expected_versions is not None:
+            base_qs = base_qs.filter(version__in=expected_versions)
+        return super()._do_update(base_qs, *args, **kwargs)
+
+
+class ArchivedAppointment(models.Model):
+    """
+    已歸檔的歷史預約 (冷資料)，由 archive_appointments 指令從 Appointment 搬移過來。
+    主鍵沿用原本的 Appointment id，歸檔前後對外的 id 不變。
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    host = models.ForeignKey(
+        Host,
+        on_delete=models.PROTECT,
+        related_name="archived_appointments",
+        verbose_name="主持人",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_appointments",
+        verbose_name="預約學生",
+        null=True,
+        blank=True,
+    )
+    date = models.DateField()
+    time_slot = models.CharField(max_length=20)
+    start_time = models.TimeField("開始時間")
+    end_time = models.TimeField("結束時間")
+    status = models.CharField(max_length=20, choices=AppointmentStatus.choices)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    reason = models.TextField(blank=True, null=True, verbose_name="預約事由")
+    rejection_reason = models.TextField(
+        blank=True, null=True, verbose_name="拒絕預約理由"
+    )
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="歸檔時間")
+
+    class Meta:
+        verbose_name = "歷史預約紀錄"
+        verbose_name_plural = "歷史預約紀錄表"
+        ordering = ["-date", "start_time"]
+        indexes = [
+            models.Index(fields=["date", "start_time"], name="archived_appt_slot_idx"),
+        ]
+
+    def __str__(self):
+        user_display = self.user if self.user else "尚未有學生預約"
+        return f"{self.date} {self.time_slot} ({user_display})"
+
+
+class AppointmentTombstone(models.Model):
+    """
+    預約從同步範圍中消失的紀錄 (刪除、歸檔、學生失去預約)，讓變更同步能回報移除。
+    user 為受影響的學生；刪除與歸檔時為當時的預約者。
+    """
+
+    appointment_id = models.BigIntegerField("預約 ID")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="appointment_tombstones",
+        verbose_name="受影響學生",
+        null=True,
+        blank=True,
+    )
+    reason = models.CharField(max_length=20, choices=TombstoneReason.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "預約移除紀錄"
+        verbose_name_plural = "預約移除紀錄"
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="appointment_tombstone_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.appointment_id} ({self.get_reason_display()})"
+
+
+class WaitlistEntry(models.Model):
+    """
+    單一時段的候補排隊紀錄。
+    時段釋出時由排在最前面的 WAITING 取得限時保留 (OFFERED)。
+    """
+
+    appointment = models.ForeignKey(
+        Appointment,
+        on_delete=models.CASCADE,
+        related_name="waitlist_entries",
+        verbose_name="候補時段",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="waitlist_entries",
+        verbose_name="候補學生",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=WaitlistStatus.choices,
+        default=WaitlistStatus.WAITING,
+    )
+    offer_expires_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="保留期限"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "候補紀錄"
+        verbose_name_plural = "候補名單"
+        ordering = ["created_at", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["appointment", "user"],
+                condition=models.Q(
+                    status__in=[WaitlistStatus.WAITING, WaitlistStatus.OFFERED]
+                ),
+                name="unique_active_waitlist_entry",
+            )
+        ]
+        indexes = [
+            # 取隊首：WHERE appointment=? AND status='waiting' ORDER BY created_at
+            models.Index(
+                fields=["appointment", "status", "created_at"],
+                name="waitlist_queue_idx",
+            ),
+            # 清掃逾期保留：WHERE status='offered' AND offer_expires_at <= now
+            models.Index(
+                fields=["status", "offer_expires_at"],
+                name="waitlist_offer_expiry_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.appointment} - {self.user} ({self.get_status_display()})"
+
+
+class SlotStatistic(models.Model):
+    """
+    每個 host 各時段 (日期 + 開始時間) 的累計統計，隨狀態轉換遞增更新。
+    occupied 為目前仍被佔用的數量，其餘欄位為事件累計次數。
+    """
+
+    host = models.ForeignKey(
+        Host,
+        on_delete=models.CASCADE,
+        related_name="slot_statistics",
+        verbose_name="主持人",
+    )
+    date = models.DateField()
+    start_time = models.TimeField("開始時間")
+    released = models.PositiveIntegerField("釋出次數", default=0)
+    booked = models.PositiveIntegerField("預約次數", default=0)
+    confirmed = models.PositiveIntegerField("確認次數", default=0)
+    rejected = models.PositiveIntegerField("駁回次數", default=0)
+    cancelled = models.PositiveIntegerField("取消次數", default=0)
+    occupied = models.IntegerField("目前佔用數", default=0)
+
+    class Meta:
+        verbose_name = "時段統計"
+        verbose_name_plural = "時段統計表"
+        ordering = ["date", "start_time"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["host", "date", "start_time"],
+                name="unique_host_slot_statistic",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.start_time}"
+
+
+class StudentBookingStatistic(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="booking_statistic",
+        verbose_name="學生",
+    )
+    bookings = models.PositiveIntegerField("預約次數", default=0)
+
+    class Meta:
+        verbose_name = "學生預約統計"
+        verbose_name_plural = "學生預約統計表"
+        indexes = [
+            models.Index(fields=["-bookings"], name="student_bookings_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} ({self.bookings})"
+
+
+class CalendarFeed(models.Model):
+    """
+    iCalendar 訂閱用的個人 token，行事曆 App 以網址中的 token 存取，不經過 JWT
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="calendar_feed",
+        verbose_name="使用者",
+    )
+    token = models.CharField("訂閱 Token", max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "行事曆訂閱"
+        verbose_name_plural = "行事曆訂閱"
+
+    def __str__(self):
+        return f"{self.user} 的行事曆訂閱"
@@ -0,0 +1,117 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from notify_letter.utils import send_reminder_emails
+
+from .enums import AppointmentStatus
+from .models import Appointment
+
+logger = logging.getLogger(__name__)
+
+REMINDER_STATUSES = [AppointmentStatus.SCHEDULED, AppointmentStatus.CONFIRMED]
+
+
+def due_reminders(start, end):
+    """
+    開始時間落在 [start, end) 且尚未提醒的有效預約，以 date 範圍使用 appointment_reminder_idx。
+    日期與時段是當地時間，start / end 需先轉成當地時間。
+    """
+    return Appointment.objects.filter(
+        Q(date__gt=start.date()) | Q(date=start.date(), start_time__gte=start.time()),
+        Q(date__lt=end.date()) | Q(date=end.date(), start_time__lt=end.time()),
+        date__range=(start.date(), end.date()),
+        status__in=REMINDER_STATUSES,
+        reminded_at__isnull=True,
+        user__isnull=False,
+    )
+
+
+def _due_batch(start, end, batch_size):
+    """
+    [Private] 一次範圍查詢取出一批到期預約的 id。
+    支援的資料庫 (PostgreSQL) 會跳過其他排程鎖住的列；SQLite 不支援 select_for_update，
+    不重複寄送由 _claim 的條件式 UPDATE 保證。
+    """
+    with transaction.atomic():
+        return list(
+            due_reminders(start, end)
+            .select_for_update(skip_locked=True)
+            .order_by("date", "start_time")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+
+
+def _claim(appointment_ids, now):
+    """
+    [Private] 以一次條件式 UPDATE 將仍未提醒的預約標記為這一輪認領，回傳實際認領到的預約。
+    同時執行的排程即使選到相同的列，也只有先 UPDATE 的一方會認領成功。
+    """
+    token = uuid.uuid4().hex
+    Appointment.objects.filter(pk__in=appointment_ids, reminded_at__isnull=True).update(
+        reminded_at=now, reminder_claim=token
+    )
+    return list(
+        Appointment.objects.select_related("user").filter(
+            pk__in=appointment_ids, reminder_claim=token
+        )
+    )
+
+
+def _unclaim(appointments):
+    """
+    [Private] 寄送失敗時還原這一輪認領的預約，下一輪重寄
+    """
+    Appointment.objects.filter(
+        pk__in=[appointment.pk for appointment in appointments],
+        reminder_claim=appointments[0].reminder_claim,
+    ).update(reminded_at=None, reminder_claim=None)
+
+
+def send_due_reminders(lead=None, batch_size=200):
+    """
+    寄出在 lead (預設 REMINDER_LEAD_HOURS) 內開始的預約提醒，回傳寄出封數。
+    每批一次範圍查詢、一次條件式 UPDATE，信件透過同一條 SMTP 連線送出；
+    寄送失敗時還原這一批的認領，下一輪重寄 (已送出的部分可能重複)。
+    """
+    if lead is None:
+        lead = timedelta(hours=settings.REMINDER_LEAD_HOURS)
+    now = timezone.now()
+    start = timezone.localtime(now)
+    end = start + lead
+
+    sent = 0
+    while True:
+        appointment_ids = _due_batch(start, end, batch_size)
+        if not appointment_ids:
+            break
+        appointments = _claim(appointment_ids, now)
+        reminders = [
+            (
+                appointment.user.email,
+                {
+                    "date": appointment.date,
+                    "time_slot": appointment.time_slot,
+                    "student_id": appointment.user.student_id,
+                    "reason": appointment.reason,
+                    "status": "REMINDER",
+                },
+            )
+            for appointment in appointments
+            if appointment.user.email
+        ]
+
+        try:
+            sent += send_reminder_emails(reminders)
+        except Exception:
+            logger.exception("預約提醒寄送失敗", extra={"count": len(reminders)})
+            _unclaim(appointments)
+            break
+
+        if len(appointment_ids) < batch_size:
+            break
+    return sent
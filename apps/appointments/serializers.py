@@ -1,8 +1,46 @@
-from django.db import transaction
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, transaction
 from rest_framework import serializers
 
-from .enums import AppointmentStatus
-from .models import Appointment
+from .enums import AppointmentEvent, AppointmentStatus
+from .models import DEFAULT_HOST_SLUG, Appointment, Host, default_host_id
+from .timeslots import parse_time_slot
+from .transitions import record_transition
+
+
+def validate_time_slot(value):
+    """
+    確認時段字串可以被解析成開始/結束時間
+    """
+    try:
+        parse_time_slot(value)
+    except ValueError as e:
+        raise serializers.ValidationError(str(e))
+    return value
+
+
+def validate_unique_slot(attrs, instance=None):
+    """
+    以 Appointment.clean() 檢查時段寫入後是否與同一 host 同一天的其他時段重複；
+    start_time 不是可寫欄位，DRF 不會替這個唯一限制產生驗證器
+    """
+    if not {"date", "time_slot"} & attrs.keys():
+        return attrs
+
+    host = attrs.get("host")
+    candidate = Appointment(
+        pk=getattr(instance, "pk", None),
+        host_id=(
+            host.pk if host else getattr(instance, "host_id", None) or default_host_id()
+        ),
+        date=attrs.get("date", getattr(instance, "date", None)),
+        time_slot=attrs.get("time_slot", getattr(instance, "time_slot", None)),
+    )
+    try:
+        candidate.clean()
+    except ValidationError as e:
+        raise serializers.ValidationError(e.message_dict)
+    return attrs
 
 
 class AppointmentSerializer(serializers.ModelSerializer):
@@ -14,8 +52,11 @@ class AppointmentSerializer(serializers.ModelSerializer):
         model = Appointment
         fields = [
             "id",
+            "host",
             "date",
             "time_slot",
+            "start_time",
+            "end_time",
             "status",
             "reason",
             "rejection_reason",
@@ -23,21 +64,40 @@ class AppointmentSerializer(serializers.ModelSerializer):
             "student_name",
             "student_email",
             "created_at",
+            "visible_from",
+            "version",
         ]
         read_only_fields = [
             "id",
+            "host",
+            "start_time",
+            "end_time",
             "status",
             "created_at",
             "student_id",
             "student_name",
             "student_email",
+            "version",
         ]
 
+    def validate_time_slot(self, value):
+        return validate_time_slot(value)
+
+    def validate(self, attrs):
+        return validate_unique_slot(attrs, self.instance)
+
 
 class CreateAppointmentSerializer(serializers.Serializer):
+    host = serializers.SlugRelatedField(
+        slug_field="slug",
+        queryset=Host.objects.filter(is_active=True),
+        required=False,
+    )
     date = serializers.DateField()
     time_slots = serializers.ListField(
-        child=serializers.CharField(), max_length=4, allow_empty=False
+        child=serializers.CharField(validators=[validate_time_slot]),
+        max_length=4,
+        allow_empty=False,
     )
     reason = serializers.CharField(required=False, allow_blank=True)
 
@@ -46,6 +106,7 @@ class CreateAppointmentSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         user = self.context["request"].user
+        host = validated_data.get("host") or Host.objects.get(slug=DEFAULT_HOST_SLUG)
         date = validated_data["date"]
         slots = validated_data["time_slots"]
         reason = validated_data.get("reason", "")
@@ -56,19 +117,29 @@ class CreateAppointmentSerializer(serializers.Serializer):
                 # 檢查並建立多個預約
                 for slot in slots:
                     # 檢查該時段是否已被預約
+                    start_time, _ = parse_time_slot(slot)
                     if Appointment.objects.filter(
-                        date=date, time_slot=slot, status=AppointmentStatus.SCHEDULED
+                        host=host,
+                        date=date,
+                        start_time=start_time,
+                        status=AppointmentStatus.SCHEDULED,
                     ).exists():
                         raise serializers.ValidationError(f"{slot} 時段已被預約")
                     # 建立預約
                     appt = Appointment.objects.create(
+                        host=host,
                         user=user,
                         date=date,
                         time_slot=slot,
                         reason=reason,
                         status=AppointmentStatus.SCHEDULED,
                     )
+                    record_transition(appt, AppointmentEvent.RELEASED)
+                    record_transition(appt, AppointmentEvent.BOOKED, user_id=user.id)
                     created_appointments.append(appt)
+        except OperationalError:
+            # 資料庫鎖定交由 view 的 retry_on_lock 重試
+            raise
         except Exception as e:
             raise serializers.ValidationError(str(e))
 
@@ -0,0 +1,185 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncWeek
+
+from .enums import AppointmentEvent, AppointmentStatus
+from .models import (
+    Appointment,
+    ArchivedAppointment,
+    SlotStatistic,
+    StudentBookingStatistic,
+)
+
+COUNTER_FIELDS = ["released", "booked", "confirmed", "rejected", "cancelled"]
+
+# 每種狀態轉換對時段統計欄位的增減量
+EVENT_DELTAS = {
+    AppointmentEvent.RELEASED: {"released": 1},
+    AppointmentEvent.BOOKED: {"booked": 1, "occupied": 1},
+    AppointmentEvent.RESCHEDULED_IN: {"booked": 1, "occupied": 1},
+    AppointmentEvent.RESCHEDULED_OUT: {"occupied": -1},
+    AppointmentEvent.CONFIRMED: {"confirmed": 1},
+    AppointmentEvent.REJECTED: {"rejected": 1, "occupied": -1},
+    AppointmentEvent.CANCELLED: {"cancelled": 1, "occupied": -1},
+}
+
+
+def _increment(model, lookup, deltas):
+    """
+    [Private] 以單一 UPDATE 遞增計數；資料列不存在時建立，並處理同時建立的競爭
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**updates)
+
+
+def record(event, appointment, user_id=None):
+    """
+    依狀態轉換更新統計，須與狀態變更在同一個交易中呼叫
+    """
+    _increment(
+        SlotStatistic,
+        {
+            "host_id": appointment.host_id,
+            "date": appointment.date,
+            "start_time": appointment.start_time,
+        },
+        EVENT_DELTAS[event],
+    )
+
+    if event == AppointmentEvent.BOOKED and user_id:
+        _increment(StudentBookingStatistic, {"user_id": user_id}, {"bookings": 1})
+
+
+def summary(start_date, end_date, group_by="day", top=10, host=None):
+    """
+    讀取統計表產生儀表板資料，成本只與查詢的天數有關；指定 host 時只統計該 host
+    """
+    rows = SlotStatistic.objects.filter(date__range=[start_date, end_date])
+    if host is not None:
+        rows = rows.filter(host=host)
+    sums = {field: Sum(field) for field in COUNTER_FIELDS}
+
+    if group_by == "week":
+        periods = (
+            rows.annotate(period=TruncWeek("date"))
+            .values("period")
+            .annotate(**sums)
+            .order_by("period")
+        )
+    else:
+        periods = rows.values(period=F("date")).annotate(**sums).order_by("period")
+
+    by_time = (
+        rows.values("start_time")
+        .annotate(released=Sum("released"), occupied=Sum("occupied"))
+        .order_by("start_time")
+    )
+
+    top_students = StudentBookingStatistic.objects.select_related("user").order_by(
+        "-bookings"
+    )[:top]
+
+    return {
+        "periods": list(periods),
+        "fill_rate_by_time": [
+            {
+                "start_time": row["start_time"],
+                "released": row["released"],
+                "occupied": row["occupied"],
+                "fill_rate": (
+                    round(row["occupied"] / row["released"], 4)
+                    if row["released"]
+                    else 0
+                ),
+            }
+            for row in by_time
+        ],
+        "top_students": [
+            {
+                "student_id": stat.user.student_id,
+                "name": f"{stat.user.last_name}{stat.user.first_name}",
+                "bookings": stat.bookings,
+            }
+            for stat in top_students
+        ],
+    }
+
+
+def rebuild():
+    """
+    清空統計表並由熱資料與歸檔資料的目前狀態重新計算。
+    事件歷史無法從目前狀態還原，因此「取消後再預約」等中間轉換不會被計入。
+    """
+    occupied_statuses = [
+        AppointmentStatus.SCHEDULED,
+        AppointmentStatus.CONFIRMED,
+        AppointmentStatus.COMPLETED,
+    ]
+    booked_q = Q(user__isnull=False) | Q(status__in=occupied_statuses)
+    rejected_q = Q(status=AppointmentStatus.CANCELLED, rejection_reason__gt="")
+    aggregates = {
+        "released": Count("id"),
+        "booked": Count("id", filter=booked_q),
+        "confirmed": Count(
+            "id",
+            filter=Q(
+                status__in=[AppointmentStatus.CONFIRMED, AppointmentStatus.COMPLETED]
+            ),
+        ),
+        "rejected": Count("id", filter=rejected_q),
+        "cancelled": Count(
+            "id", filter=Q(status=AppointmentStatus.CANCELLED) & ~rejected_q
+        ),
+        "occupied": Count("id", filter=Q(status__in=occupied_statuses)),
+    }
+
+    slot_totals = defaultdict(lambda: defaultdict(int))
+    student_totals = defaultdict(int)
+    for model in (Appointment, ArchivedAppointment):
+        for row in (
+            model.objects.values("host_id", "date", "start_time")
+            .annotate(**aggregates)
+            .order_by()
+        ):
+            totals = slot_totals[(row["host_id"], row["date"], row["start_time"])]
+            for field in aggregates:
+                totals[field] += row[field]
+
+        for row in (
+            model.objects.filter(user__isnull=False)
+            .values("user_id")
+            .annotate(bookings=Count("id"))
+            .order_by()
+        ):
+            student_totals[row["user_id"]] += row["bookings"]
+
+    with transaction.atomic():
+        SlotStatistic.objects.all().delete()
+        StudentBookingStatistic.objects.all().delete()
+        SlotStatistic.objects.bulk_create(
+            [
+                SlotStatistic(
+                    host_id=host_id, date=date, start_time=start_time, **totals
+                )
+                for (host_id, date, start_time), totals in slot_totals.items()
+            ],
+            batch_size=1000,
+        )
+        StudentBookingStatistic.objects.bulk_create(
+            [
+                StudentBookingStatistic(user_id=user_id, bookings=bookings)
+                for user_id, bookings in student_totals.items()
+            ],
+            batch_size=1000,
+        )
+
+    return len(slot_totals), len(student_totals)
@@ -1,3 +1,924 @@
-from django.test import TestCase
+import logging
+import random
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.core import mail
+from django.core.cache import cache, caches
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from users.models import User
+
+from utils import idempotency, log
+from utils.db import retry_on_lock
+
+from . import (
+    admission,
+    archive,
+    availability,
+    changes,
+    holds,
+    ical,
+    reminders,
+    stats,
+    waitlist,
+)
+from .admin import AppointmentAdmin
+from .enums import (
+    AppointmentEvent,
+    AppointmentStatus,
+    TombstoneReason,
+    WaitlistStatus,
+)
+from .models import (
+    DEFAULT_HOST_SLUG,
+    Appointment,
+    ArchivedAppointment,
+    Host,
+    SlotStatistic,
+    WaitlistEntry,
+)
+
+
+def make_user(student_id):
+    return User.objects.create_user(
+        student_id=student_id,
+        password="Pw!12345678",
+        email=f"{student_id}@example.com",
+        grade=1,
+        department="CS",
+    )
+
+
+@override_settings(EMAIL_ASYNC_DISPATCH=False)
+class WaitlistTests(TestCase):
+    def setUp(self):
+        self.slot = Appointment.objects.create(
+            date=timezone.localdate() + timedelta(days=2),
+            time_slot="10:00-10:30",
+            status=AppointmentStatus.AVAILABLE,
+        )
+        self.first, self.second = [
+            WaitlistEntry.objects.create(appointment=self.slot, user=make_user(f"W{i}"))
+            for i in (1, 2)
+        ]
+
+    def _offer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return waitlist.offer_next(self.slot)
+
+    def test_released_slot_is_offered_to_head_of_queue(self):
+        self.assertEqual(self._offer(), self.first)
+
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.status, WaitlistStatus.OFFERED)
+        self.assertGreater(self.first.offer_expires_at, timezone.now())
+        self.assertEqual(waitlist.active_offer(self.slot.pk), self.first)
+        # 保留中的時段不出現在可預約列表
+        self.assertFalse(
+            waitlist.exclude_offered(Appointment.objects.filter(pk=self.slot.pk))
+        )
+        self.assertEqual(mail.outbox[0].to, [self.first.user.email])
+
+        # 已有有效保留時不再重複保留
+        self.assertIsNone(self._offer())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_taken_slot_is_not_offered(self):
+        self.slot.user = make_user("W0")
+        self.slot.status = AppointmentStatus.SCHEDULED
+        self.slot.save()
+
+        self.assertIsNone(self._offer())
+        self.assertEqual(
+            WaitlistEntry.objects.filter(status=WaitlistStatus.WAITING).count(), 2
+        )
+
+    def test_leaving_an_offer_passes_it_to_the_next(self):
+        self._offer()
+        self.first.refresh_from_db()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            waitlist.leave(self.first)
+
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.status, WaitlistStatus.OFFERED)
+        self.assertEqual(waitlist.active_offer(self.slot.pk), self.second)
+
+    def test_expired_offer_moves_to_the_next(self):
+        self._offer()
+        WaitlistEntry.objects.filter(pk=self.first.pk).update(
+            offer_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertIsNone(waitlist.active_offer(self.slot.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(waitlist.expire_offers(), 1)
+
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.status, WaitlistStatus.EXPIRED)
+        self.assertEqual(self.second.status, WaitlistStatus.OFFERED)
+        self.assertEqual(mail.outbox[-1].to, [self.second.user.email])
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        today = timezone.now().date()
+        self.cutoff = archive.default_cutoff()
+        last_week = self.cutoff - timedelta(days=7)
+        rows = [
+            (last_week, "09:00-09:30", AppointmentStatus.SCHEDULED),
+            (last_week, "08:00-08:30", AppointmentStatus.COMPLETED),
+            (today - timedelta(days=1), "10:00-10:30", AppointmentStatus.COMPLETED),
+            (today + timedelta(days=1), "11:00-11:30", AppointmentStatus.AVAILABLE),
+        ]
+        self.old_ids = []
+        for date, time_slot, status in rows:
+            appointment = Appointment.objects.create(
+                date=date, time_slot=time_slot, status=status
+            )
+            self.old_ids.append(appointment.pk)
+        self.future_id = self.old_ids.pop()
+        self.future_date = today + timedelta(days=1)
+
+    def test_archive_moves_past_rows_in_batches_keeping_ids(self):
+        self.assertEqual(archive.archive_batch(self.cutoff, batch_size=2), 2)
+        self.assertEqual(archive.archive_batch(self.cutoff, batch_size=2), 1)
+        self.assertEqual(archive.archive_batch(self.cutoff, batch_size=2), 0)
+
+        self.assertEqual(
+            list(Appointment.objects.values_list("pk", flat=True)), [self.future_id]
+        )
+        self.assertEqual(
+            set(ArchivedAppointment.objects.values_list("pk", flat=True)),
+            set(self.old_ids),
+        )
+
+    def test_history_merges_both_tables_in_list_order(self):
+        archive.archive_batch(self.cutoff)
+
+        merged = [
+            (appointment.date, appointment.start_time)
+            for appointment in archive.history(lambda qs: qs)
+        ]
+        self.assertEqual(len(merged), 4)
+        self.assertEqual(
+            merged, sorted(merged, key=lambda row: (-row[0].toordinal(), row[1]))
+        )
+
+    def test_history_skips_archive_for_future_ranges(self):
+        archive.archive_batch(self.cutoff)
+
+        self.assertFalse(archive.reaches_archive(self.future_date))
+        self.assertEqual(
+            [
+                appointment.pk
+                for appointment in archive.history(
+                    lambda qs: qs, start_date=self.future_date
+                )
+            ],
+            [self.future_id],
+        )
+
+
+@mock.patch.object(changes, "SETTLE_SECONDS", 0)
+class ChangesFeedTests(TestCase):
+    def setUp(self):
+        self.student = make_user("F1")
+        self.other = make_user("F2")
+        day = timezone.localdate() + timedelta(days=1)
+        self.mine = [
+            Appointment.objects.create(
+                user=self.student,
+                date=day,
+                time_slot=f"{9 + i:02d}:00-{9 + i:02d}:30",
+                status=AppointmentStatus.SCHEDULED,
+            ).pk
+            for i in range(3)
+        ]
+        Appointment.objects.create(
+            user=self.other,
+            date=day,
+            time_slot="13:00-13:30",
+            status=AppointmentStatus.SCHEDULED,
+        )
+
+    def _ids(self, rows):
+        return [row.pk for row in rows]
+
+    def test_pages_through_own_changes_then_catches_up(self):
+        changed, removed, cursor, has_more = changes.changes_since(
+            None, user=self.student, limit=2
+        )
+        self.assertEqual(self._ids(changed), self.mine[:2])
+        self.assertTrue(has_more)
+
+        changed, removed, cursor, has_more = changes.changes_since(
+            cursor, user=self.student, limit=2
+        )
+        self.assertEqual(self._ids(changed), self.mine[2:])
+        self.assertFalse(has_more)
+
+        changed, removed, cursor, has_more = changes.changes_since(
+            cursor, user=self.student
+        )
+        self.assertEqual((changed, removed, has_more), ([], [], False))
+
+        Appointment.objects.get(pk=self.mine[0]).save()
+        changed, removed, cursor, has_more = changes.changes_since(
+            cursor, user=self.student
+        )
+        self.assertEqual(self._ids(changed), self.mine[:1])
+
+    def test_removals_are_reported_to_the_affected_student(self):
+        _, _, cursor, _ = changes.changes_since(None, user=self.student)
+        _, _, staff_cursor, _ = changes.changes_since(None)
+
+        appointment = Appointment.objects.get(pk=self.mine[0])
+        appointment.user = None
+        appointment.status = AppointmentStatus.AVAILABLE
+        appointment.save()
+        changes.record_removed(
+            [(appointment.pk, self.student.pk)], TombstoneReason.UNBOOKED
+        )
+
+        changed, removed, _, _ = changes.changes_since(cursor, user=self.student)
+        self.assertEqual(changed, [])
+        self.assertEqual(
+            removed, [{"id": appointment.pk, "reason": TombstoneReason.UNBOOKED}]
+        )
+
+        # 後台看得到所有預約，取消預約只是一般的更新
+        changed, removed, _, _ = changes.changes_since(staff_cursor)
+        self.assertEqual(self._ids(changed), [appointment.pk])
+        self.assertEqual(removed, [])
+
+    def test_invalid_and_expired_cursors(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+
+        response = client.get("/api/appointments/changes/", {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 400)
+
+        stale = timezone.now() - timedelta(days=changes.TOMBSTONE_RETENTION_DAYS + 1)
+        cursor = changes.encode_cursor({"a": [stale.isoformat(), 1], "t": None})
+        response = client.get("/api/appointments/changes/", {"cursor": cursor})
+        self.assertEqual(response.status_code, 410)
+
+        response = client.get("/api/appointments/changes/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 3)
+
+
+@override_settings(ADMISSION_RATE_THRESHOLD=1, ADMISSION_CONCURRENCY=1)
+class AdmissionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        # 固定時間，放行範圍只在測試推進時間時前進
+        clock = mock.patch.object(admission, "time")
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+        self.clock.time.return_value = 1000.0
+        self.clock.monotonic.return_value = 0.0
+        # 其他測試的請求留下的開始時間不適用於這裡直接呼叫的 view
+        started = admission._request_started_at.set(None)
+        self.addCleanup(admission._request_started_at.reset, started)
+
+        # 排隊計數需要跨 worker 共用的預設快取 (Redis)；測試以 locmem 代替
+        shared = mock.patch.object(admission, "is_shared", return_value=True)
+        shared.start()
+        self.addCleanup(shared.stop)
+
+        self.view = admission.admission_controlled(
+            lambda view, request: Response({"ok": True})
+        )
+
+    def _request(self, ticket=None):
+        headers = {"HTTP_X_QUEUE_TICKET": ticket} if ticket else {}
+        return self.view(None, RequestFactory().post("/book/", **headers))
+
+    def test_below_threshold_passes_through(self):
+        with self.settings(ADMISSION_RATE_THRESHOLD=100):
+            for _ in range(5):
+                self.assertEqual(self._request().status_code, 200)
+        self.assertIsNone(cache.get(admission.ACTIVE_KEY))
+
+    def test_process_local_cache_disables_admission(self):
+        with mock.patch.object(admission, "is_shared", return_value=False):
+            for _ in range(5):
+                self.assertEqual(self._request().status_code, 200)
+        self.assertIsNone(cache.get(admission.ACTIVE_KEY))
+
+    def test_queues_in_ticket_order_over_threshold(self):
+        self.assertEqual(self._request().status_code, 200)
+
+        queued = self._request()
+        self.assertEqual(queued.status_code, 429)
+        self.assertEqual(queued.data["position"], 1)
+        self.assertEqual(queued["Retry-After"], "1")
+
+        # 偽造的號碼牌無效，重新排到隊尾
+        forged = self._request(ticket="3")
+        self.assertEqual(forged.data["position"], 2)
+
+        # 經過一個平均處理時間，放行範圍前進一位，帶回號碼牌即可進入
+        self.clock.time.return_value += admission.DEFAULT_SERVICE_TIME
+        self.assertEqual(self._request(ticket=queued.data["ticket"]).status_code, 200)
+        self.assertEqual(
+            self._request(ticket=forged.data["ticket"]).data["position"], 1
+        )
+
+
+class StructuredLoggingTests(SimpleTestCase):
+    def _record(self, msg, **extra):
+        record = logging.LogRecord("appointments", logging.INFO, "", 0, msg, None, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_redaction_masks_secrets(self):
+        jwt = "eyJhbGciOi.eyJzdWIiOjF9.c2lnbmF0dXJl"
+        record = self._record(
+            f"login password=hunter2 token: {jwt} sent with Bearer abc.def",
+            otp_code="123456",
+            detail='{"new_password": "s3cret!"}',
+        )
+        log.RedactionFilter().filter(record)
+
+        message = record.getMessage()
+        for secret in ("hunter2", jwt, "abc.def", "s3cret!"):
+            self.assertNotIn(secret, message + record.detail)
+        self.assertEqual(record.otp_code, log.REDACTED)
+
+    def test_redaction_masks_bearer_credentials_in_headers(self):
+        message = log.redact("Authorization: Bearer abc.def sent")
+        self.assertNotIn("abc.def", message)
+        self.assertEqual(message, f"Authorization: {log.REDACTED} sent")
+
+    def test_request_id_is_reused_and_attached_to_records(self):
+        records = []
+
+        def get_response(request):
+            record = self._record("inside")
+            log.RequestContextFilter().filter(record)
+            records.append(record)
+            return HttpResponse()
+
+        middleware = log.RequestLogMiddleware(get_response)
+        request = RequestFactory().get("/api/slots/", HTTP_X_REQUEST_ID="abc123")
+        response = middleware(request)
+
+        self.assertEqual(response["X-Request-ID"], "abc123")
+        self.assertEqual(records[0].request_id, "abc123")
+        self.assertGreaterEqual(records[0].elapsed_ms, 0)
+
+        response = middleware(RequestFactory().get("/api/slots/"))
+        self.assertEqual(len(response["X-Request-ID"]), 32)
+        self.assertEqual(records[1].request_id, response["X-Request-ID"])
+
+    def test_debug_sampling_is_decided_per_request(self):
+        sampler = log.SamplingFilter(rate=0.5)
+        info = self._record("kept")
+        self.assertTrue(sampler.filter(info))
+
+        decisions = []
+
+        def get_response(request):
+            for _ in range(5):
+                debug = self._record("debug")
+                debug.levelno = logging.DEBUG
+                decisions.append(sampler.filter(debug))
+            return HttpResponse()
+
+        middleware = log.RequestLogMiddleware(get_response)
+        for i in range(20):
+            decisions.clear()
+            middleware(RequestFactory().get("/", HTTP_X_REQUEST_ID=f"req-{i}"))
+            # 同一個請求的 DEBUG 紀錄全部保留或全部捨棄
+            self.assertEqual(len(set(decisions)), 1)
+
+        debug = self._record("debug")
+        debug.levelno = logging.DEBUG
+        self.assertFalse(log.SamplingFilter(rate=0).filter(debug))
+
+
+class ReminderTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        local_now = timezone.localtime(self.now)
+        self.window = (local_now, local_now + timedelta(hours=24))
+        for index, hours in enumerate([3, 4, 5, 72]):
+            start = local_now + timedelta(hours=hours)
+            Appointment.objects.create(
+                user=make_user(f"S{index}"),
+                date=start.date(),
+                time_slot=f"{start:%H}:00-{start:%H}:30",
+                status=AppointmentStatus.SCHEDULED,
+            )
+
+    def test_overlapping_claims_do_not_remind_twice(self):
+        # 兩個排程在任一方 UPDATE 之前選到同一批預約 (SQLite 不支援 select_for_update)
+        first_batch = list(
+            reminders.due_reminders(*self.window).values_list("pk", flat=True)
+        )
+        second_batch = list(
+            reminders.due_reminders(*self.window).values_list("pk", flat=True)
+        )
+        self.assertEqual(first_batch, second_batch)
+
+        first = reminders._claim(first_batch, self.now)
+        second = reminders._claim(second_batch, self.now)
+
+        self.assertEqual({appointment.pk for appointment in first}, set(first_batch))
+        self.assertEqual(second, [])
+
+    def test_repeated_runs_send_each_reminder_once(self):
+        lead = timedelta(hours=48)
+        self.assertEqual(reminders.send_due_reminders(lead, batch_size=2), 3)
+        self.assertEqual(reminders.send_due_reminders(lead, batch_size=2), 0)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            Appointment.objects.filter(reminded_at__isnull=False).count(), 3
+        )
+
+
+@override_settings(ADMISSION_RATE_THRESHOLD=10**6)
+class RescheduleConcurrencyTests(TransactionTestCase):
+    STUDENTS = 6
+    ATTEMPTS = 15
+
+    def setUp(self):
+        start = timezone.localtime() + timedelta(days=3)
+        self.slots = [
+            Appointment.objects.create(
+                date=start.date() + timedelta(days=index // 8),
+                time_slot=f"{9 + index % 8:02d}:00-{9 + index % 8:02d}:30",
+                status=AppointmentStatus.AVAILABLE,
+            ).pk
+            for index in range(self.STUDENTS * 2)
+        ]
+        self.students = [make_user(f"R{index}") for index in range(self.STUDENTS)]
+        # 每位學生先預約相鄰的一對時段中的一個，另一個空著讓彼此交叉改期
+        for student, pk in zip(self.students, self.slots[::2]):
+            Appointment.objects.filter(pk=pk).update(
+                user=student, status=AppointmentStatus.SCHEDULED
+            )
+
+    def _churn(self, student, current, statuses):
+        client = APIClient()
+        client.force_authenticate(student)
+        rng = random.Random(student.pk)
+        try:
+            for _ in range(self.ATTEMPTS):
+                target = rng.choice([pk for pk in self.slots if pk != current])
+                response = client.post(
+                    f"/api/appointments/{current}/reschedule/",
+                    {"target_slot_id": target},
+                    format="json",
+                )
+                statuses.append(response.status_code)
+                if response.status_code == 200:
+                    current = target
+        finally:
+            connection.close()
+
+    def test_crossing_reschedules_do_not_lose_or_duplicate_slots(self):
+        statuses = []
+        threads = [
+            threading.Thread(target=self._churn, args=(student, pk, statuses))
+            for student, pk in zip(self.students, self.slots[::2])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 只有成功、目標已被預約 (409) 與鎖定衝突 (409) 三種結果
+        self.assertEqual(len(statuses), self.STUDENTS * self.ATTEMPTS)
+        self.assertLessEqual(set(statuses), {200, 409})
+        self.assertIn(200, statuses)
+
+        slots = Appointment.objects.filter(pk__in=self.slots)
+        self.assertEqual(slots.count(), len(self.slots))
+        for student in self.students:
+            self.assertEqual(slots.filter(user=student).count(), 1)
+        self.assertEqual(
+            slots.filter(status=AppointmentStatus.SCHEDULED).count(), self.STUDENTS
+        )
+        self.assertFalse(
+            slots.filter(status=AppointmentStatus.SCHEDULED, user__isnull=True).exists()
+        )
+        self.assertFalse(
+            slots.filter(
+                status=AppointmentStatus.AVAILABLE, user__isnull=False
+            ).exists()
+        )
+
+
+class RetryOnLockTests(TransactionTestCase):
+    def test_only_wrapped_writes_begin_immediate_on_sqlite(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("BEGIN IMMEDIATE 只用於 SQLite")
+
+        def write():
+            with transaction.atomic():
+                Host.objects.filter(slug=DEFAULT_HOST_SLUG).update(name="Default")
+
+        def begins(context):
+            return [
+                query["sql"]
+                for query in context.captured_queries
+                if query["sql"].startswith("BEGIN")
+            ]
+
+        with CaptureQueriesContext(connection) as plain:
+            write()
+        with CaptureQueriesContext(connection) as wrapped:
+            retry_on_lock(write)()
+
+        self.assertEqual(begins(plain), ["BEGIN"])
+        self.assertEqual(begins(wrapped), ["BEGIN IMMEDIATE"])
+        # 其他交易維持 DEFERRED
+        self.assertIsNone(connection.transaction_mode)
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.user = make_user("C1")
+
+    def test_rotated_token_stops_resolving(self):
+        old_token = ical.issue_token(self.user)
+        self.assertEqual(ical.resolve_owner(old_token), ical.owner_for(self.user))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new_token = ical.issue_token(self.user, rotate=True)
+        self.assertIsNone(ical.resolve_owner(old_token))
+        self.assertEqual(ical.resolve_owner(new_token), ical.owner_for(self.user))
+
+    def test_staff_feed_version_moves_with_the_date(self):
+        # 範圍隨日期移動，即使沒有任何變更，換日後版本 (內容快取與 ETag) 也要更新
+        yesterday = timezone.localtime() - timedelta(days=1)
+        ical.shared_cache().set(
+            ical._version_key(ical.STAFF_OWNER), int(yesterday.timestamp())
+        )
+        self.assertGreaterEqual(
+            ical.feed_version(ical.STAFF_OWNER), ical._today_start()
+        )
+
+    def test_admin_completion_refreshes_the_feed_in_every_worker(self):
+        appointment = Appointment.objects.create(
+            user=self.user,
+            date=timezone.localdate() + timedelta(days=1),
+            time_slot="10:00-10:30",
+            status=AppointmentStatus.SCHEDULED,
+        )
+        owner = ical.owner_for(self.user)
+        # 兩個 worker 行程：各自一個共用快取的連線實例
+        workers = [
+            caches.create_connection(settings.SHARED_CACHE_ALIAS) for _ in range(2)
+        ]
+
+        def on(worker):
+            return mock.patch(
+                "utils.cache.caches", {settings.SHARED_CACHE_ALIAS: workers[worker]}
+            )
+
+        with on(0):
+            version = ical.feed_version(owner)
+            self.assertIn(b"STATUS:TENTATIVE", ical.render_feed(owner))
+
+        with on(1), self.captureOnCommitCallbacks(execute=True):
+            AppointmentAdmin(Appointment, admin.site).mark_as_completed(
+                None, Appointment.objects.filter(pk=appointment.pk)
+            )
+
+        with on(0):
+            self.assertGreater(ical.feed_version(owner), version)
+            body = ical.render_feed(owner)
+        self.assertIn(b"STATUS:CONFIRMED", body)
+        self.assertNotIn(b"STATUS:TENTATIVE", body)
+
+
+class HoldTests(TestCase):
+    def test_hold_is_exclusive_and_extendable(self):
+        self.assertIsNotNone(holds.hold(1, 10))
+        self.assertIsNone(holds.hold(1, 20))
+        self.assertIsNotNone(holds.hold(1, 10))
+        self.assertEqual(holds.holder(1), 10)
+
+    def test_hold_retries_add_when_previous_expires(self):
+        holds.hold(1, 10)
+        # 前一個保留在 add 失敗後、get 之前到期
+        cache = holds.shared_cache()
+        original_get = cache.get
+
+        def expiring_get(key, *args, **kwargs):
+            if key == holds._key(1):
+                cache.delete(key)
+            return original_get(key, *args, **kwargs)
+
+        with mock.patch.object(cache, "get", side_effect=expiring_get):
+            self.assertIsNotNone(holds.hold(1, 20))
+        self.assertEqual(holds.holder(1), 20)
+
+
+class AvailabilitySnapshotTests(TestCase):
+    def setUp(self):
+        self.host = Host.objects.create(name="Host", slug="snapshot-host")
+        self.slot = Appointment.objects.create(
+            host=self.host,
+            date=timezone.localdate() + timedelta(days=2),
+            time_slot="10:00-10:30",
+            status=AppointmentStatus.AVAILABLE,
+        )
+        self.listed = {str(self.slot.date): ["10:00-10:30"]}
+        # 兩個 worker 行程：各自一個共用快取的連線實例
+        self.workers = [
+            caches.create_connection(settings.SHARED_CACHE_ALIAS) for _ in range(2)
+        ]
+
+    def _on(self, worker):
+        return mock.patch(
+            "utils.cache.caches",
+            {
+                "default": caches["default"],
+                settings.SHARED_CACHE_ALIAS: self.workers[worker],
+            },
+        )
+
+    def _slots(self, worker, user_id=None):
+        with self._on(worker):
+            return availability.available_slots(self.host.pk, user_id=user_id)
+
+    def test_booking_in_one_worker_invalidates_every_worker(self):
+        self.assertEqual(self._slots(0), self.listed)
+        # 版本號存在共用快取，另一個 worker 讀到同一個版本
+        version = self.workers[1].get(availability._version_key(self.host.pk))
+        self.assertIsNotNone(version)
+        self.assertEqual(self._slots(1), self.listed)
+
+        with self._on(1), self.captureOnCommitCallbacks(execute=True):
+            self.slot.user = make_user("V1")
+            self.slot.status = AppointmentStatus.SCHEDULED
+            self.slot.save()
+            availability.invalidate({self.host.pk})
+
+        self.assertEqual(self._slots(0), {})
+
+    def test_holds_and_offers_in_one_worker_are_seen_by_every_worker(self):
+        student = make_user("V2")
+        self.assertEqual(self._slots(0), self.listed)
+
+        # 暫時保留：其他學生在任何 worker 都看不到，保留者自己仍看得到
+        with self._on(1):
+            holds.hold(self.slot.pk, student.pk)
+        self.assertEqual(self._slots(0), {})
+        self.assertEqual(self._slots(0, user_id=student.pk), self.listed)
+        with self._on(1):
+            holds.release(self.slot.pk, student.pk)
+        self.assertEqual(self._slots(0), self.listed)
+
+        # 候補保留：保留中的時段不列出，退出後在其他 worker 的快照也立刻失效
+        entry = WaitlistEntry.objects.create(
+            appointment=self.slot,
+            user=student,
+            status=WaitlistStatus.OFFERED,
+            offer_expires_at=timezone.now() + timedelta(minutes=15),
+        )
+        with self._on(1), self.captureOnCommitCallbacks(execute=True):
+            availability.invalidate({self.host.pk})
+        self.assertEqual(self._slots(0), {})
+
+        with self._on(1), self.captureOnCommitCallbacks(execute=True):
+            waitlist.leave(entry)
+        self.assertEqual(self._slots(0), self.listed)
+
+    def test_api_edit_of_the_time_slot_invalidates_every_worker(self):
+        staff = make_user("V3")
+        staff.is_staff = True
+        staff.save(update_fields=["is_staff"])
+        client = APIClient()
+        client.force_authenticate(staff)
+        self.assertEqual(self._slots(0), self.listed)
+
+        with self._on(1), self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(
+                f"/api/appointments/{self.slot.pk}/",
+                {"time_slot": "11:00-11:30"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._slots(0), {str(self.slot.date): ["11:00-11:30"]})
+
+
+@override_settings(EMAIL_ASYNC_DISPATCH=False)
+class SlotStatisticTests(TestCase):
+    def setUp(self):
+        self.staff = make_user("S0")
+        self.staff.is_staff = True
+        self.staff.save(update_fields=["is_staff"])
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+        self.appointment = Appointment.objects.create(
+            user=make_user("S1"),
+            date=timezone.localdate() + timedelta(days=1),
+            time_slot="10:00-10:30",
+            status=AppointmentStatus.SCHEDULED,
+        )
+        stats.record(AppointmentEvent.RELEASED, self.appointment)
+        stats.record(
+            AppointmentEvent.BOOKED,
+            self.appointment,
+            user_id=self.appointment.user_id,
+        )
+
+    def _counters(self):
+        return SlotStatistic.objects.values(
+            "booked", "rejected", "cancelled", "occupied"
+        ).get(host_id=self.appointment.host_id, date=self.appointment.date)
+
+    def test_reopening_a_rejected_slot_is_not_counted_as_a_cancellation(self):
+        url = f"/api/appointments/{self.appointment.pk}"
+        response = self.client.post(f"{url}/reject/", {"reason": "Busy"})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.put(f"{url}/cancel/")
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            self._counters(),
+            {"booked": 1, "rejected": 1, "cancelled": 0, "occupied": 0},
+        )
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.status, AppointmentStatus.AVAILABLE)
+
+    def test_cancelling_a_booking_releases_it_once(self):
+        response = self.client.put(f"/api/appointments/{self.appointment.pk}/cancel/")
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            self._counters(),
+            {"booked": 1, "rejected": 0, "cancelled": 1, "occupied": 0},
+        )
+
+
+class TimeSlotValidationTests(TestCase):
+    def setUp(self):
+        self.staff = make_user("T0")
+        self.staff.is_staff = self.staff.is_superuser = True
+        self.staff.save(update_fields=["is_staff", "is_superuser"])
+        self.slot = Appointment.objects.create(
+            date=timezone.localdate() + timedelta(days=1),
+            time_slot="10:00-10:30",
+            status=AppointmentStatus.AVAILABLE,
+        )
+
+    def _admin_form(self, time_slot, instance=None):
+        request = RequestFactory().get("/")
+        request.user = self.staff
+        form_class = AppointmentAdmin(Appointment, admin.site).get_form(
+            request, instance
+        )
+        return form_class(
+            data={
+                "host": self.slot.host_id,
+                "date": self.slot.date,
+                "time_slot": time_slot,
+                "status": AppointmentStatus.AVAILABLE,
+            },
+            instance=instance,
+        )
+
+    def test_admin_form_reports_bad_and_duplicate_slots_on_the_field(self):
+        form = self._admin_form("bogus")
+        self.assertFalse(form.is_valid())
+        self.assertIn("time_slot", form.errors)
+
+        # 寫法不同但開始時間相同，仍是同一個時段
+        form = self._admin_form("10:00~10:30")
+        self.assertFalse(form.is_valid())
+        self.assertIn("time_slot", form.errors)
+
+        form = self._admin_form("10:00~10:30", instance=self.slot)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.instance.end_time.strftime("%H:%M"), "10:30")
+
+    def test_api_edit_reports_duplicate_slots_on_the_field(self):
+        other = Appointment.objects.create(
+            date=self.slot.date,
+            time_slot="11:00-11:30",
+            status=AppointmentStatus.AVAILABLE,
+        )
+        client = APIClient()
+        client.force_authenticate(self.staff)
+
+        response = client.patch(
+            f"/api/appointments/{other.pk}/", {"time_slot": "10:00~10:30"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("time_slot", response.data)
+
+        response = client.patch(
+            f"/api/appointments/{other.pk}/", {"time_slot": "11:00~12:00"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["end_time"], "12:00:00")
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.calls = 0
+        # 兩個 worker 行程：各自一個共用快取的連線實例
+        self.workers = [
+            caches.create_connection(settings.SHARED_CACHE_ALIAS) for _ in range(2)
+        ]
+
+        @idempotency.idempotent
+        def view(_, request):
+            self.calls += 1
+            return Response({"calls": self.calls}, status=201)
+
+        self.view = view
+
+    def _request(self, data=None):
+        return SimpleNamespace(
+            META={idempotency.IDEMPOTENCY_HEADER: "key-1"},
+            user=SimpleNamespace(pk=1),
+            method="POST",
+            path="/api/appointments/1/book/",
+            data=data or {"slot": 1},
+        )
+
+    def _call(self, worker, request):
+        with mock.patch(
+            "utils.cache.caches", {settings.SHARED_CACHE_ALIAS: self.workers[worker]}
+        ):
+            return self.view(None, request)
+
+    def test_result_is_replayed_by_every_worker(self):
+        self.assertEqual(self._call(0, self._request()).status_code, 201)
+
+        replayed = self._call(1, self._request())
+        self.assertEqual(replayed.status_code, 201)
+        self.assertEqual(replayed["Idempotent-Replayed"], "true")
+        self.assertEqual(self.calls, 1)
+
+        reused = self._call(1, self._request({"slot": 2}))
+        self.assertEqual(reused.status_code, 422)
+
+    def test_in_flight_duplicate_waits_for_the_result(self):
+        request = self._request()
+        result_key, lock_key = idempotency._cache_keys(request, "key-1")
+        self.workers[0].add(lock_key, 1)
+
+        def first_request_finishes(_):
+            self.workers[0].set(
+                result_key,
+                {
+                    "fingerprint": idempotency._fingerprint(request),
+                    "status": 201,
+                    "data": {"calls": 1},
+                },
+            )
+            self.workers[0].delete(lock_key)
+
+        with mock.patch.object(
+            idempotency.time, "sleep", side_effect=first_request_finishes
+        ):
+            response = self._call(1, request)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(self.calls, 0)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_in_flight_duplicate_is_retryable_after_the_wait(self):
+        request = self._request()
+        _, lock_key = idempotency._cache_keys(request, "key-1")
+        self.workers[0].add(lock_key, 1)
+
+        response = self._call(1, request)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(self.calls, 0)
+
+        # 前一個請求沒有保存結果就結束時，重試會真正執行
+        self.workers[0].delete(lock_key)
+        self.assertEqual(self._call(1, request).status_code, 201)
+        self.assertEqual(self.calls, 1)
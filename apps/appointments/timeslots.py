@@ -0,0 +1,39 @@
+import re
+from datetime import date, datetime, time, timedelta
+
+# 只給開始時間 (例如 "14:00") 時預設的時段長度
+DEFAULT_SLOT_DURATION = timedelta(minutes=30)
+
+_TIME_SLOT_RE = re.compile(
+    r"^\s*(\d{1,2})[:：](\d{2})\s*(?:[-~–—～至到]\s*(\d{1,2})[:：](\d{2}))?\s*$"
+)
+
+
+def parse_time_slot(value):
+    """
+    將時段字串解析為 (start_time, end_time)。
+    支援 "14:00-14:30"、"9:00~9:30"、"14:00" 等寫法，格式錯誤時拋出 ValueError。
+    """
+    match = _TIME_SLOT_RE.match(value or "")
+    if not match:
+        raise ValueError(f"無法解析時段格式: {value!r}")
+
+    start_hour, start_minute, end_hour, end_minute = match.groups()
+    start = time(int(start_hour), int(start_minute))
+
+    if end_hour is None:
+        end = (datetime.combine(date.min, start) + DEFAULT_SLOT_DURATION).time()
+    else:
+        end = time(int(end_hour), int(end_minute))
+
+    if end <= start:
+        raise ValueError(f"時段結束時間必須晚於開始時間: {value!r}")
+
+    return start, end
+
+
+def parse_time_of_day(value):
+    """
+    解析查詢參數中的 "HH:MM"，格式錯誤時拋出 ValueError
+    """
+    return datetime.strptime(value.strip(), "%H:%M").time()
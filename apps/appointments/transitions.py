@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from notify_letter.digest import record_staff_event
+
+from utils import user_cache
+
+from . import availability, changes, ical, stats, waitlist
+from .enums import AppointmentEvent, AppointmentStatus, TombstoneReason
+
+# 佔用時段的狀態，離開這些狀態 (完成除外) 視為取消
+OCCUPIED_STATUSES = [AppointmentStatus.SCHEDULED, AppointmentStatus.CONFIRMED]
+
+# 需要彙整進教師摘要信的事件
+STAFF_DIGEST_EVENTS = {
+    AppointmentEvent.BOOKED: "Booked",
+    AppointmentEvent.RESCHEDULED_IN: "Rescheduled to",
+    AppointmentEvent.CANCELLED: "Cancelled",
+}
+
+
+def _student_label(appointment, user_id):
+    """
+    [Private] 取消後 appointment.user 已清空，改以 user_id 查詢學號
+    """
+    if appointment.user_id == user_id and appointment.user is not None:
+        return appointment.user.student_id
+    return (
+        get_user_model()
+        .objects.filter(pk=user_id)
+        .values_list("student_id", flat=True)
+        .first()
+    )
+
+
+def status_event(previous_status, status):
+    """
+    依手動修改前後的狀態判斷統計事件，狀態未變或不影響統計時回傳 None
+    """
+    if previous_status == status:
+        return None
+    if status == AppointmentStatus.CONFIRMED:
+        return AppointmentEvent.CONFIRMED
+    if previous_status in OCCUPIED_STATUSES and status not in OCCUPIED_STATUSES + [
+        AppointmentStatus.COMPLETED
+    ]:
+        return AppointmentEvent.CANCELLED
+    return None
+
+
+def record_transition(appointment, event=None, user_id=None):
+    """
+    預約狀態轉換後的統一掛勾 (統計、可預約快照、行事曆訂閱、教師摘要、候補遞補)。
+    須在寫入狀態的同一個交易中呼叫；event 為 None 時不計入統計。
+    user_id 為受影響的學生，預設為 appointment.user_id (取消時需傳入原預約者)。
+    """
+    if user_id is None:
+        user_id = appointment.user_id
+
+    if event:
+        stats.record(event, appointment, user_id=user_id)
+
+    if event in STAFF_DIGEST_EVENTS and user_id:
+        record_staff_event(
+            event,
+            f"{STAFF_DIGEST_EVENTS[event]} {appointment.date} {appointment.time_slot}"
+            f" - {_student_label(appointment, user_id)}",
+            appointment_id=appointment.pk,
+        )
+
+    # 學生失去這個預約 (取消、被駁回、改期移出)，增量同步需回報移除
+    if user_id and user_id != appointment.user_id:
+        changes.record_removed([(appointment.pk, user_id)], TombstoneReason.UNBOOKED)
+
+    availability.invalidate({appointment.host_id})
+    ical.invalidate_feeds({user_id, appointment.user_id})
+    user_cache.invalidate({user_id, appointment.user_id})
+
+    # 時段回到可預約時，優先保留給候補者
+    waitlist.offer_next(appointment)
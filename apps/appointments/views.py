@@ -1,7 +1,20 @@
-from datetime import timedelta
-
-from django.db import models, transaction
+import logging
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, OperationalError, models, transaction
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    StreamingHttpResponse,
+)
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date, parse_etags
+from django.views import View
 from notify_letter.utils import (
     send_confirmation_email,
     send_notification_email,
@@ -13,16 +26,111 @@ from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .enums import AppointmentStatus
-from .models import Appointment
-from .serializers import AppointmentSerializer, CreateAppointmentSerializer
+from utils import user_cache
+from utils.db import is_lock_conflict, retry_on_lock
+from utils.idempotency import idempotent
+
+from . import archive, availability, changes, holds, ical, stats, waitlist
+from .admission import admission_controlled
+from .enums import AppointmentEvent, AppointmentStatus, WaitlistStatus
+from .models import DEFAULT_HOST_SLUG, Appointment, Host, WaitlistEntry
+from .serializers import (
+    AppointmentSerializer,
+    CreateAppointmentSerializer,
+    validate_time_slot,
+)
+from .timeslots import parse_time_of_day, parse_time_slot
+from .transitions import OCCUPIED_STATUSES, record_transition, status_event
+
+logger = logging.getLogger(__name__)
+
+
+def filter_time_of_day(queryset, params):
+    """
+    依 ?time_from=HH:MM&time_to=HH:MM 篩選開始時間，條件落在 start_time 索引上
+    """
+    try:
+        if params.get("time_from"):
+            queryset = queryset.filter(
+                start_time__gte=parse_time_of_day(params["time_from"])
+            )
+        if params.get("time_to"):
+            queryset = queryset.filter(
+                start_time__lt=parse_time_of_day(params["time_to"])
+            )
+    except ValueError:
+        raise serializers.ValidationError(
+            {"error": "time_from / time_to 格式必須為 HH:MM"}
+        )
+    return queryset
+
+
+def resolve_host(params, default=False):
+    """
+    取得 ?host=<slug> 指定的 host；未指定時回傳預設 host (default=True) 或 None
+    """
+    slug = params.get("host") or (DEFAULT_HOST_SLUG if default else None)
+    if not slug:
+        return None
+
+    host = Host.objects.filter(slug=slug, is_active=True).first()
+    if host is None:
+        raise serializers.ValidationError({"error": f"找不到 host: {slug}"})
+    return host
+
+
+def filter_host(queryset, host):
+    return queryset if host is None else queryset.filter(host=host)
+
+
+def if_match_versions(request):
+    """
+    解析 If-Match 標頭中的版本號；未帶或為 * 時回傳 None (不做條件式更新)
+    """
+    header = request.headers.get("If-Match")
+    if not header:
+        return None
+
+    etags = parse_etags(header)
+    if etags == ["*"]:
+        return None
+
+    # If-Match 使用強比對，弱 ETag 與格式不符的值視為不相符
+    versions = []
+    for etag in etags:
+        try:
+            versions.append(int(etag.strip('"')))
+        except ValueError:
+            pass
+    return versions
+
+
+def with_etag(response, version):
+    response["ETag"] = f'"{version}"'
+    return response
+
+
+def precondition_failed():
+    return Response(
+        {"error": "預約已被其他人修改，請重新讀取後再試"},
+        status=status.HTTP_412_PRECONDITION_FAILED,
+    )
 
 
 class AdminReleaseSlotSerializer(serializers.ModelSerializer):
+    host = serializers.SlugRelatedField(
+        slug_field="slug",
+        queryset=Host.objects.filter(is_active=True),
+        required=False,
+    )
+
     class Meta:
         model = Appointment
 
-        fields = ["date", "time_slot"]
+        fields = ["host", "date", "time_slot", "visible_from"]
+
+    def validate_time_slot(self, value):
+        return validate_time_slot(value)
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -53,14 +161,47 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.is_staff:
             return Appointment.objects.all()
-        if self.action == "book":
-            return Appointment.objects.filter(status=AppointmentStatus.AVAILABLE)
+        if self.action in ("book", "hold"):
+            return availability.released(
+                Appointment.objects.filter(status=AppointmentStatus.AVAILABLE)
+            )
+        if self.action in ("join_waitlist", "leave_waitlist", "release_hold"):
+            return Appointment.objects.all()
         status_param = self.request.query_params.get("status")
         if status_param == "available":
-            return Appointment.objects.filter(status=AppointmentStatus.AVAILABLE)
+            host = resolve_host(self.request.query_params, default=True)
+            queryset = waitlist.exclude_offered(
+                availability.released(
+                    Appointment.objects.filter(
+                        host=host, status=AppointmentStatus.AVAILABLE
+                    )
+                )
+            )
+            held = holds.held_by_others(queryset.values_list("pk", flat=True), user.pk)
+            return queryset.exclude(pk__in=held)
 
         return Appointment.objects.filter(user=user)
 
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == "list":
+            params = self.request.query_params
+            queryset = filter_host(
+                filter_time_of_day(queryset, params), resolve_host(params)
+            )
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # 學生開啟 App 時的「我的預約」，依使用者快取 render 好的回應
+        if request.user.is_staff or request.query_params:
+            return super().list(request, *args, **kwargs)
+        return user_cache.cached_json(
+            "appointments",
+            request.user.pk,
+            lambda: self.get_serializer(self.get_queryset(), many=True).data,
+        )
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         is_many = isinstance(request.data, list)
 
@@ -72,15 +213,24 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             for item in request.data:
                 date = item.get("date")
                 time_slot = item.get("time_slot")
+                host_slug = item.get("host") or DEFAULT_HOST_SLUG
 
-                if Appointment.objects.filter(date=date, time_slot=time_slot).exists():
+                try:
+                    start_time, _ = parse_time_slot(time_slot)
+                except ValueError as e:
+                    errors.append({"time_slot": [str(e)]})
+                    continue
+
+                if Appointment.objects.filter(
+                    host__slug=host_slug, date=date, start_time=start_time
+                ).exists():
                     skipped_count += 1
                     continue
 
                 serializer = self.get_serializer(data=item)
 
                 if serializer.is_valid():
-                    serializer.save(status=AppointmentStatus.AVAILABLE, user=None)
+                    self._release_slot(serializer)
                     created_count += 1
                 else:
                     errors.append(serializer.errors)
@@ -101,9 +251,60 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
         return super().create(request, *args, **kwargs)
 
+    def perform_create(self, serializer):
+        retry_on_lock(serializer.save)()
+
+    def retrieve(self, request, *args, **kwargs):
+        appointment = self.get_object()
+        return with_etag(
+            Response(self.get_serializer(appointment).data), appointment.version
+        )
+
+    def update(self, request, *args, **kwargs):
+        try:
+            response = super().update(request, *args, **kwargs)
+        except Appointment.NotUpdated:
+            return precondition_failed()
+        return with_etag(response, response.data["version"])
+
+    def perform_update(self, serializer):
+        expected_versions = if_match_versions(self.request)
+        previous = serializer.instance
+        previous_host_id = previous.host_id
+        previous_user_id = previous.user_id
+        previous_status = previous.status
+
+        with transaction.atomic():
+            if expected_versions is None:
+                appointment = serializer.save()
+            else:
+                # 帶 If-Match 時以 (id, version) 條件式 UPDATE 寫入，版本不符則不覆蓋
+                appointment = serializer.instance
+                for attr, value in serializer.validated_data.items():
+                    setattr(appointment, attr, value)
+                appointment.save(expected_versions=expected_versions)
+
+            # 與後台 save_model 相同：日期、時段或狀態變更都要同步統計、快照與行事曆
+            record_transition(
+                appointment,
+                status_event(previous_status, appointment.status),
+                user_id=previous_user_id or appointment.user_id,
+            )
+            if previous_host_id != appointment.host_id:
+                availability.invalidate({previous_host_id})
+
+    @retry_on_lock
+    def _release_slot(self, serializer):
+        with transaction.atomic():
+            appointment = serializer.save(status=AppointmentStatus.AVAILABLE, user=None)
+            record_transition(appointment, AppointmentEvent.RELEASED)
+        return appointment
+
     @action(
         detail=True, methods=["patch"], permission_classes=[permissions.IsAuthenticated]
     )
+    @admission_controlled
+    @idempotent
     def book(self, request, pk=None):
         """
         建立預約 API
@@ -117,15 +318,31 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # 時段正保留給其他候補學生時不可預約
+        offer = waitlist.active_offer(appointment.pk)
+        if offer and offer.user_id != request.user.id:
+            return Response(
+                {"error": "This slot is being held for a waitlisted student."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        if holds.holder(appointment.pk) not in (None, request.user.id):
+            return Response(
+                {"error": "This slot is being held by another student."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
         # Get week start and end
         today = timezone.now().date()
         week_start = today - timedelta(days=today.weekday())  # Monday
         week_end = week_start + timedelta(days=6)  # Sunday
 
         # Check if the appointment date is within the current week
+        # 名額以 host 為單位計算，不同老師 / 助教的時段各自可預約一次
         already_booked = (
             Appointment.objects.filter(
                 user=request.user,
+                host_id=appointment.host_id,
                 date__range=(week_start, week_end),
                 status=AppointmentStatus.SCHEDULED,
             )
@@ -139,10 +356,13 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        appointment.user = request.user
-        appointment.status = AppointmentStatus.SCHEDULED
-        appointment.reason = request.data.get("reason", "")
-        appointment.save()
+        appointment = self._claim_slot(request, appointment.pk, offer)
+        if appointment is None:
+            return Response(
+                {"error": "This slot is already taken."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        holds.release(appointment.pk, request.user.id)
 
         email_context = {
             "date": appointment.date,
@@ -160,6 +380,73 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
         return Response({"status": "Booked successfully", "id": appointment.id})
 
+    @retry_on_lock
+    def _claim_slot(self, request, pk, offer):
+        """
+        [Private] 在交易中重新讀取時段並寫入預約；時段已被搶走時回傳 None
+        """
+        with transaction.atomic():
+            appointment = Appointment.objects.select_for_update().get(pk=pk)
+            if (
+                appointment.user_id is not None
+                or appointment.status != AppointmentStatus.AVAILABLE
+            ):
+                return None
+
+            appointment.user = request.user
+            appointment.status = AppointmentStatus.SCHEDULED
+            appointment.reason = request.data.get("reason", "")
+            appointment.reminded_at = None
+            appointment.save()
+
+            if offer:
+                waitlist.accept_offer(offer)
+
+            record_transition(
+                appointment, AppointmentEvent.BOOKED, user_id=request.user.id
+            )
+
+        return appointment
+
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    def hold(self, request, pk=None):
+        """
+        填寫預約事由期間暫時保留時段 (SLOT_HOLD_SECONDS 秒)，之後以 book 完成預約
+        URL: POST /api/appointments/{id}/hold/
+        """
+        appointment = self.get_object()
+
+        offer = waitlist.active_offer(appointment.pk)
+        if appointment.user_id is not None or (
+            offer and offer.user_id != request.user.id
+        ):
+            return Response(
+                {"error": "此時段無法保留"}, status=status.HTTP_409_CONFLICT
+            )
+
+        expires_at = holds.hold(appointment.pk, request.user.id)
+        if expires_at is None:
+            return Response(
+                {"error": "此時段正被其他學生保留"}, status=status.HTTP_409_CONFLICT
+            )
+
+        return Response(
+            {
+                "id": appointment.id,
+                "expires_at": datetime.fromtimestamp(expires_at, tz=dt_timezone.utc),
+            }
+        )
+
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    def release_hold(self, request, pk=None):
+        """
+        放棄暫時保留的時段
+        URL: POST /api/appointments/{id}/release_hold/
+        """
+        appointment = self.get_object()
+        holds.release(appointment.pk, request.user.id)
+        return Response({"status": "已釋放保留", "id": appointment.id})
+
     @action(detail=True, methods=["put"], permission_classes=[IsAuthenticated])
     def cancel(self, request, pk=None):
         """
@@ -171,21 +458,46 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             return Response(
                 {"error": "您無權限取消此預約"}, status=status.HTTP_403_FORBIDDEN
             )
-        appointment.status = AppointmentStatus.AVAILABLE
-        appointment.user = None
-        appointment.reason = None
-        appointment.save()
-        return Response({"status": "已取消預約", "id": appointment.id})
+        try:
+            appointment = self._release_booking(
+                appointment.pk, if_match_versions(request)
+            )
+        except Appointment.NotUpdated:
+            return precondition_failed()
+
+        return with_etag(
+            Response({"status": "已取消預約", "id": appointment.id}),
+            appointment.version,
+        )
+
+    @retry_on_lock
+    def _release_booking(self, pk, expected_versions=None):
+        with transaction.atomic():
+            appointment = Appointment.objects.select_for_update().get(pk=pk)
+            previous_user_id = appointment.user_id
+            # 已駁回 (CANCELLED) 的時段在駁回時已扣除佔用，重新開放不再計為取消
+            was_occupied = appointment.status in OCCUPIED_STATUSES
+            appointment.status = AppointmentStatus.AVAILABLE
+            appointment.user = None
+            appointment.reason = None
+            appointment.save(expected_versions=expected_versions)
+
+            record_transition(
+                appointment,
+                AppointmentEvent.CANCELLED if was_occupied else None,
+                user_id=previous_user_id,
+            )
+        return appointment
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    @admission_controlled
+    @idempotent
     def reschedule(self, request, pk=None):
         """
         修改預約 API
         URL: POST /api/appointments/{old_id}/reschedule/
         """
-        old_appointment = self.get_object()
         target_slot_id = request.data.get("target_slot_id")
-        new_reason = request.data.get("reason", old_appointment.reason)
 
         if not target_slot_id:
             return Response(
@@ -193,43 +505,39 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if old_appointment.user != request.user:
+        try:
+            old_id = int(pk)
+            target_id = int(target_slot_id)
+        except (TypeError, ValueError):
             return Response(
-                {"error": "您無權限修改此預約"}, status=status.HTTP_403_FORBIDDEN
+                {"error": "時段 ID 格式錯誤"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        if old_appointment.status != AppointmentStatus.SCHEDULED:
+        if old_id == target_id:
             return Response(
-                {"error": "只能修改狀態為'已預約'的時段"},
+                {"error": "目標時段與原時段相同"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         try:
-            target_appointment = Appointment.objects.get(pk=target_slot_id)
-        except Appointment.DoesNotExist:
+            with transaction.atomic():
+                result = self._swap_slots(request, old_id, target_id)
+        except OperationalError as exc:
+            # 另一個請求正持有其中一筆的鎖，直接回報衝突而非排隊等待
+            # (SQLite 忽略 nowait，等到 busy timeout 才會回報)；
+            # 其他資料庫錯誤 (完整性錯誤、連線中斷) 照常往外拋
+            if not is_lock_conflict(exc):
+                raise
             return Response(
-                {"error": "目標時段不存在"}, status=status.HTTP_404_NOT_FOUND
-            )
-        if (
-            target_appointment.status != AppointmentStatus.AVAILABLE
-            or target_appointment.user is not None
-        ):
-            return Response(
-                {"error": "目標時段已被預約或不可用"},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"error": "時段正在被其他請求修改，請稍後再試"},
+                status=status.HTTP_409_CONFLICT,
             )
 
-        with transaction.atomic():
-            old_appointment.user = None
-            old_appointment.status = AppointmentStatus.AVAILABLE
-            old_appointment.reason = None  # 清空理由
-            old_appointment.save()
-
-            target_appointment.user = request.user
-            target_appointment.status = AppointmentStatus.SCHEDULED
-            target_appointment.reason = new_reason
-            target_appointment.save()
+        if isinstance(result, Response):
+            return result
 
+        old_appointment, target_appointment = result
+        holds.release(target_appointment.pk, request.user.id)
         return Response(
             {
                 "status": "預約修改成功",
@@ -244,6 +552,163 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             }
         )
 
+    def _swap_slots(self, request, old_id, target_id):
+        """
+        在交易內鎖定新舊兩個時段並交換預約，必須在 transaction.atomic() 中呼叫。
+        兩筆資料依主鍵順序上鎖，交叉的改期請求不會互相死結。
+        """
+        locked = {
+            appt.pk: appt
+            for appt in Appointment.objects.select_for_update(nowait=True)
+            .filter(pk__in=[old_id, target_id])
+            .order_by("pk")
+        }
+        old_appointment = locked.get(old_id)
+        target_appointment = locked.get(target_id)
+
+        if old_appointment is None:
+            return Response({"error": "原預約不存在"}, status=status.HTTP_404_NOT_FOUND)
+
+        if old_appointment.user_id != request.user.id:
+            return Response(
+                {"error": "您無權限修改此預約"}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        if old_appointment.status != AppointmentStatus.SCHEDULED:
+            return Response(
+                {"error": "只能修改狀態為'已預約'的時段"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if target_appointment is None:
+            return Response(
+                {"error": "目標時段不存在"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        if (
+            target_appointment.status != AppointmentStatus.AVAILABLE
+            or target_appointment.user_id is not None
+            or (
+                target_appointment.visible_from is not None
+                and target_appointment.visible_from > timezone.now()
+            )
+        ):
+            return Response(
+                {"error": "目標時段已被預約或不可用"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        offer = waitlist.active_offer(target_id)
+        if offer and offer.user_id != request.user.id:
+            return Response(
+                {"error": "目標時段正保留給候補學生"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        if holds.holder(target_id) not in (None, request.user.id):
+            return Response(
+                {"error": "目標時段正被其他學生保留"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        new_reason = request.data.get("reason", old_appointment.reason)
+        changed_fields = ["user", "status", "reason", "reminded_at", "updated_at"]
+
+        old_appointment.user = None
+        old_appointment.status = AppointmentStatus.AVAILABLE
+        old_appointment.reason = None  # 清空理由
+        old_appointment.reminded_at = None
+        old_appointment.save(update_fields=changed_fields)
+
+        target_appointment.user = request.user
+        target_appointment.status = AppointmentStatus.SCHEDULED
+        target_appointment.reason = new_reason
+        target_appointment.reminded_at = None
+        target_appointment.save(update_fields=changed_fields)
+
+        if offer:
+            waitlist.accept_offer(offer)
+
+        record_transition(target_appointment, AppointmentEvent.RESCHEDULED_IN)
+        record_transition(
+            old_appointment, AppointmentEvent.RESCHEDULED_OUT, user_id=request.user.id
+        )
+
+        return old_appointment, target_appointment
+
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    def join_waitlist(self, request, pk=None):
+        """
+        加入時段候補 API
+        URL: POST /api/appointments/{id}/join_waitlist/
+        """
+        appointment = self.get_object()
+
+        if appointment.user_id == request.user.id:
+            return Response(
+                {"error": "您已預約此時段"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if appointment.date < timezone.now().date() or appointment.status not in [
+            AppointmentStatus.AVAILABLE,
+            AppointmentStatus.SCHEDULED,
+            AppointmentStatus.CONFIRMED,
+        ]:
+            return Response(
+                {"error": "此時段無法候補"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if appointment.status == AppointmentStatus.AVAILABLE and not (
+            waitlist.active_offer(appointment.pk)
+        ):
+            return Response(
+                {"error": "此時段目前可直接預約"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            with transaction.atomic():
+                entry = WaitlistEntry.objects.create(
+                    appointment=appointment, user=request.user
+                )
+        except IntegrityError:
+            return Response(
+                {"error": "您已在此時段的候補名單中"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {"status": entry.status, "position": waitlist.queue_position(entry)},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    def leave_waitlist(self, request, pk=None):
+        """
+        退出時段候補 API
+        URL: POST /api/appointments/{id}/leave_waitlist/
+        """
+        appointment = self.get_object()
+
+        with transaction.atomic():
+            entry = (
+                WaitlistEntry.objects.select_for_update()
+                .filter(
+                    appointment=appointment,
+                    user=request.user,
+                    status__in=[WaitlistStatus.WAITING, WaitlistStatus.OFFERED],
+                )
+                .first()
+            )
+            if entry is None:
+                return Response(
+                    {"error": "您不在此時段的候補名單中"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            waitlist.leave(entry)
+
+        return Response({"status": "已退出候補", "id": appointment.id})
+
     @action(detail=True, methods=["post"], permission_classes=[IsAdminUser])
     def confirm(self, request, pk=None):
         """
@@ -258,16 +723,15 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        appointment.status = AppointmentStatus.CONFIRMED
-        appointment.save()
+        try:
+            with transaction.atomic():
+                appointment.status = AppointmentStatus.CONFIRMED
+                appointment.save(expected_versions=if_match_versions(request))
+                record_transition(appointment, AppointmentEvent.CONFIRMED)
+        except Appointment.NotUpdated:
+            return precondition_failed()
 
-        print(f"DEBUG: 正在確認預約 ID: {appointment.id}")
-        if appointment.user:
-            print(
-                f"DEBUG: 學生: {appointment.user.first_name}, Email: {appointment.user.email}"
-            )
-        else:
-            print("DEBUG: 找不到學生 User 物件")
+        logger.debug("確認預約 %s (學生 %s)", appointment.id, appointment.user_id)
 
         # 發送 Email 通知學生
         if appointment.user and appointment.user.email:
@@ -281,9 +745,13 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 },
             )
         else:
-            print("DEBUG: ❌ 學生 Email 為空，跳過寄信")
+            logger.warning(
+                "學生 Email 為空，跳過寄信", extra={"appointment_id": appointment.id}
+            )
 
-        return Response(AppointmentSerializer(appointment).data)
+        return with_etag(
+            Response(AppointmentSerializer(appointment).data), appointment.version
+        )
 
     @action(detail=True, methods=["post"], permission_classes=[IsAdminUser])
     def reject(self, request, pk=None):
@@ -311,14 +779,16 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         user_name = appointment.user.first_name if appointment.user else "Student"
 
         # 更新狀態
-        appointment.status = AppointmentStatus.CANCELLED
-        appointment.rejection_reason = reason
-        appointment.save()
+        try:
+            with transaction.atomic():
+                appointment.status = AppointmentStatus.CANCELLED
+                appointment.rejection_reason = reason
+                appointment.save(expected_versions=if_match_versions(request))
+                record_transition(appointment, AppointmentEvent.REJECTED)
+        except Appointment.NotUpdated:
+            return precondition_failed()
 
-        # --- Debug 開始 ---
-        print(f"DEBUG: 拒絕預約 ID: {appointment.id}, 原因: {reason}")
-        print(f"DEBUG: 目標 Email: {user_email}")
-        # -----------------
+        logger.debug("駁回預約 %s，原因：%s", appointment.id, reason)
 
         # 發送 Email 通知
         if user_email:
@@ -333,9 +803,13 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 },
             )
         else:
-            print("DEBUG: ❌ 學生 Email 為空，跳過寄信")
+            logger.warning(
+                "學生 Email 為空，跳過寄信", extra={"appointment_id": appointment.id}
+            )
 
-        return Response(AppointmentSerializer(appointment).data)
+        return with_etag(
+            Response(AppointmentSerializer(appointment).data), appointment.version
+        )
 
     @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
     def admin_list(self, request):
@@ -346,84 +820,262 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         """
         start_date = request.query_params.get("start_date")
         end_date = request.query_params.get("end_date")
-        queryset = Appointment.objects.select_related('user').all()
-
-        # 日期範圍篩選邏輯
-        if start_date and end_date:
-            # 搜尋這段時間內的預約
-            queryset = queryset.filter(date__range=[start_date, end_date])
-        elif start_date:
-            # 如果只給開始日期
-            # 搜尋這天之後的
-            queryset = queryset.filter(date__gte=start_date)
-        elif end_date:
-            # 如果只給結束日期
-            # 搜尋這天之前的
-            queryset = queryset.filter(date__lte=end_date)
-
-        # 加入排序：日期(新到舊)、時間(早到晚)
-        queryset = queryset.order_by("-date", "time_slot")
+        host = resolve_host(request.query_params)
+
+        # 日期範圍觸及過去時，一併合併歸檔表的歷史資料
+        # 排序：日期(新到舊)、時間(早到晚)
+        queryset = archive.history(
+            lambda qs: filter_host(filter_time_of_day(qs, request.query_params), host),
+            start_date,
+            end_date,
+        )
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
-    
-    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser], url_path='export-csv')
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def changes(self, request):
+        """
+        增量同步：回傳 cursor 之後變更與移除的預約，以及下一個 cursor
+        學生只會看到自己的預約；後台看到所有預約
+        URL: GET /api/appointments/changes/?cursor=<上次回傳的 cursor>&limit=500
+        """
+        try:
+            limit = min(int(request.query_params.get("limit", 500)), 1000)
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            return Response(
+                {"error": "limit 必須是正整數"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            changed, removed, cursor, has_more = changes.changes_since(
+                request.query_params.get("cursor"),
+                user=None if request.user.is_staff else request.user,
+                limit=limit,
+            )
+        except changes.CursorExpired:
+            return Response(
+                {"error": "cursor 已過期，請重新取得完整列表"},
+                status=status.HTTP_410_GONE,
+            )
+        except ValueError:
+            return Response(
+                {"error": "無效的 cursor"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {
+                "results": AppointmentSerializer(changed, many=True).data,
+                "removed": removed,
+                "cursor": cursor,
+                "has_more": has_more,
+            }
+        )
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def statistics(self, request):
+        """
+        [Admin Only] 時段使用統計 (讀取預先累計的統計表)
+        URL: GET /api/appointments/statistics/?start_date=2026-01-01&end_date=2026-01-31&group_by=week
+        """
+        today = timezone.now().date()
+        try:
+            start_date = parse_date(request.query_params.get("start_date", "")) or (
+                today - timedelta(days=28)
+            )
+            end_date = parse_date(request.query_params.get("end_date", "")) or (
+                today + timedelta(days=28)
+            )
+        except ValueError:
+            return Response(
+                {"error": "日期格式必須為 YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        group_by = request.query_params.get("group_by", "day")
+        if group_by not in ("day", "week"):
+            return Response(
+                {"error": "group_by 只能是 day 或 week"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = stats.summary(
+            start_date,
+            end_date,
+            group_by=group_by,
+            host=resolve_host(request.query_params),
+        )
+        data.update({"start_date": start_date, "end_date": end_date})
+        return Response(data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAdminUser],
+        url_path="export-csv",
+    )
     def export_csv(self, request):
         """
         [Admin Only] Export appointments to CSV
         URL: /api/appointments/export_csv/?start_date=...&end_date=...
         """
         import csv
+
         from django.http import HttpResponse
 
         start_date = request.query_params.get("start_date")
         end_date = request.query_params.get("end_date")
-        
-        queryset = Appointment.objects.select_related('user').filter(
-            status__in=[AppointmentStatus.SCHEDULED, AppointmentStatus.CONFIRMED]
+        host = resolve_host(request.query_params)
+
+        has_range = bool(start_date and end_date)
+        queryset = archive.history(
+            lambda qs: filter_host(qs, host).filter(
+                status__in=[AppointmentStatus.SCHEDULED, AppointmentStatus.CONFIRMED]
+            ),
+            start_date if has_range else None,
+            end_date if has_range else None,
         )
 
-        if start_date and end_date:
-            queryset = queryset.filter(date__range=[start_date, end_date])
+        response = HttpResponse(content_type="text/csv")
+        response["Content-Disposition"] = (
+            f'attachment; filename="appointments_{start_date}_to_{end_date}.csv"'
+        )
+        response.write("\ufeff".encode("utf8"))
 
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="appointments_{start_date}_to_{end_date}.csv"'
-        response.write(u'\ufeff'.encode('utf8'))
-        
         writer = csv.writer(response)
-        writer.writerow(['Date', 'Time Slot', 'Student ID', 'Student Name', 'Reason', 'Status'])
+        writer.writerow(
+            ["Date", "Time Slot", "Student ID", "Student Name", "Reason", "Status"]
+        )
 
         for appt in queryset:
-            writer.writerow([
-                appt.date,
-                appt.time_slot,
-                appt.user.student_id if appt.user else "N/A",
-                appt.user.first_name if appt.user else "N/A",
-                appt.reason or "",
-                appt.status
-            ])
+            writer.writerow(
+                [
+                    appt.date,
+                    appt.time_slot,
+                    appt.user.student_id if appt.user else "N/A",
+                    appt.user.first_name if appt.user else "N/A",
+                    appt.reason or "",
+                    appt.status,
+                ]
+            )
 
         return response
 
 
 class AvailableSlotsView(APIView):
     """
-    回傳所有狀態為 AVAILABLE 的時段
+    回傳 host (預設為 default) 所有狀態為 AVAILABLE 的時段
     """
 
     permission_classes = [AllowAny]
 
     def get(self, request):
+        host = resolve_host(request.query_params, default=True)
 
-        available_appointments = Appointment.objects.filter(
-            status=AppointmentStatus.AVAILABLE
-        ).order_by("date", "time_slot")
-
-        data = {}
-        for appt in available_appointments:
-            date_str = str(appt.date)
-            if date_str not in data:
-                data[date_str] = []
-            data[date_str].append(appt.time_slot)
+        try:
+            data = availability.available_slots(
+                host.pk,
+                time_from=request.query_params.get("time_from"),
+                time_to=request.query_params.get("time_to"),
+                user_id=request.user.pk,
+            )
+        except ValueError:
+            raise serializers.ValidationError(
+                {"error": "time_from / time_to 格式必須為 HH:MM"}
+            )
 
         return Response(data)
+
+
+class HostListView(APIView):
+    """
+    可預約的 host 列表，前端以 slug 帶入 ?host= 參數
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(
+            list(Host.objects.filter(is_active=True).values("id", "slug", "name"))
+        )
+
+
+class CalendarFeedTokenView(APIView):
+    """
+    取得 / 重設個人的行事曆訂閱網址
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def _response(self, request, token):
+        return Response(
+            {
+                "token": token,
+                "url": request.build_absolute_uri(f"/api/calendar/{token}.ics"),
+            }
+        )
+
+    def get(self, request):
+        return self._response(request, ical.issue_token(request.user))
+
+    def post(self, request):
+        return self._response(request, ical.issue_token(request.user, rotate=True))
+
+
+class CalendarFeedView(View):
+    """
+    iCalendar 訂閱 (.ics)，以網址中的 token 驗證。
+    行事曆 App 輪詢時若內容未變，只讀快取就回傳 304，不查資料庫。
+    教師帶 start_date / end_date 查詢任意範圍時改為串流輸出 (含歸檔資料)。
+    """
+
+    def get(self, request, token):
+        owner = ical.resolve_owner(token)
+        if owner is None:
+            raise Http404
+
+        start_date = request.GET.get("start_date")
+        end_date = request.GET.get("end_date")
+        if owner == ical.STAFF_OWNER and (start_date or end_date):
+            return self._stream_range(start_date, end_date)
+
+        version = ical.feed_version(owner)
+        etag = f'"{owner}-{version}"'
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=version
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = HttpResponse(
+            ical.render_feed(owner), content_type="text/calendar; charset=utf-8"
+        )
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(version)
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    def _stream_range(self, start_date, end_date):
+        try:
+            appointments = archive.history(
+                lambda qs: qs.filter(status__in=ical.FEED_STATUSES),
+                start_date,
+                end_date,
+            )
+            # 串流前先取得第一筆，讓日期格式錯誤能在回應開始前被攔下
+            appointments = iter(appointments)
+            first = next(appointments, None)
+        except ValidationError:
+            return HttpResponseBadRequest("start_date / end_date 格式錯誤")
+
+        def rows():
+            if first is not None:
+                yield first
+                yield from appointments
+
+        return StreamingHttpResponse(
+            ical.iter_calendar(rows(), "SlotMate (Staff)", include_student=True),
+            content_type="text/calendar; charset=utf-8",
+        )
@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Min, OuterRef
+from django.utils import timezone
+from notify_letter.utils import send_waitlist_offer_email
+
+from . import availability
+from .enums import AppointmentStatus, WaitlistStatus
+from .models import Appointment, WaitlistEntry
+
+
+def _offer_ttl():
+    return timedelta(minutes=getattr(settings, "WAITLIST_OFFER_MINUTES", 15))
+
+
+def _active_offers(now=None):
+    return WaitlistEntry.objects.filter(
+        status=WaitlistStatus.OFFERED,
+        offer_expires_at__gt=now or timezone.now(),
+    )
+
+
+def active_offer(appointment_id):
+    """
+    回傳該時段目前有效的保留 (沒有則為 None)
+    """
+    return _active_offers().filter(appointment_id=appointment_id).first()
+
+
+def exclude_offered(queryset):
+    """
+    從時段查詢中排除正保留給候補者的時段
+    """
+    return queryset.exclude(Exists(_active_offers().filter(appointment=OuterRef("pk"))))
+
+
+def next_offer_expiry(host_id):
+    """
+    host 的時段中最早到期的有效保留時間 (沒有則為 None)
+    """
+    return (
+        _active_offers()
+        .filter(appointment__host_id=host_id)
+        .aggregate(next_expiry=Min("offer_expires_at"))["next_expiry"]
+    )
+
+
+def queue_position(entry):
+    """
+    候補者目前排在第幾位 (1 起算)
+    """
+    ahead = WaitlistEntry.objects.filter(
+        appointment_id=entry.appointment_id,
+        status=WaitlistStatus.WAITING,
+        created_at__lt=entry.created_at,
+    ).count()
+    return ahead + 1
+
+
+def offer_next(appointment):
+    """
+    時段回到 AVAILABLE 時，保留給排在最前面的候補者並寄出通知。
+    須在 transaction.atomic() 中呼叫；通知於交易提交後才寄出。
+    """
+    if appointment.status != AppointmentStatus.AVAILABLE or appointment.user_id:
+        return None
+
+    if _active_offers().filter(appointment=appointment).exists():
+        return None
+
+    entry = (
+        WaitlistEntry.objects.select_for_update(skip_locked=True)
+        .select_related("user")
+        .filter(appointment=appointment, status=WaitlistStatus.WAITING)
+        .order_by("created_at", "id")
+        .first()
+    )
+    if entry is None:
+        return None
+
+    entry.status = WaitlistStatus.OFFERED
+    entry.offer_expires_at = timezone.now() + _offer_ttl()
+    entry.save(update_fields=["status", "offer_expires_at"])
+
+    if entry.user.email:
+        context = {
+            "name": entry.user.first_name,
+            "date": appointment.date,
+            "time_slot": appointment.time_slot,
+            "expires_at": timezone.localtime(entry.offer_expires_at),
+        }
+        transaction.on_commit(
+            lambda: send_waitlist_offer_email(entry.user.email, context)
+        )
+
+    return entry
+
+
+def accept_offer(entry):
+    entry.status = WaitlistStatus.ACCEPTED
+    entry.save(update_fields=["status"])
+
+
+def leave(entry):
+    """
+    退出候補；若退出的是保留中的候補者，時段順延給下一位。
+    須在 transaction.atomic() 中呼叫。
+    """
+    was_offered = entry.status == WaitlistStatus.OFFERED
+    entry.status = WaitlistStatus.LEFT
+    entry.save(update_fields=["status"])
+
+    if was_offered:
+        availability.invalidate({entry.appointment.host_id})
+        offer_next(entry.appointment)
+
+
+def expire_offers(batch_size=500):
+    """
+    批次將逾期的保留標記為 EXPIRED，並把時段順延給下一位候補者。
+    回傳處理的保留筆數。
+    """
+    expired_total = 0
+
+    while True:
+        with transaction.atomic():
+            now = timezone.now()
+            batch = list(
+                WaitlistEntry.objects.select_for_update(skip_locked=True)
+                .filter(status=WaitlistStatus.OFFERED, offer_expires_at__lte=now)
+                .values_list("id", "appointment_id")[:batch_size]
+            )
+            if not batch:
+                break
+
+            WaitlistEntry.objects.filter(id__in=[pk for pk, _ in batch]).update(
+                status=WaitlistStatus.EXPIRED
+            )
+
+            appointment_ids = {appointment_id for _, appointment_id in batch}
+            availability.invalidate_offers(appointment_ids)
+            for appointment in Appointment.objects.select_for_update().filter(
+                id__in=appointment_ids
+            ):
+                offer_next(appointment)
+
+        expired_total += len(batch)
+        if len(batch) < batch_size:
+            break
+
+    return expired_total
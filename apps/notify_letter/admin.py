@@ -1,3 +1,11 @@
 from django.contrib import admin
+from unfold.admin import ModelAdmin
 
-# Register your models here.
+from .models import StaffDigestSubscription
+
+
+@admin.register(StaffDigestSubscription)
+class StaffDigestSubscriptionAdmin(ModelAdmin):
+    list_display = ["user", "interval_minutes", "last_sent_at"]
+    readonly_fields = ["last_event_id", "last_sent_at"]
+    raw_id_fields = ["user"]
@@ -1,5 +1,18 @@
+import atexit
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class NotifyLetterConfig(AppConfig):
     name = "notify_letter"
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from .dispatcher import dispatcher
+
+        # worker thread 於第一次寄信時才啟動；行程結束前把佇列中的信寄完
+        atexit.register(
+            dispatcher.shutdown,
+            timeout=getattr(settings, "EMAIL_DISPATCH_DRAIN_TIMEOUT", 20),
+        )
@@ -0,0 +1,156 @@
+import os
+import smtplib
+import threading
+import time
+from queue import Empty, LifoQueue
+
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend
+
+
+class SMTPConnectionPool:
+    """
+    每個行程內共用的 SMTP 連線池。
+    保留少量已完成 STARTTLS 與登入的連線，並以 semaphore 限制同時寄信的數量。
+    """
+
+    def __init__(self, size, max_idle, acquire_timeout):
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._max_idle = max_idle
+        self._acquire_timeout = acquire_timeout
+
+    def acquire(self, connect):
+        """
+        [Public] 取得一條可用連線；沒有閒置連線時呼叫 connect() 建立新連線
+        """
+        if not self._slots.acquire(timeout=self._acquire_timeout):
+            raise smtplib.SMTPException("SMTP connection pool exhausted")
+
+        try:
+            while True:
+                try:
+                    connection, last_used = self._idle.get_nowait()
+                except Empty:
+                    return connect()
+
+                if self._is_alive(connection, last_used):
+                    return connection
+                self._discard(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, broken=False):
+        """
+        [Public] 歸還連線；發生錯誤的連線直接關閉，不放回池中
+        """
+        try:
+            if broken:
+                self._discard(connection)
+            else:
+                self._idle.put((connection, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def _is_alive(self, connection, last_used):
+        """
+        [Private] 閒置太久的連線伺服器多半已經斷線，直接丟棄；其餘以 NOOP 確認
+        """
+        if time.monotonic() - last_used > self._max_idle:
+            return False
+        try:
+            return connection.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = None
+
+
+def get_pool(key):
+    """
+    依 (host, port, username) 取得連線池；fork 後的子行程會建立自己的連線池
+    """
+    global _pools_pid
+
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SMTPConnectionPool(
+                size=getattr(settings, "EMAIL_POOL_SIZE", 2),
+                max_idle=getattr(settings, "EMAIL_POOL_MAX_IDLE", 60),
+                acquire_timeout=getattr(settings, "EMAIL_POOL_ACQUIRE_TIMEOUT", 30),
+            )
+            _pools[key] = pool
+        return pool
+
+
+class PooledEmailBackend(EmailBackend):
+    """
+    以連線池取代 Django SMTP backend 每次寄信都重新連線、STARTTLS、登入的流程。
+    open() 從池中借出連線，close() 歸還而不是 QUIT，send_mail() 等 API 不需修改。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = get_pool((self.host, self.port, self.username))
+        self._broken = False
+
+    def _connect(self):
+        """
+        [Private] 沿用 Django 的流程 (連線、STARTTLS、登入) 建立一條新連線
+        """
+        try:
+            opened = super().open()
+        finally:
+            connection, self.connection = self.connection, None
+
+        if not opened:
+            if connection is not None:
+                connection.close()
+            raise smtplib.SMTPException("Unable to open SMTP connection")
+        return connection
+
+    def open(self):
+        if self.connection:
+            return False
+
+        try:
+            self.connection = self._pool.acquire(self._connect)
+        except (smtplib.SMTPException, OSError):
+            if not self.fail_silently:
+                raise
+            return None
+
+        self._broken = False
+        return True
+
+    def close(self):
+        if self.connection is None:
+            return
+
+        connection, self.connection = self.connection, None
+        self._pool.release(connection, broken=self._broken)
+
+    def _send(self, email_message):
+        try:
+            return super()._send(email_message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self._broken = True
+            raise
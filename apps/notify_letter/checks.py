@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def check_email_credentials(app_configs, **kwargs):
+    """
+    未設定 SMTP 密碼時提出警告 (取代原本 import settings 時的 print)
+    """
+    if settings.EMAIL_HOST_PASSWORD:
+        return []
+
+    return [
+        Warning(
+            "未偵測到 EMAIL_HOST_PASSWORD 環境變數，郵件功能可能無法正常運作。",
+            id="notify_letter.W001",
+        )
+    ]
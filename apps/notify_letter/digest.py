@@ -0,0 +1,170 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Max, Min
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import StaffDigestSubscription, StaffNotificationEvent
+
+logger = logging.getLogger(__name__)
+
+# 已寄給所有教師的事件保留幾天後刪除
+EVENT_RETENTION = timedelta(days=7)
+
+
+def record_staff_event(event, summary, appointment_id=None):
+    """
+    記錄一筆要彙整給教師的事件，須與狀態變更在同一個交易中呼叫
+    """
+    StaffNotificationEvent.objects.create(
+        event=event, summary=summary[:255], appointment_id=appointment_id
+    )
+
+
+def _ensure_subscriptions():
+    """
+    [Private] 替尚未設定的教師建立預設訂閱，從目前最新的事件開始計算
+    """
+    missing = get_user_model().objects.filter(
+        is_staff=True, is_active=True, digest_subscription__isnull=True
+    )
+    latest_id = StaffNotificationEvent.objects.aggregate(latest=Max("id"))["latest"]
+    StaffDigestSubscription.objects.bulk_create(
+        [
+            StaffDigestSubscription(user=user, last_event_id=latest_id or 0)
+            for user in missing
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _due_subscriptions(now):
+    subscriptions = (
+        StaffDigestSubscription.objects.select_related("user")
+        .filter(interval_minutes__gt=0, user__is_active=True, user__is_staff=True)
+        .exclude(user__email="")
+    )
+    return [
+        subscription
+        for subscription in subscriptions
+        if subscription.last_sent_at is None
+        or now - subscription.last_sent_at
+        >= timedelta(minutes=subscription.interval_minutes)
+    ]
+
+
+def _claim(subscription, latest_id, now):
+    """
+    [Private] 寄送前以條件式 UPDATE 把教師的寄送進度推進到 latest_id。
+    只有進度仍與讀到時相同才會成功，重疊執行的排程不會重複寄出同一份摘要。
+    """
+    return (
+        StaffDigestSubscription.objects.filter(
+            pk=subscription.pk,
+            last_event_id=subscription.last_event_id,
+            last_sent_at=subscription.last_sent_at,
+        ).update(last_event_id=latest_id, last_sent_at=now)
+        == 1
+    )
+
+
+def _unclaim(subscription, latest_id, now):
+    """
+    [Private] 寄送失敗時把進度還原成認領前的狀態，下一輪重寄
+    """
+    StaffDigestSubscription.objects.filter(
+        pk=subscription.pk, last_event_id=latest_id, last_sent_at=now
+    ).update(
+        last_event_id=subscription.last_event_id,
+        last_sent_at=subscription.last_sent_at,
+    )
+
+
+def send_due_digests():
+    """
+    寄出到期的教師摘要信，回傳寄出的封數。
+    寄送進度相同的教師共用同一次範本渲染，所有信件透過同一條 SMTP 連線逐封送出；
+    每位教師寄送前先認領進度，寄送失敗的教師 (與其後尚未寄出的) 會還原進度，下一輪重寄。
+    """
+    _ensure_subscriptions()
+
+    now = timezone.now()
+    latest_id = StaffNotificationEvent.objects.aggregate(latest=Max("id"))["latest"]
+    if latest_id is None:
+        return 0
+
+    groups = defaultdict(list)
+    for subscription in _due_subscriptions(now):
+        if subscription.last_event_id < latest_id:
+            groups[subscription.last_event_id].append(subscription)
+
+    messages = []
+    for last_event_id, subscriptions in groups.items():
+        events = list(
+            StaffNotificationEvent.objects.filter(
+                id__gt=last_event_id, id__lte=latest_id
+            ).order_by("id")
+        )
+        if not events:
+            continue
+
+        html_message = render_to_string(
+            "emails/staff_digest.html",
+            {"events": events, "count": len(events), "generated_at": now},
+        )
+        plain_message = strip_tags(html_message)
+        subject = f"[SlotMate] {len(events)} appointment updates"
+
+        for subscription in subscriptions:
+            message = EmailMultiAlternatives(
+                subject=subject,
+                body=plain_message,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[subscription.user.email],
+            )
+            message.attach_alternative(html_message, "text/html")
+            messages.append((subscription, message))
+
+    claimed = [
+        (subscription, message)
+        for subscription, message in messages
+        if _claim(subscription, latest_id, now)
+    ]
+    if not claimed:
+        return 0
+
+    sent = delivered = 0
+    try:
+        with get_connection(fail_silently=False) as connection:
+            for _, message in claimed:
+                sent += connection.send_messages([message])
+                delivered += 1
+    except Exception:
+        unsent = claimed[delivered:]
+        logger.exception("教師摘要信寄送失敗", extra={"unsent": len(unsent)})
+        for subscription, _ in unsent:
+            _unclaim(subscription, latest_id, now)
+
+    _prune(now)
+    return sent
+
+
+def _prune(now):
+    """
+    [Private] 刪除所有教師都已寄送過、且超過保留期限的事件
+    """
+    oldest_cursor = StaffDigestSubscription.objects.filter(
+        interval_minutes__gt=0
+    ).aggregate(oldest=Min("last_event_id"))["oldest"]
+    if oldest_cursor is None:
+        return
+
+    StaffNotificationEvent.objects.filter(
+        id__lte=oldest_cursor, created_at__lt=now - EVENT_RETENTION
+    ).delete()
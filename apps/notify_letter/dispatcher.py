@@ -0,0 +1,112 @@
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_STOP = object()
+
+
+class EmailDispatcher:
+    """
+    行程內的背景寄信器：有界佇列 + 固定數量的 worker thread。
+    佇列滿時 submit() 等待 put_timeout 秒後回傳 False，由呼叫端改為同步寄送 (背壓)。
+    """
+
+    def __init__(self, workers, queue_size, put_timeout):
+        self._workers = workers
+        self._put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._counters = {"queued": 0, "sent": 0, "failed": 0, "overflow": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def start(self):
+        """
+        [Public] 啟動 worker；fork 後的子行程會重新建立自己的佇列與 thread
+        """
+        with self._lock:
+            if self._pid == os.getpid() and self._threads:
+                return
+
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._threads = [
+                threading.Thread(
+                    target=self._run, name=f"email-dispatcher-{i}", daemon=True
+                )
+                for i in range(self._workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def submit(self, job):
+        """
+        [Public] 排入一個寄信工作 (回傳是否寄送成功的 callable)
+        """
+        self.start()
+        try:
+            self._queue.put(job, timeout=self._put_timeout)
+        except queue.Full:
+            self._count("overflow")
+            return False
+
+        self._count("queued")
+        return True
+
+    def shutdown(self, timeout=None):
+        """
+        [Public] 停止接收新工作，等待佇列中的信件寄完 (最多 timeout 秒)
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+            if self._pid != os.getpid():
+                return
+
+        deadline = time.monotonic() + timeout if timeout else None
+        for _ in threads:
+            try:
+                self._queue.put(_STOP, timeout=self._remaining(deadline))
+            except queue.Full:
+                break
+
+        for thread in threads:
+            thread.join(self._remaining(deadline))
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "pending": self._queue.qsize()}
+
+    @staticmethod
+    def _remaining(deadline):
+        if deadline is None:
+            return None
+        return max(deadline - time.monotonic(), 0)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                self._count("sent" if job() else "failed")
+            except Exception:
+                self._count("failed")
+            finally:
+                self._queue.task_done()
+                # 寄信範本可能讀取資料庫，避免 thread 持有逾時的連線
+                close_old_connections()
+
+
+dispatcher = EmailDispatcher(
+    workers=getattr(settings, "EMAIL_DISPATCH_WORKERS", 2),
+    queue_size=getattr(settings, "EMAIL_DISPATCH_QUEUE_SIZE", 100),
+    put_timeout=getattr(settings, "EMAIL_DISPATCH_PUT_TIMEOUT", 2),
+)
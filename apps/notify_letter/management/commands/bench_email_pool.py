@@ -0,0 +1,86 @@
+import asyncio
+import socket
+import time
+
+from django.core import mail
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from notify_letter import backends
+
+BACKENDS = {
+    "每次重新連線": "django.core.mail.backends.smtp.EmailBackend",
+    "連線池": "notify_letter.backends.PooledEmailBackend",
+}
+
+
+class HandshakeDelayHandler:
+    """
+    在 EHLO 時等待 delay 秒，模擬連到遠端 SMTP 時連線、STARTTLS 與登入的往返時間
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        await asyncio.sleep(self.delay)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+
+class Command(BaseCommand):
+    help = "以本機 SMTP 伺服器 (aiosmtpd) 比較每封信重新連線與連線池的寄送時間"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=200)
+        parser.add_argument(
+            "--handshake-ms",
+            type=float,
+            default=150,
+            help="模擬每條新連線的握手時間 (毫秒)",
+        )
+
+    def handle(self, *args, **kwargs):
+        # aiosmtpd 是 dev 相依套件，只有量測時才需要
+        try:
+            from aiosmtpd.controller import Controller
+        except ImportError:
+            raise CommandError("需要安裝 aiosmtpd")
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        handler = HandshakeDelayHandler(kwargs["handshake_ms"] / 1000)
+        controller = Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        try:
+            for label, backend in BACKENDS.items():
+                backends._pools.clear()
+                with override_settings(
+                    EMAIL_BACKEND=backend,
+                    EMAIL_HOST="127.0.0.1",
+                    EMAIL_PORT=port,
+                    EMAIL_USE_TLS=False,
+                    EMAIL_HOST_USER="",
+                    EMAIL_HOST_PASSWORD="",
+                ):
+                    started = time.perf_counter()
+                    for i in range(kwargs["count"]):
+                        mail.send_mail(
+                            "bench",
+                            "body",
+                            "noreply@example.com",
+                            [f"s{i}@example.com"],
+                        )
+                    elapsed = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"{label}: {kwargs['count']} 封 {elapsed:.2f} s "
+                    f"({elapsed / kwargs['count'] * 1000:.1f} ms/封)"
+                )
+        finally:
+            controller.stop()
+            backends._pools.clear()
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from notify_letter.digest import send_due_digests
+
+
+class Command(BaseCommand):
+    help = "寄出到期的教師預約摘要信"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            type=int,
+            default=0,
+            help="每隔幾秒重複執行一次 (0 表示只執行一次，適合 cron)",
+        )
+
+    def handle(self, *args, **kwargs):
+        interval = kwargs["loop"]
+
+        while True:
+            sent = send_due_digests()
+            self.stdout.write(self.style.SUCCESS(f"寄出 {sent} 封摘要信"))
+
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,91 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:37
+
+import django.db.models.deletion
+import notify_letter.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StaffNotificationEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("event", models.CharField(max_length=20, verbose_name="事件")),
+                (
+                    "appointment_id",
+                    models.BigIntegerField(
+                        blank=True, null=True, verbose_name="預約 ID"
+                    ),
+                ),
+                ("summary", models.CharField(max_length=255, verbose_name="摘要")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "教師通知事件",
+                "verbose_name_plural": "教師通知事件",
+                "ordering": ["id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="StaffDigestSubscription",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "interval_minutes",
+                    models.PositiveIntegerField(
+                        default=notify_letter.models.default_digest_interval,
+                        help_text="例如 15 為每 15 分鐘、1440 為每日一次；0 表示不寄送",
+                        verbose_name="彙整間隔 (分鐘)",
+                    ),
+                ),
+                (
+                    "last_event_id",
+                    models.BigIntegerField(default=0, verbose_name="已寄送至事件 ID"),
+                ),
+                (
+                    "last_sent_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="上次寄送時間"
+                    ),
+                ),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="digest_subscription",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="教師",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "教師摘要信設定",
+                "verbose_name_plural": "教師摘要信設定",
+            },
+        ),
+    ]
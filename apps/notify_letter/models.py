@@ -1,3 +1,52 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+def default_digest_interval():
+    return getattr(settings, "STAFF_DIGEST_INTERVAL_MINUTES", 15)
+
+
+class StaffNotificationEvent(models.Model):
+    """
+    待彙整進教師摘要信的事件，只保留一行摘要文字，不保存渲染後的內容
+    """
+
+    event = models.CharField("事件", max_length=20)
+    appointment_id = models.BigIntegerField("預約 ID", null=True, blank=True)
+    summary = models.CharField("摘要", max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "教師通知事件"
+        verbose_name_plural = "教師通知事件"
+        ordering = ["id"]
+
+    def __str__(self):
+        return self.summary
+
+
+class StaffDigestSubscription(models.Model):
+    """
+    教師的摘要信設定與寄送進度 (last_event_id 之後的事件尚未寄出)
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="digest_subscription",
+        verbose_name="教師",
+    )
+    interval_minutes = models.PositiveIntegerField(
+        "彙整間隔 (分鐘)",
+        default=default_digest_interval,
+        help_text="例如 15 為每 15 分鐘、1440 為每日一次；0 表示不寄送",
+    )
+    last_event_id = models.BigIntegerField("已寄送至事件 ID", default=0)
+    last_sent_at = models.DateTimeField("上次寄送時間", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "教師摘要信設定"
+        verbose_name_plural = "教師摘要信設定"
+
+    def __str__(self):
+        return f"{self.user} ({self.interval_minutes} 分鐘)"
@@ -1,3 +1,218 @@
-from django.test import TestCase
+import socket
+import threading
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.test import SimpleTestCase, TestCase, override_settings
+from users.models import User
+
+from . import backends, digest, utils
+from .dispatcher import EmailDispatcher
+from .models import StaffDigestSubscription, StaffNotificationEvent
+
+
+class EmailDispatcherTests(SimpleTestCase):
+    def test_jobs_run_in_background_and_are_counted(self):
+        dispatcher = EmailDispatcher(workers=2, queue_size=10, put_timeout=1)
+        results = iter([True, False])
+        for _ in range(2):
+            self.assertTrue(dispatcher.submit(lambda: next(results)))
+
+        dispatcher.shutdown(timeout=5)
+        self.assertEqual(
+            dispatcher.stats(),
+            {"queued": 2, "sent": 1, "failed": 1, "overflow": 0, "pending": 0},
+        )
+
+    def test_full_queue_reports_overflow(self):
+        release = threading.Event()
+        dispatcher = EmailDispatcher(workers=1, queue_size=1, put_timeout=0.01)
+        self.addCleanup(dispatcher.shutdown, timeout=5)
+        self.addCleanup(release.set)
+
+        started = threading.Event()
+
+        def blocking_job():
+            started.set()
+            return release.wait(5)
+
+        self.assertTrue(dispatcher.submit(blocking_job))
+        started.wait(5)
+        # worker 忙碌中：第一個工作佔住佇列唯一的位置，第二個等待逾時後回報溢出
+        self.assertTrue(dispatcher.submit(lambda: True))
+        self.assertFalse(dispatcher.submit(lambda: True))
+        self.assertEqual(dispatcher.stats()["overflow"], 1)
+
+
+class SendEmailCoreTests(TestCase):
+    def _send(self):
+        return utils.send_notification_email(
+            "s1@example.com",
+            "subject",
+            {"date": "2026-01-01", "time_slot": "10:00-10:30"},
+        )
+
+    @override_settings(EMAIL_ASYNC_DISPATCH=False)
+    def test_sync_mode_sends_immediately(self):
+        self.assertTrue(self._send())
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_ASYNC_DISPATCH=True)
+    def test_async_mode_dispatches_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertTrue(self._send())
+        # 交易提交前不寄出也不排入佇列
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+        with mock.patch.object(utils.dispatcher, "submit", return_value=False):
+            # 佇列已滿時改由呼叫端同步寄送
+            callbacks[0]()
+        self.assertEqual(len(mail.outbox), 1)
+
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:  # dev 相依套件，未安裝時略過 SMTP 測試
+    Controller = None
+
+
+def make_staff(student_id):
+    return User.objects.create_user(
+        student_id=student_id,
+        password="Pw!12345678",
+        email=f"{student_id}@example.com",
+        grade=1,
+        department="CS",
+        is_staff=True,
+    )
+
+
+class StaffDigestTests(TestCase):
+    def setUp(self):
+        for student_id in ("T1", "T2"):
+            StaffDigestSubscription.objects.create(
+                user=make_staff(student_id), interval_minutes=15
+            )
+        digest.record_staff_event("BOOKED", "S1 booked 10:00-10:30")
+
+    def test_overlapping_runs_send_each_digest_once(self):
+        # 兩個排程在任一方認領之前讀到相同的寄送進度
+        stale = list(StaffDigestSubscription.objects.all())
+        self.assertEqual(digest.send_due_digests(), 2)
+
+        with mock.patch.object(digest, "_due_subscriptions", return_value=stale):
+            self.assertEqual(digest.send_due_digests(), 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failed_send_keeps_cursor_of_unsent_subscriptions(self):
+        send = "django.core.mail.backends.locmem.EmailBackend.send_messages"
+        with mock.patch(send, side_effect=[1, OSError("connection lost")]):
+            self.assertEqual(digest.send_due_digests(), 1)
+
+        cursors = list(
+            StaffDigestSubscription.objects.order_by("user__student_id").values_list(
+                "last_event_id", flat=True
+            )
+        )
+        latest_id = StaffNotificationEvent.objects.get().pk
+        self.assertEqual(cursors, [latest_id, 0])
+
+        # 未寄出的教師在下一輪補寄，已寄出的不重寄
+        self.assertEqual(digest.send_due_digests(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    """
+    記錄收到的信件與 SMTP 連線數 (每條連線一次 EHLO)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.recipients = []
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        with self.lock:
+            self.connections += 1
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        with self.lock:
+            self.recipients.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+@unittest.skipIf(Controller is None, "需要 aiosmtpd")
+class PooledEmailBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.handler = RecordingHandler()
+        self.port = free_port()
+        self._start_server()
+        self.addCleanup(lambda: self.controller.stop())
+        # 每個測試使用新的連線池，避免沿用上一個測試的連線
+        backends._pools.clear()
+        self.addCleanup(backends._pools.clear)
+
+        settings = override_settings(
+            EMAIL_BACKEND="notify_letter.backends.PooledEmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.port,
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_POOL_SIZE=2,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def _start_server(self):
+        self.controller = Controller(self.handler, hostname="127.0.0.1", port=self.port)
+        self.controller.start()
+
+    def _send(self, recipient):
+        return mail.send_mail("subject", "body", "noreply@example.com", [recipient])
+
+    def test_sequential_sends_reuse_one_connection(self):
+        for i in range(5):
+            self.assertEqual(self._send(f"s{i}@example.com"), 1)
+
+        self.assertEqual(len(self.handler.recipients), 5)
+        self.assertEqual(self.handler.connections, 1)
+
+    def test_stale_connection_is_replaced(self):
+        self._send("first@example.com")
+        # 伺服器關閉閒置連線後，NOOP 檢查失敗，改建新連線而不是寄信失敗
+        self.controller.stop()
+        self._start_server()
+
+        self.assertEqual(self._send("second@example.com"), 1)
+        self.assertEqual(
+            self.handler.recipients, ["first@example.com", "second@example.com"]
+        )
+        self.assertEqual(self.handler.connections, 2)
+
+    def test_concurrent_sends_are_bounded_by_pool_size(self):
+        results = []
+
+        def send(i):
+            results.append(self._send(f"c{i}@example.com"))
+
+        threads = [threading.Thread(target=send, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [1] * 8)
+        self.assertEqual(len(self.handler.recipients), 8)
+        self.assertLessEqual(self.handler.connections, 2)
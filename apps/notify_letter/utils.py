@@ -1,12 +1,18 @@
 import datetime
+import logging
 
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
+from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 
+from .dispatcher import dispatcher
 
-def _send_email_core(recipient_email, subject, context, template_name):
+logger = logging.getLogger(__name__)
+
+
+def _deliver(recipient_email, subject, context, template_name):
     try:
         html_message = render_to_string(template_name, context)
         plain_message = strip_tags(html_message)
@@ -20,11 +26,33 @@ def _send_email_core(recipient_email, subject, context, template_name):
             fail_silently=False,
         )
         return True
-    except Exception as e:
-        print(f"SMTP_ERROR: {str(e)}")
+    except Exception:
+        logger.exception(
+            "寄信失敗", extra={"recipient": recipient_email, "template": template_name}
+        )
         return False
 
 
+def _send_email_core(recipient_email, subject, context, template_name):
+    """
+    於交易提交後把寄信工作交給背景 dispatcher，請求不需等待 SMTP 往返。
+    關閉 EMAIL_ASYNC_DISPATCH 或佇列已滿時，改在目前的 thread 同步寄送。
+    """
+
+    def job():
+        return _deliver(recipient_email, subject, context, template_name)
+
+    if not getattr(settings, "EMAIL_ASYNC_DISPATCH", False):
+        return job()
+
+    def dispatch():
+        if not dispatcher.submit(job):
+            job()
+
+    transaction.on_commit(dispatch)
+    return True
+
+
 def send_notification_email(
     recipient_email, subject, context, template_name="emails/appointment_confirmed.html"
 ):
@@ -60,6 +88,7 @@ def send_password_reset_email(recipient_email, context):
         template_name="emails/password_reset.html",
     )
 
+
 def send_password_reset_confirmation_email(recipient_email, context):
     subject = "[SlotMate] Password Reset Successful"
     return _send_email_core(
@@ -67,4 +96,39 @@ def send_password_reset_confirmation_email(recipient_email, context):
         subject=subject,
         context=context,
         template_name="emails/password_reset_confirmation.html",
-    )
\ No newline at end of file
+    )
+
+
+def send_waitlist_offer_email(recipient_email, context):
+    subject = f"[SlotMate] Waitlisted Slot Available - {context.get('date')}"
+    return _send_email_core(
+        recipient_email=recipient_email,
+        subject=subject,
+        context=context,
+        template_name="emails/waitlist_offer.html",
+    )
+
+
+def send_reminder_emails(reminders):
+    """
+    寄出預約提醒，reminders 為 (收件者, context) 列表，回傳寄出封數。
+    不經過背景佇列：所有信件建立好後透過同一條 SMTP 連線一次送出。
+    """
+    messages = []
+    for recipient_email, context in reminders:
+        html_message = render_to_string("emails/appointment_confirmed.html", context)
+        message = EmailMultiAlternatives(
+            subject=(
+                f"[SlotMate] Appointment Reminder - "
+                f"{context.get('date')} {context.get('time_slot')}"
+            ),
+            body=strip_tags(html_message),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[recipient_email],
+        )
+        message.attach_alternative(html_message, "text/html")
+        messages.append(message)
+
+    if not messages:
+        return 0
+    return get_connection(fail_silently=False).send_messages(messages)
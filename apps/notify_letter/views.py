@@ -1,3 +1,16 @@
-from django.shortcuts import render
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from .dispatcher import dispatcher
+
+
+class EmailDispatcherStatsView(APIView):
+    """
+    [Admin Only] 目前 worker 行程的背景寄信計數 (queued / sent / failed / overflow)
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(dispatcher.stats())
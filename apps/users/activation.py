@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils import timezone
+
+from utils import user_cache
+
+from .hashing import hash_passwords
+from .models import DefaultPasswordJob
+
+CHECK_TOKEN_SALT = "users.activation.check"
+
+
+def issue_check_token(user):
+    """
+    CheckStudentView 驗證學號後發給前端的短效簽章，啟用時憑此略過重複查詢
+    """
+    return signing.dumps(
+        {"id": user.pk, "sid": user.student_id}, salt=CHECK_TOKEN_SALT, compress=True
+    )
+
+
+def read_check_token(token, student_id):
+    """
+    驗證簽章、有效期限與學號，成功時回傳 user id，否則為 None
+    """
+    try:
+        payload = signing.loads(
+            token,
+            salt=CHECK_TOKEN_SALT,
+            max_age=settings.ACTIVATION_CHECK_TOKEN_MAX_AGE,
+        )
+    except signing.BadSignature:
+        return None
+
+    if payload.get("sid") != student_id:
+        return None
+    return payload.get("id")
+
+
+def activate(user_id, password_hash, email=None):
+    """
+    以單一條件式 UPDATE 啟用帳號，只有尚未啟用 (is_first_login=True) 的帳號會被更新。
+    回傳是否成功；同時送出的重複請求只有一個會成功。
+    """
+    updates = {"password": password_hash, "is_first_login": False, "is_active": True}
+    if email:
+        updates["email"] = email
+
+    updated = (
+        get_user_model()
+        .objects.filter(pk=user_id, is_first_login=True)
+        .update(**updates)
+        == 1
+    )
+    if updated:
+        user_cache.invalidate({user_id})
+    return updated
+
+
+def bulk_set_default_passwords(users, first_login):
+    """
+    將帳號密碼重設為學號 (預設密碼)，雜湊以行程池平行計算，回傳更新筆數。
+    first_login=True 為重設 (學生需重新啟用)，False 為直接啟用。
+    """
+    users = list(users)
+    hashes = hash_passwords(user.student_id for user in users)
+    for user, password_hash in zip(users, hashes):
+        user.password = password_hash
+        user.is_first_login = first_login
+        user.is_active = True
+
+    get_user_model().objects.bulk_update(
+        users, ["password", "is_first_login", "is_active"], batch_size=500
+    )
+    user_cache.invalidate(user.pk for user in users)
+    return len(users)
+
+
+def enqueue_default_passwords(users, first_login):
+    """
+    後台批次操作只建立待辦工作 (不在 web worker 內計算雜湊)，回傳排入的帳號數
+    """
+    user_ids = list(users.values_list("pk", flat=True))
+    if user_ids:
+        DefaultPasswordJob.objects.create(user_ids=user_ids, first_login=first_login)
+    return len(user_ids)
+
+
+def run_default_password_jobs():
+    """
+    執行待辦的預設密碼工作，回傳更新的帳號數。
+    每個工作先以條件式 UPDATE 認領，同時執行的指令不會重複處理同一個工作。
+    """
+    updated = 0
+    pending = DefaultPasswordJob.objects.filter(claimed_at__isnull=True).order_by("pk")
+    for job in pending:
+        claimed = DefaultPasswordJob.objects.filter(
+            pk=job.pk, claimed_at__isnull=True
+        ).update(claimed_at=timezone.now())
+        if not claimed:
+            continue
+
+        users = get_user_model().objects.filter(pk__in=job.user_ids)
+        try:
+            count = bulk_set_default_passwords(users, first_login=job.first_login)
+        except Exception as exc:
+            # 還原認領，下一次執行重試
+            job.claimed_at = None
+            job.log_message = f"錯誤: {exc}"
+            job.save(update_fields=["claimed_at", "log_message"])
+            raise
+        job.processed = True
+        job.log_message = f"已更新 {count} 個帳號"
+        job.save(update_fields=["processed", "log_message"])
+        updated += count
+    return updated
@@ -6,7 +6,10 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from unfold.admin import ModelAdmin
 
-from .models import AllowedStudent, StudentImport, User
+from utils import user_cache
+
+from .activation import enqueue_default_passwords
+from .models import AllowedStudent, DefaultPasswordJob, StudentImport, User
 
 
 @admin.register(AllowedStudent)
@@ -49,6 +52,26 @@ class UserAdmin(BaseUserAdmin):
     )
 
     ordering = ["student_id"]
+    actions = ["activate_with_default_password", "reset_to_first_login"]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        user_cache.invalidate({obj.pk})
+
+    # 雜湊很耗 CPU，後台只排入工作，由 apply_default_passwords 指令在 web worker 之外執行
+    @admin.action(description="啟用帳號 (密碼設為學號)")
+    def activate_with_default_password(self, request, queryset):
+        count = enqueue_default_passwords(queryset, first_login=False)
+        self.message_user(
+            request, f"已排入 {count} 個帳號的啟用作業，完成後密碼為學號。"
+        )
+
+    @admin.action(description="重設密碼為學號並要求重新啟用")
+    def reset_to_first_login(self, request, queryset):
+        count = enqueue_default_passwords(queryset, first_login=True)
+        self.message_user(
+            request, f"已排入 {count} 個帳號的重設作業，完成後學生需重新啟用。"
+        )
 
 
 @admin.register(StudentImport)
@@ -114,3 +137,19 @@ class StudentImportAdmin(admin.ModelAdmin):
             messages.error(request, f"匯入失敗: {str(e)}")
             obj.log_message = f"錯誤: {str(e)}"
             obj.save()
+
+
+@admin.register(DefaultPasswordJob)
+class DefaultPasswordJobAdmin(admin.ModelAdmin):
+    list_display = ["created_at", "first_login", "claimed_at", "processed"]
+    readonly_fields = [
+        "user_ids",
+        "first_login",
+        "created_at",
+        "claimed_at",
+        "processed",
+        "log_message",
+    ]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,21 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .revocation import is_revoked
+
+
+class RevocationAwareJWTAuthentication(JWTAuthentication):
+    """
+    在簽章驗證之外檢查撤銷清單，登出或改密碼後舊的 access token 立即失效
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token):
+            raise InvalidToken(
+                {
+                    "detail": "Token has been revoked",
+                    "code": "token_not_valid",
+                }
+            )
+        return token
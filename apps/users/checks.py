@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from utils.cache import is_shared
+
+
+@register()
+def check_revocation_store(app_configs, **kwargs):
+    """
+    token 撤銷清單必須存在所有 worker 共用的快取，否則登出只在處理請求的 worker 生效
+    """
+    alias = getattr(settings, "SHARED_CACHE_ALIAS", "shared")
+    if alias in settings.CACHES and is_shared(alias):
+        return []
+
+    return [
+        Error(
+            f"CACHES[{alias!r}] 未設定或不是跨行程共用的快取，"
+            "撤銷的 token 在其他 worker 仍然有效。",
+            hint="設定 REDIS_URL，或使用 DatabaseCache 並執行 createcachetable。",
+            id="users.E001",
+        )
+    ]
@@ -0,0 +1,25 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+# 少量密碼直接在目前行程計算，省下啟動行程池的成本
+POOL_THRESHOLD = 16
+
+
+def hash_passwords(passwords):
+    """
+    批次計算密碼雜湊。雜湊刻意設計得很慢 (PBKDF2 數十萬次迭代)，
+    大量帳號時分散到多個行程平行計算；此模組不載入 model，子行程不需要 django.setup()。
+    """
+    passwords = list(passwords)
+    workers = getattr(settings, "PASSWORD_HASH_WORKERS", None) or os.cpu_count() or 1
+    if len(passwords) < POOL_THRESHOLD or workers <= 1:
+        return [make_password(password) for password in passwords]
+
+    # 只有 apply_default_passwords 指令會用到行程池，web worker 啟動時不載入
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(make_password, passwords, chunksize=chunksize))
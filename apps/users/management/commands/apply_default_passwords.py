@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from users.activation import run_default_password_jobs
+
+
+class Command(BaseCommand):
+    help = "執行後台排入的「密碼設為學號」批次作業 (雜湊以行程池平行計算，不佔用 web worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            type=int,
+            default=0,
+            help="每隔幾秒重複執行一次 (0 表示只執行一次，適合 cron)",
+        )
+
+    def handle(self, *args, **kwargs):
+        interval = kwargs["loop"]
+
+        while True:
+            updated = run_default_password_jobs()
+            self.stdout.write(self.style.SUCCESS(f"已更新 {updated} 個帳號的密碼"))
+
+            if not interval:
+                break
+            time.sleep(interval)
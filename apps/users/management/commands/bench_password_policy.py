@@ -0,0 +1,88 @@
+import re
+import timeit
+
+from django.contrib.auth.password_validation import (
+    CommonPasswordValidator,
+    MinimumLengthValidator,
+    NumericPasswordValidator,
+)
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from users.validator import _load_common_passwords, default_policy
+
+SAMPLES = [
+    "password",
+    "Abcdef12!",
+    "Tr0ub4dor&3",
+    "correcthorsebatterystaple",
+    "Sl0tM@te-2026",
+    "aaa111BBB",
+    "qwerty123",
+    "N9#kx!Lp2@",
+]
+
+LEGACY_SEQUENCES = [chr(c) + chr(c + 1) + chr(c + 2) for c in range(97, 121)] + [
+    str(d) + str(d + 1) + str(d + 2) for d in range(1, 8)
+]
+
+
+def legacy_strength(value):
+    """
+    舊版 PasswordStrengthValidator 的檢查流程 (逐條 regex，遇到第一個錯誤即停止)
+    """
+    if len(value) < 8:
+        return False
+    for pattern in (r"[A-Z]", r"[a-z]", r"\d", r'[!@#$%^&*(),.?":{}|<>]'):
+        if not re.search(pattern, value):
+            return False
+    if re.search(r"(.)\1\1", value):
+        return False
+    return not any(seq in value.lower() for seq in LEGACY_SEQUENCES)
+
+
+def legacy_django_validators(validators, value):
+    for validator in validators:
+        try:
+            validator.validate(value)
+        except ValidationError:
+            pass
+
+
+class Command(BaseCommand):
+    help = "比較密碼規則引擎與舊版驗證流程的效能"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=20000)
+
+    def handle(self, *args, **kwargs):
+        number = kwargs["number"]
+
+        load = timeit.timeit(_load_common_passwords, number=5) / 5
+        self.stdout.write(f"載入常見密碼清單: {load * 1000:.1f} ms (每個行程一次)")
+
+        validators = [
+            MinimumLengthValidator(),
+            CommonPasswordValidator(),
+            NumericPasswordValidator(),
+        ]
+
+        def legacy():
+            for value in SAMPLES:
+                legacy_strength(value)
+                legacy_django_validators(validators, value)
+
+        def policy():
+            for value in SAMPLES:
+                default_policy.violations(value)
+
+        def batch():
+            default_policy.validate_many(SAMPLES)
+
+        for name, func in (
+            ("舊版 (strength + Django 驗證器)", legacy),
+            ("PasswordPolicy.violations", policy),
+            ("PasswordPolicy.validate_many", batch),
+        ):
+            elapsed = timeit.timeit(func, number=number)
+            per_call = elapsed / (number * len(SAMPLES)) * 1e6
+            self.stdout.write(f"{name}: {per_call:.2f} µs / 密碼")
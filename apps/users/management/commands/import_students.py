@@ -1,17 +1,21 @@
 import csv
 import os
+
 from django.core.management.base import BaseCommand
 from users.models import User
-from tqdm import tqdm
+
 
 class Command(BaseCommand):
     help = "匯入學生帳號"
 
     def add_arguments(self, parser):
-        parser.add_argument('csv_file', type=str)
+        parser.add_argument("csv_file", type=str)
 
     def handle(self, *args, **kwargs):
-        file_path = kwargs['csv_file']
+        # tqdm 只有匯入時用得到，避免其他管理指令啟動時一併載入
+        from tqdm import tqdm
+
+        file_path = kwargs["csv_file"]
 
         if not os.path.exists(file_path):
             self.stdout.write(self.style.ERROR(f"找不到檔案: {file_path}"))
@@ -46,8 +50,8 @@ class Command(BaseCommand):
                     department=dept,
                     grade=calculated_grade,
                     is_first_login=True,
-                    is_active=True
+                    is_active=True,
                 )
                 count += 1
 
-        self.stdout.write(self.style.SUCCESS(f"成功匯入 {count} 筆學生資料！"))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(f"成功匯入 {count} 筆學生資料！"))
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_studentimport"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DefaultPasswordJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_ids", models.JSONField(verbose_name="帳號")),
+                (
+                    "first_login",
+                    models.BooleanField(default=False, verbose_name="需重新啟用"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="建立時間"),
+                ),
+                (
+                    "claimed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="開始處理時間"
+                    ),
+                ),
+                (
+                    "processed",
+                    models.BooleanField(default=False, verbose_name="已處理"),
+                ),
+                ("log_message", models.TextField(blank=True, verbose_name="處理紀錄")),
+            ],
+            options={
+                "verbose_name": "預設密碼批次作業",
+                "verbose_name_plural": "預設密碼批次作業",
+            },
+        ),
+    ]
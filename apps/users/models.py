@@ -75,3 +75,26 @@ class StudentImport(models.Model):
 
     def __str__(self):
         return f"匯入紀錄 - {self.uploaded_at.strftime('%Y-%m-%d %H:%M')}"
+
+
+class DefaultPasswordJob(models.Model):
+    """
+    後台「密碼設為學號」批次操作的待辦工作。雜湊很耗 CPU，
+    由 apply_default_passwords 指令在 web worker 之外執行
+    """
+
+    user_ids = models.JSONField(verbose_name="帳號")
+    first_login = models.BooleanField(default=False, verbose_name="需重新啟用")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
+    claimed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="開始處理時間"
+    )
+    processed = models.BooleanField(default=False, verbose_name="已處理")
+    log_message = models.TextField(blank=True, verbose_name="處理紀錄")
+
+    class Meta:
+        verbose_name = "預設密碼批次作業"
+        verbose_name_plural = "預設密碼批次作業"
+
+    def __str__(self):
+        return f"預設密碼批次作業 - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
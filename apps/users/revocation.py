@@ -0,0 +1,94 @@
+import time
+
+from django.core.cache.backends.db import DatabaseCache
+from rest_framework_simplejwt.settings import api_settings
+
+from utils.cache import shared_cache
+
+# 共用快取是資料庫時，每個已驗證的請求都要多一次 SELECT 檢查撤銷。
+# 未撤銷的結果在本行程內保留 LOCAL_TTL 秒：同一行程內的撤銷立即生效，
+# 其他 worker 撤銷的 token 最多延遲 LOCAL_TTL 秒才會被拒絕
+LOCAL_TTL = 5
+LOCAL_MAX_ENTRIES = 10_000
+
+# jti -> 未撤銷結果的到期時間 (time.monotonic)
+_not_revoked = {}
+
+
+def _jti_key(jti):
+    return f"jwt_revoked_{jti}"
+
+
+def _watermark_key(user_id):
+    return f"jwt_revoked_before_{user_id}"
+
+
+def revoke_token(token):
+    """
+    撤銷單一 token (登出目前裝置)，保留到 token 原本的到期時間為止。
+    撤銷紀錄存在跨 worker 共用的快取 (見 users.E001 檢查)
+    """
+    _not_revoked.pop(token[api_settings.JTI_CLAIM], None)
+    remaining = int(token["exp"] - time.time())
+    if remaining > 0:
+        shared_cache().set(
+            _jti_key(token[api_settings.JTI_CLAIM]), 1, timeout=remaining + 1
+        )
+
+
+def revoke_user(user_id):
+    """
+    讓使用者在此之前簽發的所有 token 失效 (修改、重設密碼時)。
+    以秒為單位，同一秒內簽發的 token 視為之後簽發，避免剛重新登入就被登出。
+    """
+    # 本行程的快取不記錄 jti 屬於哪個使用者，整個清空 (修改密碼不常發生)
+    _not_revoked.clear()
+    lifetime = max(
+        api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME
+    )
+    shared_cache().set(
+        _watermark_key(user_id),
+        int(time.time()),
+        timeout=int(lifetime.total_seconds()) + 1,
+    )
+
+
+def _local_cache_enabled():
+    """
+    [Private] 只在共用快取是資料庫時保留本行程的未撤銷結果；Redis 查詢夠便宜，不需要
+    """
+    return isinstance(shared_cache(), DatabaseCache)
+
+
+def _check(token):
+    """
+    [Private] 以一次 get_many 同時檢查 jti 與使用者的撤銷時間點
+    """
+    jti_key = _jti_key(token.get(api_settings.JTI_CLAIM))
+    watermark_key = _watermark_key(token.get(api_settings.USER_ID_CLAIM))
+    found = shared_cache().get_many([jti_key, watermark_key])
+
+    if jti_key in found:
+        return True
+    watermark = found.get(watermark_key)
+    return watermark is not None and token.get("iat", 0) < watermark
+
+
+def is_revoked(token):
+    """
+    token 是否已被撤銷；共用快取是資料庫時，未撤銷的結果在本行程內保留 LOCAL_TTL 秒
+    """
+    if not _local_cache_enabled():
+        return _check(token)
+
+    jti = token.get(api_settings.JTI_CLAIM)
+    now = time.monotonic()
+    if _not_revoked.get(jti, 0) > now:
+        return False
+
+    revoked = _check(token)
+    if not revoked:
+        if len(_not_revoked) >= LOCAL_MAX_ENTRIES:
+            _not_revoked.clear()
+        _not_revoked[jti] = now + LOCAL_TTL
+    return revoked
@@ -1,15 +1,22 @@
 import re
 
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.tokens import default_token_generator
 from django.core.cache import cache
 from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_decode
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
 from users.validator import PasswordStrengthValidator
 
+from .activation import activate, read_check_token
 from .models import AllowedStudent, User
+from .revocation import is_revoked
 
 
 class TokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -29,6 +36,13 @@ class TokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
+class RevocationAwareTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        if is_revoked(self.token_class(attrs["refresh"])):
+            raise InvalidToken("Token has been revoked")
+        return super().validate(attrs)
+
+
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
     new_password = serializers.CharField(required=True, min_length=8)
@@ -44,7 +58,6 @@ class ChangePasswordSerializer(serializers.Serializer):
         user = self.context["request"].user
         new_pwd = data.get("new_password")
         confirm_pwd = data.get("confirm_password")
-        print(new_pwd, confirm_pwd)
 
         if new_pwd != confirm_pwd:
             raise serializers.ValidationError(
@@ -106,6 +119,7 @@ class CheckStudentSerializer(serializers.Serializer):
                 "This account has already been activated. Please log in directly."
             )
 
+        self.user = user
         return value
 
 
@@ -123,32 +137,43 @@ class ActivateAccountSerializer(serializers.Serializer):
         },
     )
 
-    def validate_student_id(self, value):
-        try:
-            user = User.objects.get(student_id=value)
-        except User.DoesNotExist:
-            raise serializers.ValidationError("ID not found.")
-
-        if not getattr(user, "is_first_login", True):
-            raise serializers.ValidationError("Account already activated.")
+    check_token = serializers.CharField(required=False, allow_blank=True)
 
-        return value
+    def validate(self, attrs):
+        student_id = attrs["student_id"]
+
+        # 持有 CheckStudentView 發出的有效憑證時不必再查一次資料庫
+        user_id = read_check_token(attrs.pop("check_token", ""), student_id)
+        if user_id is None:
+            row = (
+                User.objects.filter(student_id=student_id)
+                .values_list("pk", "is_first_login")
+                .first()
+            )
+            if row is None:
+                raise serializers.ValidationError({"student_id": "ID not found."})
+            user_id, is_first_login = row
+            if not is_first_login:
+                raise serializers.ValidationError(
+                    {"student_id": "Account already activated."}
+                )
+
+        attrs["user_id"] = user_id
+        return attrs
 
     def save(self):
-        student_id = self.validated_data["student_id"]
-        password = self.validated_data["password"]
-        email = self.validated_data.get("email")
-
-        user = User.objects.get(student_id=student_id)
-        user.set_password(password)
-
-        if email:
-            user.email = email
-
-        user.is_first_login = False
-        user.is_active = True
-        user.save()
-        return user
+        # 雜湊計算耗時，在寫入之前完成，寫入本身只有一個條件式 UPDATE
+        password_hash = make_password(self.validated_data["password"])
+        activated = activate(
+            self.validated_data["user_id"],
+            password_hash,
+            email=self.validated_data.get("email"),
+        )
+        if not activated:
+            raise serializers.ValidationError(
+                {"student_id": ["Account already activated."]}
+            )
+        return activated
 
 
 class ForgotPasswordSerializer(serializers.Serializer):
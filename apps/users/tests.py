@@ -1,3 +1,285 @@
-from django.test import TestCase
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from utils import db_router, user_cache
+from utils.cache import shared_cache
+
+from . import revocation
+from .activation import enqueue_default_passwords, run_default_password_jobs
+from .checks import check_revocation_store
+from .models import DefaultPasswordJob, User
+from .revocation import is_revoked, revoke_token, revoke_user
+from .validator import (
+    PasswordPolicy,
+    PasswordPolicyValidator,
+    PasswordStrengthValidator,
+)
+
+
+class PasswordPolicyTests(SimpleTestCase):
+    def setUp(self):
+        self.policy = PasswordPolicy(common_passwords=frozenset({"p@ssw0rd!"}))
+
+    def test_reports_every_violation_at_once(self):
+        self.assertEqual(
+            self.policy.violations("abc"),
+            [
+                "Password must be at least 8 characters long.",
+                "Password must contain at least one uppercase letter.",
+                "Password must contain at least one number.",
+                "Password must contain at least one symbol.",
+                "Avoid using sequential characters (e.g., 'abc', '123').",
+            ],
+        )
+
+    def test_strong_password_passes(self):
+        self.assertEqual(self.policy.violations("N9#kx!Lp2@"), [])
+
+    def test_repeats_and_runs_match_the_previous_rules(self):
+        # 與舊規則相同：連續字元只看 a-z 與 1-9，跨大小寫也算
+        cases = {
+            "Xq7!aaaZ": True,
+            "Xq7!aZaZ": False,
+            "Xq7!aBcZ": True,
+            "Xq7!789Z": True,
+            "Xq7!901Z": False,
+            "Xq7!0-12": False,
+            "Xq7!xyz{": True,
+        }
+        for password, flagged in cases.items():
+            with self.subTest(password=password):
+                errors = self.policy.violations(password)
+                self.assertEqual(
+                    any("repeating" in e or "sequential" in e for e in errors),
+                    flagged,
+                )
+
+    def test_common_password_and_student_id(self):
+        class Student:
+            student_id = "S1234"
+
+        self.assertIn(
+            "This password is too common.", self.policy.violations("P@ssw0rd!")
+        )
+        self.assertIn(
+            "Password cannot contain your Student ID.",
+            self.policy.violations("Xq7!S1234z", user=Student()),
+        )
+
+    def test_validate_many_returns_only_failures(self):
+        results = self.policy.validate_many(["N9#kx!Lp2@", "short", "Zx8!mQ2#"])
+        self.assertEqual(list(results), [1])
+
+    def test_validators_raise_with_all_messages(self):
+        with self.assertRaises(ValidationError) as django_error:
+            PasswordPolicyValidator().validate("password")
+        self.assertGreater(len(django_error.exception.messages), 1)
+
+        with self.assertRaises(serializers.ValidationError) as drf_error:
+            PasswordStrengthValidator()("password")
+        self.assertEqual(
+            len(drf_error.exception.detail), len(django_error.exception.messages)
+        )
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = db_router.PrimaryReplicaRouter()
+
+    def _with_replica(self):
+        return mock.patch.object(
+            db_router, "replica_aliases", return_value=["replica_1"]
+        )
+
+    def _request(self, method, user_id=None):
+        """
+        經過 middleware 送出請求，回傳 view 執行時讀取會走的資料庫
+        """
+        seen = {}
+
+        def get_response(request):
+            seen["db"] = self.router.db_for_read(User)
+            return HttpResponse()
+
+        headers = {}
+        if user_id is not None:
+            token = AccessToken()
+            token[api_settings.USER_ID_CLAIM] = user_id
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        request = getattr(RequestFactory(), method)("/api/appointments/", **headers)
+        request.user = AnonymousUser()
+
+        db_router.ReplicaStickinessMiddleware(get_response)(request)
+        return seen["db"]
+
+    def test_reads_use_replica_unless_pinned_or_in_transaction(self):
+        with self._with_replica():
+            self.assertEqual(self.router.db_for_read(User), "replica_1")
+            with db_router.use_primary():
+                self.assertEqual(self.router.db_for_read(User), "default")
+            with transaction.atomic():
+                self.assertEqual(self.router.db_for_read(User), "default")
+            self.assertEqual(self.router.db_for_write(User), "default")
+            self.assertFalse(self.router.allow_migrate("replica_1", "users"))
+
+    def test_writer_reads_own_writes_from_primary(self):
+        with self._with_replica():
+            self.assertEqual(self._request("post", user_id=7), "default")
+            self.assertEqual(self._request("get", user_id=7), "default")
+            self.assertEqual(self._request("get", user_id=8), "replica_1")
+            self.assertEqual(self._request("get"), "replica_1")
+
+    def test_middleware_is_noop_without_replicas(self):
+        self.assertEqual(self._request("post", user_id=17), "default")
+        with self._with_replica():
+            self.assertEqual(self._request("get", user_id=17), "replica_1")
+
+
+LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+
+
+class RevocationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            student_id="S1",
+            password="Pw!12345678",
+            email="s1@example.com",
+            grade=1,
+            department="CS",
+        )
+        revocation._not_revoked.clear()
+        self.addCleanup(revocation._not_revoked.clear)
+
+    def test_revoked_token_survives_default_cache_clear(self):
+        token = AccessToken.for_user(self.user)
+        revoke_token(token)
+
+        # 預設快取被淘汰或在另一個 worker 時，撤銷紀錄仍然存在
+        caches["default"].clear()
+        self.assertTrue(is_revoked(token))
+
+    def test_revoke_user_invalidates_earlier_tokens(self):
+        token = AccessToken.for_user(self.user)
+        token["iat"] = int(token["iat"]) - 10
+        revoke_user(self.user.pk)
+        self.assertTrue(is_revoked(token))
+
+    def test_unrevoked_result_is_kept_in_process_briefly(self):
+        token = AccessToken.for_user(self.user)
+        self.assertFalse(is_revoked(token))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(is_revoked(token))
+        self.assertEqual(len(queries), 0)
+
+        # 其他 worker 撤銷：LOCAL_TTL 秒後才生效
+        shared_cache().set(revocation._jti_key(token[api_settings.JTI_CLAIM]), 1)
+        self.assertFalse(is_revoked(token))
+        later = time.monotonic() + revocation.LOCAL_TTL
+        with mock.patch.object(revocation.time, "monotonic", return_value=later):
+            self.assertTrue(is_revoked(token))
+
+    def test_revocation_in_this_process_applies_at_once(self):
+        token = AccessToken.for_user(self.user)
+        token["iat"] = int(token["iat"]) - 10
+        self.assertFalse(is_revoked(token))
+        revoke_user(self.user.pk)
+        self.assertTrue(is_revoked(token))
+
+        other = AccessToken.for_user(self.user)
+        self.assertFalse(is_revoked(other))
+        revoke_token(other)
+        self.assertTrue(is_revoked(other))
+
+    def test_check_passes_with_shared_store(self):
+        self.assertEqual(check_revocation_store(None), [])
+
+    def test_check_fails_with_process_local_store(self):
+        with override_settings(CACHES={"default": LOCMEM, "shared": LOCMEM}):
+            errors = check_revocation_store(None)
+        self.assertEqual([error.id for error in errors], ["users.E001"])
+
+
+DATABASE_CACHE = {
+    "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+    "LOCATION": "shared_cache",
+}
+
+
+class ProfileCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            student_id="S1",
+            password="Pw!12345678",
+            email="s1@example.com",
+            grade=1,
+            department="CS",
+        )
+        self.token = str(AccessToken.for_user(self.user))
+
+    def _profile(self):
+        return self.client.get(
+            "/api/auth/profile/", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+
+    def test_process_local_cache_is_not_used(self):
+        self.assertEqual(self._profile().json()["department"], "CS")
+        # 其他 worker 的更新不會遞增這個行程的版本號，locmem 下不能快取
+        User.objects.filter(pk=self.user.pk).update(department="EE")
+        self.assertEqual(self._profile().json()["department"], "EE")
+
+    def test_shared_cache_serves_until_invalidated(self):
+        with override_settings(
+            CACHES={"default": DATABASE_CACHE, "shared": DATABASE_CACHE}
+        ):
+            self.assertEqual(self._profile().json()["department"], "CS")
+            User.objects.filter(pk=self.user.pk).update(department="EE")
+            self.assertEqual(self._profile().json()["department"], "CS")
+
+            with self.captureOnCommitCallbacks(execute=True):
+                user_cache.invalidate({self.user.pk})
+            self.assertEqual(self._profile().json()["department"], "EE")
+
+
+class DefaultPasswordJobTests(TestCase):
+    def setUp(self):
+        for student_id in ("D1", "D2"):
+            User.objects.create_user(
+                student_id=student_id,
+                password="Pw!12345678",
+                email=f"{student_id}@example.com",
+                grade=1,
+                department="CS",
+                is_first_login=False,
+            )
+
+    def test_enqueue_defers_hashing_to_the_job_runner(self):
+        queued = enqueue_default_passwords(User.objects.all(), first_login=True)
+        self.assertEqual(queued, 2)
+        self.assertTrue(User.objects.get(student_id="D1").check_password("Pw!12345678"))
+
+        self.assertEqual(run_default_password_jobs(), 2)
+        user = User.objects.get(student_id="D1")
+        self.assertTrue(user.check_password("D1"))
+        self.assertTrue(user.is_first_login)
+
+        # 已認領的工作不會再執行
+        self.assertEqual(run_default_password_jobs(), 0)
+        self.assertTrue(DefaultPasswordJob.objects.get().processed)
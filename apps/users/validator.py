@@ -1,84 +1,151 @@
-import re
-
+from django.contrib.auth.password_validation import CommonPasswordValidator
+from django.core.exceptions import ValidationError
 from rest_framework import serializers
 
+MIN_LENGTH = 8
+SYMBOLS = frozenset('!@#$%^&*(),.?":{}|<>')
 
-class PasswordStrengthValidator:
-    def __call__(self, value, user=None):
-        # 長度檢查
-        if len(value) < 8:
-            raise serializers.ValidationError(
-                "Password must be at least 8 characters long."
-            )
 
-        # 混合字元檢查
-        if not re.search(r"[A-Z]", value):
-            raise serializers.ValidationError(
-                "Password must contain at least one uppercase letter."
-            )
-        if not re.search(r"[a-z]", value):
-            raise serializers.ValidationError(
-                "Password must contain at least one lowercase letter."
-            )
-        if not re.search(r"\d", value):
-            raise serializers.ValidationError(
-                "Password must contain at least one number."
-            )
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', value):
-            raise serializers.ValidationError(
-                "Password must contain at least one symbol."
-            )
+def _load_common_passwords():
+    """
+    [Private] 讀取 Django 內建的常見密碼清單 (約 2 萬筆，gzip 壓縮)。
+    於 import 時載入一次，搭配 gunicorn preload_app 由 fork 出的 worker 共用。
+    """
+    return frozenset(CommonPasswordValidator().passwords)
 
-        if user:
-            # 避免包含帳號
-            if user.student_id and user.student_id in value:
-                raise serializers.ValidationError(
-                    "Password cannot contain your Student ID."
-                )
-
-        # 避免重複字元
-        if re.search(r"(.)\1\1", value):
-            raise serializers.ValidationError(
-                "Avoid using repeating characters (e.g., 'aaa')."
-            )
 
-        # 避免連續字元
-        sequences = [
-            "abc",
-            "bcd",
-            "cde",
-            "def",
-            "efg",
-            "fgh",
-            "ghi",
-            "hij",
-            "ijk",
-            "jkl",
-            "klm",
-            "lmn",
-            "mno",
-            "nop",
-            "opq",
-            "pqr",
-            "qrs",
-            "rst",
-            "stu",
-            "tuv",
-            "uvw",
-            "vwx",
-            "wxy",
-            "xyz",
-            "123",
-            "234",
-            "345",
-            "456",
-            "567",
-            "678",
-            "789",
-        ]
-        if any(seq in value.lower() for seq in sequences):
-            raise serializers.ValidationError(
-                "Avoid using sequential characters (e.g., 'abc', '123')."
+COMMON_PASSWORDS = _load_common_passwords()
+
+
+def _in_sequence_range(code):
+    """
+    [Private] 參與連續字元檢查的字元：英文字母 a-z 與數字 1-9 (與舊規則一致，不含 0)
+    """
+    return 97 <= code <= 122 or 49 <= code <= 57
+
+
+class PasswordPolicy:
+    """
+    密碼規則引擎：只掃描密碼一次就檢查所有字元規則，並回傳全部違規項目，
+    讓使用者一次看到所有需要修正的地方。
+    """
+
+    def __init__(self, min_length=MIN_LENGTH, common_passwords=COMMON_PASSWORDS):
+        self.min_length = min_length
+        self.common_passwords = common_passwords
+
+    def violations(self, password, user=None):
+        """
+        [Public] 回傳違規訊息列表，符合規則時為空列表
+        """
+        has_upper = has_lower = has_digit = has_symbol = False
+        has_repeat = has_sequence = False
+        lowered = password.lower()
+        # 前兩個字元與其遞增長度，用來在同一次掃描中判斷重複 (aaa) 與連續 (abc)
+        prev = prev2 = None
+        run = 0
+
+        for char, low in zip(password, lowered):
+            if "A" <= char <= "Z":
+                has_upper = True
+            elif "a" <= char <= "z":
+                has_lower = True
+            elif "0" <= char <= "9":
+                has_digit = True
+            elif char in SYMBOLS:
+                has_symbol = True
+
+            if char == prev == prev2:
+                has_repeat = True
+            prev2, prev = prev, char
+
+            code = ord(low)
+            if run and code == last_code + 1 and _in_sequence_range(code):
+                run += 1
+                if run >= 3:
+                    has_sequence = True
+            else:
+                run = 1 if _in_sequence_range(code) else 0
+            last_code = code
+
+        errors = []
+        if len(password) < self.min_length:
+            errors.append(
+                f"Password must be at least {self.min_length} characters long."
             )
+        if not has_upper:
+            errors.append("Password must contain at least one uppercase letter.")
+        if not has_lower:
+            errors.append("Password must contain at least one lowercase letter.")
+        if not has_digit:
+            errors.append("Password must contain at least one number.")
+        if not has_symbol:
+            errors.append("Password must contain at least one symbol.")
+        if user is not None and user.student_id and user.student_id in password:
+            errors.append("Password cannot contain your Student ID.")
+        if has_repeat:
+            errors.append("Avoid using repeating characters (e.g., 'aaa').")
+        if has_sequence:
+            errors.append("Avoid using sequential characters (e.g., 'abc', '123').")
+        if lowered.strip() in self.common_passwords:
+            errors.append("This password is too common.")
+
+        return errors
+
+    def validate(self, password, user=None):
+        """
+        [Public] 有違規時以 ValidationError 一次回報所有訊息
+        """
+        errors = self.violations(password, user=user)
+        if errors:
+            raise ValidationError(errors, code="password_policy")
+
+    def validate_many(self, passwords, users=None):
+        """
+        [Public] 批次檢查 (例如匯入名單時)，回傳 {索引: 違規訊息列表}，只包含不合格的項目
+        """
+        users = users or [None] * len(passwords)
+        results = {}
+        for index, (password, user) in enumerate(zip(passwords, users)):
+            errors = self.violations(password, user=user)
+            if errors:
+                results[index] = errors
+        return results
+
+
+default_policy = PasswordPolicy()
+
 
+class PasswordPolicyValidator:
+    """
+    供 AUTH_PASSWORD_VALIDATORS 使用，取代 MinimumLength / Common / Numeric 三個驗證器
+    """
+
+    def __init__(self, min_length=MIN_LENGTH):
+        self.policy = (
+            default_policy
+            if min_length == MIN_LENGTH
+            else PasswordPolicy(min_length=min_length)
+        )
+
+    def validate(self, password, user=None):
+        self.policy.validate(password, user=user)
+
+    def get_help_text(self):
+        return (
+            f"Your password must be at least {self.policy.min_length} characters "
+            "long, mix upper and lower case letters, numbers and symbols, and "
+            "must not be a common password."
+        )
+
+
+class PasswordStrengthValidator:
+    """
+    DRF serializer 使用的版本，違規時拋出 serializers.ValidationError
+    """
+
+    def __call__(self, value, user=None):
+        errors = default_policy.violations(value, user=user)
+        if errors:
+            raise serializers.ValidationError(errors)
         return value
@@ -1,4 +1,5 @@
 import datetime
+import logging
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -8,16 +9,24 @@ from django.core.cache import cache
 from django.utils import timezone
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
-from notify_letter.utils import send_password_reset_email, send_password_reset_confirmation_email
+from notify_letter.utils import (
+    send_password_reset_confirmation_email,
+    send_password_reset_email,
+)
 from rest_framework import generics, status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from utils import user_cache
 from utils.network import get_client_ip
 from utils.otp_generator import OTPGenerator
 
+from .activation import issue_check_token
+from .revocation import revoke_token, revoke_user
 from .serializers import (
     ActivateAccountSerializer,
     ChangePasswordSerializer,
@@ -27,6 +36,8 @@ from .serializers import (
     TokenObtainPairSerializer,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = TokenObtainPairSerializer
@@ -45,6 +56,7 @@ class MyTokenObtainPairView(TokenObtainPairView):
                     user.last_login_ip = get_client_ip(request)
                     update_last_login(None, user)
                     user.save()
+                    user_cache.invalidate({user.pk})
                 except User.DoesNotExist:
                     pass
         return response
@@ -61,6 +73,7 @@ class CheckStudentView(APIView):
                 {
                     "message": "Student ID verified, please set your password",
                     "valid": True,
+                    "check_token": issue_check_token(serializer.user),
                 },
                 status=status.HTTP_200_OK,
             )
@@ -91,6 +104,15 @@ class LogoutView(APIView):
         try:
             request.user.last_logout = timezone.now()
             request.user.save()
+
+            # 撤銷目前的 access token，以及一併送來的 refresh token
+            revoke_token(request.auth)
+            refresh = request.data.get("refresh")
+            if refresh:
+                try:
+                    revoke_token(RefreshToken(refresh))
+                except TokenError:
+                    pass
             return Response({"message": "成功登出"}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -110,6 +132,8 @@ class ChangePasswordView(generics.UpdateAPIView):
             user.set_password(serializer.validated_data["new_password"])
             user.is_first_login = False
             user.save()
+            revoke_user(user.pk)
+            user_cache.invalidate({user.pk})
 
             return Response(
                 {"message": "密碼修改成功，請重新登入"}, status=status.HTTP_200_OK
@@ -122,23 +146,26 @@ class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        return Response(
-            {
-                "student_id": user.student_id,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "email": user.email,
-                "department": user.department,
-                "grade": user.grade,
-                "is_staff": user.is_staff,
-                "is_superuser": user.is_superuser,
-                "last_login": user.last_login,
-                "last_login_ip": getattr(user, "last_login_ip", None),
-            },
-            status=status.HTTP_200_OK,
+        return user_cache.cached_json(
+            "profile", request.user.pk, lambda: self._profile(request.user.pk)
         )
 
+    def _profile(self, user_id):
+        # 驗證時載入的使用者可能來自副本，重新讀取一次
+        user = get_user_model().objects.get(pk=user_id)
+        return {
+            "student_id": user.student_id,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "email": user.email,
+            "department": user.department,
+            "grade": user.grade,
+            "is_staff": user.is_staff,
+            "is_superuser": user.is_superuser,
+            "last_login": user.last_login,
+            "last_login_ip": getattr(user, "last_login_ip", None),
+        }
+
 
 class ForgotPasswordView(APIView):
     permission_classes = [AllowAny]
@@ -193,11 +220,13 @@ class PasswordResetConfirmView(APIView):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            
+            revoke_user(user.pk)
+            user_cache.invalidate({user.pk})
+
             frontend_url = getattr(
                 settings, "FRONTEND_URL", "https://slotmate.yueswater.com"
             )
-            
+
             try:
                 send_password_reset_confirmation_email(
                     user.email,
@@ -206,14 +235,14 @@ class PasswordResetConfirmView(APIView):
                         "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                         "login_url": f"{frontend_url}/login",
                         "year": datetime.datetime.now().year,
-                    }
+                    },
                 )
-            except Exception as e:
-                print(f"SMTP Confirmation Error: {e}")
+            except Exception:
+                logger.exception("密碼重設確認信寄送失敗", extra={"user_id": user.pk})
 
             return Response(
                 {"message": "Password has been reset successfully."},
                 status=status.HTTP_200_OK,
             )
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
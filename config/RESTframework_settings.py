@@ -1,5 +1,5 @@
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.RevocationAwareJWTAuthentication",
     ),
 }
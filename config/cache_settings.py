@@ -0,0 +1,35 @@
+import os
+
+# OTP 等資料需要在多個 gunicorn worker 之間共用；
+# 設定 REDIS_URL 時使用 Redis (需安裝 redis 套件)，否則退回單一行程的記憶體快取
+REDIS_URL = os.environ.get("REDIS_URL")
+
+# 必須在所有 worker 之間共用、且不能被隨意淘汰的資料 (token 撤銷、時段保留、讀寫一致標記、
+# 可預約快照的版本號、冪等鍵的結果)。
+# 沒有 Redis 時改存資料庫 (部署時需執行 createcachetable)；記憶體快取
+# 每個 worker 各一份，且超過 MAX_ENTRIES 時會隨機淘汰，不能用於這類資料
+SHARED_CACHE_ALIAS = "shared"
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        },
+        SHARED_CACHE_ALIAS: {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "shared",
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        SHARED_CACHE_ALIAS: {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "shared_cache",
+            "OPTIONS": {"MAX_ENTRIES": 1_000_000},
+        },
+    }
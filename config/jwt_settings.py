@@ -3,4 +3,6 @@ from datetime import timedelta
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),  # Access Token 活 60 分鐘
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),  # Refresh Token 活 1 天
+    # 換發前檢查撤銷清單 (登出、改密碼後舊的 refresh token 不能再用)
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.RevocationAwareTokenRefreshSerializer",
 }
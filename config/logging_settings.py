@@ -0,0 +1,45 @@
+import os
+
+# 一般紀錄的等級；各 app 的 DEBUG 紀錄另外依 LOG_DEBUG_SAMPLE_RATE 抽樣保留
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+APP_LOG_LEVEL = os.environ.get("APP_LOG_LEVEL", "DEBUG")
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", 0.01))
+
+# 請求 thread 只寫入佇列 (queue handler)，由背景 listener 輸出 JSON 到 stdout；
+# 抽樣與請求資訊在請求 thread 上處理，遮蔽機密在寫出前處理
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "sampling": {
+            "()": "utils.log.SamplingFilter",
+            "rate": LOG_DEBUG_SAMPLE_RATE,
+        },
+        "request_context": {"()": "utils.log.RequestContextFilter"},
+        "redact": {"()": "utils.log.RedactionFilter"},
+    },
+    "formatters": {
+        "json": {"()": "utils.log.JsonFormatter"},
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "formatter": "json",
+            "filters": ["redact"],
+        },
+        "queue": {
+            "class": "utils.log.QueueHandler",
+            "handlers": ["console"],
+            "respect_handler_level": True,
+            "filters": ["sampling", "request_context"],
+        },
+    },
+    "root": {"handlers": ["queue"], "level": LOG_LEVEL},
+    "loggers": {
+        "django": {"handlers": ["queue"], "level": LOG_LEVEL, "propagate": False},
+        **{
+            name: {"level": APP_LOG_LEVEL}
+            for name in ("appointments", "users", "notify_letter", "utils")
+        },
+    },
+}
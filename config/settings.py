@@ -15,7 +15,6 @@ import sys
 from pathlib import Path
 
 import dj_database_url
-from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -23,11 +22,18 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Add the 'apps' directory to the Python path
 sys.path.insert(0, os.path.join(BASE_DIR, "apps"))
 
-load_dotenv(os.path.join(BASE_DIR, ".env"))
+# 正式環境由平台注入環境變數，沒有 .env 時不必載入 dotenv
+if os.path.exists(os.path.join(BASE_DIR, ".env")):
+    from dotenv import load_dotenv
 
+    load_dotenv(os.path.join(BASE_DIR, ".env"))
+
+from .cache_settings import CACHES, SHARED_CACHE_ALIAS
 from .jwt_settings import SIMPLE_JWT
+from .logging_settings import LOGGING
 from .RESTframework_settings import REST_FRAMEWORK
 from .smtp_settings import *  # noqa
+from .sqlite_settings import SQLITE_OPTIONS
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
@@ -49,6 +55,42 @@ ALLOWED_HOSTS = [
 # Frontend URL
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:5173")
 
+# 候補保留時間 (分鐘)
+WAITLIST_OFFER_MINUTES = int(os.environ.get("WAITLIST_OFFER_MINUTES", 15))
+
+# 學生填寫預約事由期間暫時保留時段的秒數 (只存在快取)
+SLOT_HOLD_SECONDS = int(os.environ.get("SLOT_HOLD_SECONDS", 90))
+
+# 預約開始前幾小時寄出提醒 (send_reminders 指令)
+REMINDER_LEAD_HOURS = float(os.environ.get("REMINDER_LEAD_HOURS", 24))
+
+# 排定開放的時段在開放前幾秒預熱可預約快照 (warm_releases 指令)
+RELEASE_WARM_LEAD_SECONDS = int(os.environ.get("RELEASE_WARM_LEAD_SECONDS", 10))
+
+# 預約排隊：預約類 API 每秒請求數超過門檻時開啟排隊，同時放行幾位預約，
+# 以及流量降下來多久後關閉排隊。放行數預設比 gunicorn worker 少一個，
+# 保留處理量給排隊回應與其他 API。計數存在預設快取，需設定 REDIS_URL；
+# 預設快取是 locmem (每個 worker 各一份) 時不啟用排隊
+ADMISSION_RATE_THRESHOLD = int(os.environ.get("ADMISSION_RATE_THRESHOLD", 20))
+ADMISSION_CONCURRENCY = int(
+    os.environ.get(
+        "ADMISSION_CONCURRENCY",
+        max(1, int(os.environ.get("WEB_CONCURRENCY", 2)) - 1),
+    )
+)
+ADMISSION_COOLDOWN_SECONDS = int(os.environ.get("ADMISSION_COOLDOWN_SECONDS", 30))
+
+# 增量同步：略過最近幾秒內尚未確定提交的變更，以及移除紀錄保留天數
+CHANGES_SETTLE_SECONDS = int(os.environ.get("CHANGES_SETTLE_SECONDS", 2))
+CHANGES_TOMBSTONE_RETENTION_DAYS = int(
+    os.environ.get("CHANGES_TOMBSTONE_RETENTION_DAYS", 7)
+)
+
+# 冪等鍵 (Idempotency-Key) 回應保留時間 (秒)
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", 60 * 60 * 24))
+# 相同冪等鍵的請求仍在處理中時，重複請求等待結果的最長秒數，逾時回傳 409 + Retry-After
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", 2))
+
 # Custom user model
 AUTH_USER_MODEL = "users.User"
 
@@ -71,6 +113,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utils.log.RequestLogMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -78,6 +121,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "utils.db_router.ReplicaStickinessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -128,6 +172,24 @@ DATABASES = {
     )
 }
 
+# 唯讀副本：以逗號分隔的資料庫 URL，格式與 DATABASE_URL 相同
+for index, url in enumerate(
+    filter(None, os.environ.get("DATABASE_REPLICA_URLS", "").split(","))
+):
+    DATABASES[f"replica_{index}"] = {
+        **dj_database_url.parse(url.strip(), conn_max_age=600),
+        "TEST": {"MIRROR": "default"},
+    }
+
+for database in DATABASES.values():
+    if database["ENGINE"] == "django.db.backends.sqlite3":
+        database["OPTIONS"] = {**SQLITE_OPTIONS, **database.get("OPTIONS", {})}
+
+DATABASE_ROUTERS = ["utils.db_router.PrimaryReplicaRouter"]
+
+# 使用者寫入後，讀取維持走主資料庫的秒數 (需大於副本的複製延遲)
+READ_YOUR_WRITES_SECONDS = int(os.environ.get("READ_YOUR_WRITES_SECONDS", 10))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -136,17 +198,20 @@ AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
     },
+    # 長度、字元組成、常見密碼等規則由單一引擎一次檢查
     {
-        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
-    },
-    {
-        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
-    },
-    {
-        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+        "NAME": "users.validator.PasswordPolicyValidator",
     },
 ]
 
+# 確認學號後發出的啟用憑證有效秒數
+ACTIVATION_CHECK_TOKEN_MAX_AGE = int(
+    os.environ.get("ACTIVATION_CHECK_TOKEN_MAX_AGE", 600)
+)
+
+# 後台批次重設密碼時計算雜湊的行程數 (預設為 CPU 數)
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 0)) or None
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -172,3 +237,12 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 # https://django-rest-framework-simplejwt.readthedocs.io/en/latest/settings.html
 REST_FRAMEWORK = REST_FRAMEWORK
 SIMPLE_JWT = SIMPLE_JWT
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+CACHES = CACHES
+SHARED_CACHE_ALIAS = SHARED_CACHE_ALIAS
+
+# Logging
+# https://docs.djangoproject.com/en/6.0/topics/logging/
+LOGGING = LOGGING
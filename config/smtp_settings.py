@@ -1,7 +1,7 @@
 import os
 
 # SMTP 郵件伺服器設定
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = "notify_letter.backends.PooledEmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -11,5 +11,19 @@ EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
-if not EMAIL_HOST_PASSWORD:
-    print("⚠️ 警告：未偵測到 EMAIL_HOST_PASSWORD 環境變數，郵件功能可能無法正常運作。")
+# SMTP 連線池：每個行程保留的連線數、閒置多久後視為失效 (秒)、等待可用連線的上限 (秒)
+EMAIL_POOL_SIZE = int(os.environ.get("EMAIL_POOL_SIZE", 2))
+EMAIL_POOL_MAX_IDLE = int(os.environ.get("EMAIL_POOL_MAX_IDLE", 60))
+EMAIL_POOL_ACQUIRE_TIMEOUT = int(os.environ.get("EMAIL_POOL_ACQUIRE_TIMEOUT", 30))
+
+# 背景寄信：請求只負責排入佇列，由每個行程的 worker thread 寄出
+EMAIL_ASYNC_DISPATCH = os.environ.get("EMAIL_ASYNC_DISPATCH", "true").lower() == "true"
+EMAIL_DISPATCH_WORKERS = int(os.environ.get("EMAIL_DISPATCH_WORKERS", 2))
+EMAIL_DISPATCH_QUEUE_SIZE = int(os.environ.get("EMAIL_DISPATCH_QUEUE_SIZE", 100))
+# 佇列已滿時最多等待幾秒，之後改為同步寄送
+EMAIL_DISPATCH_PUT_TIMEOUT = float(os.environ.get("EMAIL_DISPATCH_PUT_TIMEOUT", 2))
+# 關閉行程時等待佇列寄完的上限 (秒)
+EMAIL_DISPATCH_DRAIN_TIMEOUT = float(os.environ.get("EMAIL_DISPATCH_DRAIN_TIMEOUT", 20))
+
+# 教師摘要信的預設彙整間隔 (分鐘)，可在後台逐人調整
+STAFF_DIGEST_INTERVAL_MINUTES = int(os.environ.get("STAFF_DIGEST_INTERVAL_MINUTES", 15))
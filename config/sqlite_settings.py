@@ -0,0 +1,26 @@
+import os
+
+# 單機部署使用 SQLite 時的正式環境設定：
+# WAL 讓讀取不會被寫入擋住。BEGIN IMMEDIATE 只用在 utils.db.retry_on_lock 包住的寫入
+# 路徑 (預約、釋出、取消)，避免兩個交易都先讀再寫時互相卡住；其他交易維持 DEFERRED，
+# 唯讀請求與後台操作不必排隊等待寫入鎖。
+# SQLite 沒有資料列鎖，select_for_update(nowait=True) 不會立即失敗：改期等以 nowait
+# 回報 409 的路徑，在 SQLite 上要等到 busy timeout 才會得到 "database is locked"
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    # WAL 模式下 NORMAL 仍可保證資料庫不損毀，只在斷電時可能遺失最後幾筆交易
+    "synchronous": "NORMAL",
+    # 負值單位為 KiB
+    "cache_size": int(os.environ.get("SQLITE_CACHE_SIZE_KB", 20000)) * -1,
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 128 * 1024 * 1024)),
+    "temp_store": "MEMORY",
+}
+
+SQLITE_OPTIONS = {
+    "init_command": ";".join(
+        f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()
+    ),
+    # 等待其他連線釋放寫入鎖的秒數 (busy timeout)；保持短暫，鎖定衝突交給
+    # retry_on_lock 退避重試或直接回報 409，而不是讓請求卡在 worker 裡
+    "timeout": float(os.environ.get("SQLITE_BUSY_TIMEOUT", 2)),
+}
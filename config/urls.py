@@ -1,6 +1,13 @@
-from appointments.views import AppointmentViewSet, AvailableSlotsView
+from appointments.views import (
+    AppointmentViewSet,
+    AvailableSlotsView,
+    CalendarFeedTokenView,
+    CalendarFeedView,
+    HostListView,
+)
 from django.contrib import admin
 from django.urls import include, path
+from notify_letter.views import EmailDispatcherStatsView
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 from users.views import (
@@ -43,8 +50,22 @@ urlpatterns = [
     ),
     # Slots Availability
     path("api/slots/", AvailableSlotsView.as_view(), name="slots_availability"),
+    path("api/hosts/", HostListView.as_view(), name="hosts"),
+    # Calendar Feeds
+    path("api/calendar/feed/", CalendarFeedTokenView.as_view(), name="calendar_feed"),
+    path(
+        "api/calendar/<str:token>.ics",
+        CalendarFeedView.as_view(),
+        name="calendar_feed_ics",
+    ),
     # Appointments
     path("api/", include(router.urls)),
+    # Notifications
+    path(
+        "api/notify/stats/",
+        EmailDispatcherStatsView.as_view(),
+        name="email_dispatcher_stats",
+    ),
     # User Profile
     path("api/auth/profile/", ProfileView.as_view(), name="profile"),
 ]
@@ -0,0 +1,53 @@
+"""
+Gunicorn 設定 (gunicorn 會自動讀取工作目錄下的 gunicorn.conf.py)
+https://docs.gunicorn.org/en/stable/settings.html
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+# 關閉 worker 時保留時間讓背景寄信佇列寄完
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# 在 master 載入應用程式後再 fork，常見密碼清單等唯讀資料由所有 worker 共用
+preload_app = True
+
+
+def worker_exit(server, worker):
+    from django.conf import settings
+    from notify_letter.dispatcher import dispatcher
+
+    dispatcher.shutdown(timeout=settings.EMAIL_DISPATCH_DRAIN_TIMEOUT)
+    server.log.info("email dispatcher drained: %s", dispatcher.stats())
+
+
+def when_ready(server):
+    # preload 後仍在 master 中：先載入 URLconf 與所有 views，fork 出的 worker 直接共用
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+    server.log.info("URLconf loaded before forking workers")
+
+
+def post_worker_init(worker):
+    # 資料庫與快取連線不能跨 fork 共用，在 worker 開始接收請求前各自建立；
+    # 再確認每位啟用中的 host 都有可預約時段快照 (/api/slots/ 是開啟 App 後的第一個請求)；
+    # 快照存在共用快取，先啟動的 worker 建好後，其他 worker 只會命中並建立共用快取的連線
+    from appointments import availability
+    from appointments.models import Host
+    from django.db import DatabaseError, connections
+
+    for connection in connections.all(initialized_only=False):
+        connection.ensure_connection()
+
+    try:
+        host_ids = list(
+            Host.objects.filter(is_active=True).values_list("pk", flat=True)
+        )
+        for host_id in host_ids:
+            availability.available_slots(host_id)
+    except DatabaseError:
+        # 尚未 migrate 等情況下不影響啟動，第一個請求再建立快照
+        worker.log.exception("worker %s warm-up failed", worker.pid)
+        return
+    worker.log.info("worker %s warmed up (%d hosts)", worker.pid, len(host_ids))
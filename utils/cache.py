@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# 每個行程各自一份的快取後端
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def shared_cache():
+    """
+    跨 worker 共用、不會隨機淘汰的快取 (CACHES[SHARED_CACHE_ALIAS])
+    """
+    return caches[getattr(settings, "SHARED_CACHE_ALIAS", "shared")]
+
+
+def is_shared(alias="default"):
+    """
+    快取是否在所有 worker 行程之間共用 (locmem / dummy 不是)
+    """
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
@@ -0,0 +1,87 @@
+import contextlib
+import functools
+import random
+import time
+
+from django.db import OperationalError, transaction
+
+# SQLite 在等待寫入鎖逾時後回報的錯誤訊息
+LOCK_ERRORS = ("database is locked", "database table is locked")
+
+# select_for_update(nowait=True) 取不到鎖時的錯誤：PostgreSQL (55P03) 與 MySQL。
+# SQLite 不支援資料列鎖，select_for_update 與 nowait 都會被忽略，衝突只會在寫入時
+# 以 "database is locked" 回報 (最多等待 busy timeout)
+NOWAIT_ERRORS = (
+    "could not obtain lock",
+    "NOWAIT is set",
+)
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and any(
+        message in str(exc) for message in LOCK_ERRORS
+    )
+
+
+def is_lock_conflict(exc):
+    """
+    鎖定衝突 (寫入鎖逾時或 nowait 取不到鎖)；其他資料庫錯誤不算
+    """
+    return is_lock_error(exc) or (
+        isinstance(exc, OperationalError)
+        and any(message in str(exc) for message in NOWAIT_ERRORS)
+    )
+
+
+@contextlib.contextmanager
+def _immediate_transactions(using=None):
+    """
+    [Private] SQLite 上讓這段期間開始的交易以 BEGIN IMMEDIATE 開始，一開始就取得寫入鎖；
+    其他資料庫或已在外層交易中時不做任何事
+    """
+    connection = transaction.get_connection(using)
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        yield
+        return
+
+    # 建立連線時會依 OPTIONS 重設 transaction_mode，需先連線再覆寫
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    connection.transaction_mode = "IMMEDIATE"
+    try:
+        yield
+    finally:
+        connection.transaction_mode = previous
+
+
+def retry_on_lock(func=None, *, attempts=4, base_delay=0.05, using=None):
+    """
+    資料庫被其他寫入鎖住時，以指數退避 (含隨機抖動) 重新執行整個函式。
+
+    被包裝的函式應自行開啟 transaction.atomic()，重試時整個交易會重新執行；
+    若呼叫時已經在外層交易中，重試沒有意義，錯誤會直接往外拋。
+    在 SQLite 上這些交易以 BEGIN IMMEDIATE 開始，先讀後寫的交易不會在升級寫入鎖時互相卡住；
+    其他交易維持 DEFERRED，唯讀請求不會排隊等待寫入鎖。
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                try:
+                    with _immediate_transactions(using):
+                        return func(*args, **kwargs)
+                except OperationalError as exc:
+                    if (
+                        not is_lock_error(exc)
+                        or attempt == attempts - 1
+                        or transaction.get_connection(using).in_atomic_block
+                    ):
+                        raise
+                    time.sleep(base_delay * 2**attempt * random.uniform(0.5, 1.5))
+
+        return wrapper
+
+    if func is None:
+        return decorator
+    return decorator(func)
@@ -0,0 +1,120 @@
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import shared_cache
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# 目前的請求 (或 use_primary 區塊) 是否固定使用主資料庫
+_pinned = contextvars.ContextVar("db_pinned_to_primary", default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+
+@contextlib.contextmanager
+def use_primary():
+    """
+    區塊內的讀取一律走主資料庫，用於「先讀再寫」但不在交易中的流程
+    """
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    讀取分散到唯讀副本，寫入與鎖定讀取 (select_for_update) 固定走主資料庫。
+    交易中或被標記為 read-your-writes 的請求，讀取也改走主資料庫。
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if (
+            not replicas
+            # DatabaseCache (token 撤銷、時段保留、讀寫一致標記、可預約快照) 不能讀到延遲的副本
+            or model._meta.app_label == "django_cache"
+            or _pinned.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 副本與主資料庫內容相同，跨連線的關聯視為同一份資料
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _sticky_key(user_id):
+    return f"db_sticky_{user_id}"
+
+
+class ReplicaStickinessMiddleware:
+    """
+    寫入請求整個固定在主資料庫，並在之後 READ_YOUR_WRITES_SECONDS 秒內
+    讓同一位使用者的讀取也走主資料庫，避免副本延遲造成剛預約完卻看不到。
+    下一個讀取可能由其他 worker 處理，這個標記存在共用快取 (SHARED_CACHE_ALIAS)，
+    而非每個 worker 各一份的預設快取。
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.jwt = JWTAuthentication()
+
+    def _user_id(self, request):
+        """
+        [Private] 在 DRF 驗證之前取得使用者：Session 登入 (後台) 或 JWT
+        """
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user.pk
+
+        header = self.jwt.get_header(request)
+        raw_token = self.jwt.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+        try:
+            token = self.jwt.get_validated_token(raw_token)
+        except (InvalidToken, TokenError):
+            return None
+        return token.get(api_settings.USER_ID_CLAIM)
+
+    def __call__(self, request):
+        if not replica_aliases():
+            return self.get_response(request)
+
+        user_id = self._user_id(request)
+        is_write = request.method not in SAFE_METHODS
+        pinned = is_write or (
+            user_id is not None and shared_cache().get(_sticky_key(user_id)) is not None
+        )
+
+        token = _pinned.set(pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+        if is_write and user_id is not None:
+            shared_cache().set(
+                _sticky_key(user_id),
+                1,
+                timeout=getattr(settings, "READ_YOUR_WRITES_SECONDS", 10),
+            )
+        return response
@@ -0,0 +1,132 @@
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import shared_cache
+
+IDEMPOTENCY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+MAX_KEY_LENGTH = 255
+
+# 處理中的請求最多佔用鎖多久，避免 worker 中途被殺掉後鎖永遠不釋放
+LOCK_TIMEOUT = 30
+
+# 等待處理中的相同請求完成時，輪詢結果的間隔 (秒)
+POLL_INTERVAL = 0.05
+
+# 暫時性的結果 (時段正被修改、被保留、排隊中) 不保存，客戶端可用同一把 key 重試
+TRANSIENT_STATUSES = {
+    status.HTTP_409_CONFLICT,
+    status.HTTP_423_LOCKED,
+    status.HTTP_429_TOO_MANY_REQUESTS,
+}
+
+
+def _fingerprint(request):
+    """
+    [Private] 以請求內容產生指紋，防止同一把 key 被拿來送出不同的內容
+    """
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def _cache_keys(request, key):
+    """
+    [Private] 同一使用者對同一路徑的同一把 key 共用結果與處理中的鍵
+    """
+    scope = f"{request.user.pk}:{request.method}:{request.path}:{key}"
+    digest = hashlib.sha256(scope.encode("utf-8")).hexdigest()
+    return f"idempotency_result_{digest}", f"idempotency_lock_{digest}"
+
+
+def _replay(stored, fingerprint):
+    if stored["fingerprint"] != fingerprint:
+        return Response(
+            {"error": "Idempotency-Key was reused with a different payload."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(stored["data"], status=stored["status"])
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view_method):
+    """
+    讓 DRF view 方法支援 Idempotency-Key 標頭。
+
+    第一次請求的最終結果 (2xx 與確定性的 4xx) 會存入共用快取 (IDEMPOTENCY_KEY_TTL 秒)，
+    之後帶相同 key 的重試 (不論打到哪個 worker) 直接重播該回應，不再碰資料庫或重寄
+    Email；5xx 與 TRANSIENT_STATUSES 不保存。
+
+    同時抵達的重複請求最多等待 IDEMPOTENCY_WAIT_SECONDS 秒：期間前一個請求完成就重播
+    它的結果，前一個請求沒有保存結果就改由這個請求執行；逾時仍在處理中則回傳 409 與
+    Retry-After，客戶端應在指定秒數後以同一把 key 重試。
+    沒有帶標頭的請求維持原本行為。
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": "Idempotency-Key is too long."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        result_key, lock_key = _cache_keys(request, key)
+        fingerprint = _fingerprint(request)
+
+        cache = shared_cache()
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            stored = cache.get(result_key)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+
+            if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+                # 前一個請求可能剛好在 get 與 add 之間存下結果並釋放鎖
+                stored = cache.get(result_key)
+                if stored is None:
+                    break
+                cache.delete(lock_key)
+                return _replay(stored, fingerprint)
+
+            if time.monotonic() >= deadline:
+                # 相同 key 的請求仍在處理中：請客戶端稍後以同一把 key 重試
+                response = Response(
+                    {"error": "A request with this Idempotency-Key is in progress."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+                response["Retry-After"] = "1"
+                return response
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            # 伺服器錯誤與暫時性衝突不保存，讓客戶端可以用同一把 key 重試
+            if (
+                response.status_code < 500
+                and response.status_code not in TRANSIENT_STATUSES
+            ):
+                cache.set(
+                    result_key,
+                    {
+                        "fingerprint": fingerprint,
+                        "status": response.status_code,
+                        "data": response.data,
+                    },
+                    timeout=settings.IDEMPOTENCY_KEY_TTL,
+                )
+        finally:
+            cache.delete(lock_key)
+
+        return response
+
+    return wrapper
@@ -0,0 +1,253 @@
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+from django.utils.functional import SimpleLazyObject, empty
+
+logger = logging.getLogger("slotmate.request")
+
+# 目前請求的記錄資訊：request_id、開始時間、view 與 action
+_context = contextvars.ContextVar("log_context", default=None)
+
+# LogRecord 本身的屬性，其餘屬性視為 extra 欄位輸出
+_RECORD_ATTRS = set(
+    logging.LogRecord("", logging.INFO, "", 0, "", None, None).__dict__
+) | {"message", "asctime"}
+
+SENSITIVE_KEYS = (
+    "password",
+    "passwd",
+    "pwd",
+    "secret",
+    "token",
+    "authorization",
+    "otp",
+    "api_key",
+)
+REDACTED = "[REDACTED]"
+
+_SENSITIVE_PAIR = re.compile(
+    r"(?i)(\b\w*(?:" + "|".join(SENSITIVE_KEYS) + r")\w*\b[\"']?\s*[:=]\s*)"
+    r"(\"[^\"]*\"|'[^']*'|[^\s,;&}]+)"
+)
+_SENSITIVE_VALUE = re.compile(
+    r"\beyJ[\w-]+\.[\w-]+\.[\w-]+|(?i:\bbearer\s+)[\w.~+/=-]+"
+)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    請求 thread 只把紀錄放進佇列，由背景 QueueListener 寫到實際的 handler，
+    stdout 阻塞時不會卡住請求。搭配 gunicorn preload_app 時，fork 出的 worker
+    不會繼承 master 的 listener thread，第一次寫入時會重新建立自己的佇列與 listener。
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self._pid = None
+
+    def start(self):
+        """
+        [Public] 啟動背景 listener；呼叫端需持有 handler 的 lock (emit 已持有)
+        """
+        if self._pid == os.getpid() or self.listener is None:
+            return
+
+        if self._pid is not None:
+            # 繼承自 fork 前的佇列可能正被其他 thread 鎖住，換一個新的
+            self.queue = queue.Queue()
+            self.listener = logging.handlers.QueueListener(
+                self.queue,
+                *self.listener.handlers,
+                respect_handler_level=self.listener.respect_handler_level,
+            )
+        self._pid = os.getpid()
+        self.listener.start()
+
+    def prepare(self, record):
+        # 保留 extra 欄位，例外先轉成文字 (traceback 物件不適合跨 thread 保留)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        self.start()
+        super().emit(record)
+
+    def close(self):
+        # 行程結束時 (logging.shutdown) 寫完佇列中剩下的紀錄
+        self.acquire()
+        try:
+            if self._pid == os.getpid():
+                self.listener.stop()
+                self._pid = None
+        finally:
+            self.release()
+        super().close()
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    在請求 thread 上為紀錄加上 request_id、user_id、view、action 與已經過的毫秒數
+    """
+
+    def filter(self, record):
+        context = _context.get()
+        if context is None:
+            # django.request 在 middleware 之外記錄錯誤回應，由 request 物件取回 request_id
+            request_id = getattr(getattr(record, "request", None), "request_id", None)
+            if request_id:
+                record.request_id = request_id
+            return True
+
+        record.request_id = context["request_id"]
+        record.elapsed_ms = round((time.perf_counter() - context["started"]) * 1000, 1)
+        for key in ("view", "action"):
+            if context[key] and not hasattr(record, key):
+                setattr(record, key, context[key])
+
+        user = getattr(context["request"], "user", None)
+        # 尚未驗證的 lazy user 不在這裡觸發查詢
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            user = None
+        if user is not None and user.is_authenticated:
+            record.user_id = user.pk
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    level 以下 (預設 DEBUG) 的大量紀錄只保留 rate 比例；以 request_id 決定，
+    同一個請求的紀錄不是全部保留就是全部捨棄，方便追完整個流程
+    """
+
+    def __init__(self, rate=1.0, level=logging.DEBUG):
+        super().__init__()
+        self.rate = float(rate)
+        self.level = logging._checkLevel(level)
+
+    def filter(self, record):
+        if record.levelno > self.level or self.rate >= 1:
+            return True
+
+        context = _context.get()
+        if context is None:
+            return random.random() < self.rate
+        bucket = zlib.crc32(context["request_id"].encode()) % 10_000
+        return bucket < self.rate * 10_000
+
+
+def redact(value):
+    """
+    遮蔽字串中的密碼、token 等欄位值與 JWT / Bearer 憑證
+    """
+    # 先遮蔽憑證本身：否則 "Authorization: Bearer xxx" 只會遮掉 "Bearer"
+    value = _SENSITIVE_VALUE.sub(REDACTED, value)
+    return _SENSITIVE_PAIR.sub(lambda match: match.group(1) + REDACTED, value)
+
+
+class RedactionFilter(logging.Filter):
+    """
+    寫出前遮蔽訊息、例外與 extra 欄位中的機密資料
+    """
+
+    def filter(self, record):
+        record.msg = redact(record.getMessage())
+        record.args = None
+        if record.exc_text:
+            record.exc_text = redact(record.exc_text)
+
+        for key, value in list(record.__dict__.items()):
+            if key in _RECORD_ATTRS:
+                continue
+            if any(word in key.lower() for word in SENSITIVE_KEYS):
+                setattr(record, key, REDACTED)
+            elif isinstance(value, str):
+                setattr(record, key, redact(value))
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    一筆紀錄一行 JSON，extra 欄位直接成為頂層欄位
+    """
+
+    def format(self, record):
+        payload = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class RequestLogMiddleware:
+    """
+    為每個請求建立記錄資訊 (沿用 X-Request-ID 或產生新的)，
+    結束時記錄一筆含狀態碼與耗時的存取紀錄，並在回應加上 X-Request-ID
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.META.get("HTTP_X_REQUEST_ID", "")[:64] or uuid.uuid4().hex
+        context = {
+            "request_id": request_id,
+            "request": request,
+            "started": time.perf_counter(),
+            "view": None,
+            "action": None,
+        }
+        request.request_id = request_id
+        token = _context.set(context)
+        try:
+            response = self.get_response(request)
+            # 耗時由 RequestContextFilter 以 elapsed_ms 欄位附上
+            logger.info(
+                "%s %s %s",
+                request.method,
+                request.path,
+                response.status_code,
+                extra={"status": response.status_code},
+            )
+        finally:
+            _context.reset(token)
+
+        response["X-Request-ID"] = request_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        context = _context.get()
+        if context is None:
+            return None
+        # DRF ViewSet 的 as_view() 會帶 cls 與 {HTTP 方法: action} 對照
+        view_class = getattr(view_func, "cls", None)
+        context["view"] = view_class.__name__ if view_class else view_func.__name__
+        context["action"] = (getattr(view_func, "actions", None) or {}).get(
+            request.method.lower()
+        )
+        return None
@@ -0,0 +1,87 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from .cache import is_shared
+from .db_router import use_primary
+
+# 回應內容最長保留時間；正常情況由版本號失效，這只是保險
+BODY_TTL = 60 * 60 * 24
+
+
+def _version_key(user_id):
+    return f"user_cache_version_{user_id}"
+
+
+def _body_key(name, user_id, version):
+    return f"user_cache_{name}_{user_id}_{version}"
+
+
+def enabled():
+    """
+    預設快取在所有 worker 之間共用時才啟用；locmem 每個 worker 各一份，
+    其他 worker 遞增的版本號看不到，會一直回應舊的內容
+    """
+    return is_shared()
+
+
+def version(user_id):
+    """
+    使用者個人資料與預約的目前版本，任何影響該使用者的變更都會遞增
+    """
+    key = _version_key(user_id)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, int(time.time()), timeout=None)
+        # add 與其他請求的 add / bump 競爭，以實際存下的版本為準
+        value = cache.get(key)
+    return value
+
+
+def invalidate(user_ids):
+    """
+    交易提交後讓指定使用者的快取回應失效。
+    不論人數多寡都只有一次 get_many 與一次 set_many，後台批次操作也適用。
+    """
+    keys = [_version_key(user_id) for user_id in set(user_ids) if user_id]
+    if not keys:
+        return
+
+    def bump():
+        # +1 確保同一秒內的連續變更仍會產生新版本
+        now = int(time.time())
+        versions = cache.get_many(keys)
+        cache.set_many(
+            {key: max(now, versions.get(key, 0) + 1) for key in keys}, timeout=None
+        )
+
+    transaction.on_commit(bump)
+
+
+def _render(build):
+    """
+    [Private] build() 一律讀主資料庫，避免把副本延遲的舊資料存在新版本號下
+    """
+    with use_primary():
+        return JSONRenderer().render(build())
+
+
+def cached_json(name, user_id, build):
+    """
+    以 build() 產生的資料回應，並將 render 好的 JSON bytes 依使用者與版本號快取。
+    命中時直接回傳 bytes，不查資料庫也不經過 serializer。
+    """
+    current = version(user_id) if enabled() else None
+    if current is None:
+        # 未啟用 (或版本號剛好被淘汰) 時不快取
+        return HttpResponse(_render(build), content_type="application/json")
+
+    key = _body_key(name, user_id, current)
+    body = cache.get(key)
+    if body is None:
+        body = _render(build)
+        cache.set(key, body, timeout=BODY_TTL)
+    return HttpResponse(body, content_type="application/json")